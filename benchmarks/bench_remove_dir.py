@@ -0,0 +1,94 @@
+"""
+Сравнение скорости удаления деревьев с множеством мелких файлов:
+shutil.rmtree против параллельного удаления utils.remove_tree.
+
+Запуск:
+    python benchmarks/bench_remove_dir.py --files 100000 --workers 8
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import remove_tree, REMOVE_TREE_WORKERS
+
+
+def build_tree(root: str, files: int, fanout: int, file_size: int):
+    """
+    Создать синтетическое дерево, похожее на локальную историю EDT.
+    
+    Args:
+        root: Корневая директория
+        files: Общее количество файлов
+        fanout: Количество файлов в одной директории
+        file_size: Размер каждого файла в байтах
+    """
+    payload = b'x' * file_size
+    for index in range(files):
+        bucket = os.path.join(root, format(index // fanout % 256, '02x'), str(index // (fanout * 256)))
+        if index % fanout == 0:
+            os.makedirs(bucket, exist_ok=True)
+        with open(os.path.join(bucket, str(index)), 'wb') as f:
+            f.write(payload)
+
+
+def measure(name: str, remove, args) -> float:
+    """
+    Построить дерево и замерить время его удаления.
+    
+    Args:
+        name: Название метода
+        remove: Функция удаления, принимающая путь
+        args: Параметры генерации дерева
+        
+    Returns:
+        Время удаления в секундах
+    """
+    base = tempfile.mkdtemp(prefix='bench-remove-', dir=args.dir)
+    root = os.path.join(base, 'tree')
+    try:
+        build_tree(root, args.files, args.fanout, args.size)
+        start = time.perf_counter()
+        remove(root)
+        elapsed = time.perf_counter() - start
+        if os.path.exists(root):
+            raise RuntimeError(f'{name}: tree was not removed')
+        return elapsed
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark directory removal')
+    parser.add_argument('--files', type=int, default=50000, help='Количество файлов')
+    parser.add_argument('--fanout', type=int, default=64, help='Файлов в директории')
+    parser.add_argument('--size', type=int, default=512, help='Размер файла в байтах')
+    parser.add_argument('--workers', type=int, default=REMOVE_TREE_WORKERS, help='Потоков удаления')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов')
+    parser.add_argument('--dir', default=None, help='Директория для синтетических деревьев')
+    args = parser.parse_args()
+    
+    methods = [
+        ('shutil.rmtree', shutil.rmtree),
+        (f'remove_tree({args.workers})', lambda path: remove_tree(path, max_workers=args.workers)),
+    ]
+    
+    print(f'files={args.files} fanout={args.fanout} size={args.size}B repeat={args.repeat}')
+    timings = {}
+    for name, remove in methods:
+        runs = [measure(name, remove, args) for _ in range(args.repeat)]
+        timings[name] = min(runs)
+        print(f'{name:<20} best {timings[name]:.3f}s  ({args.files / timings[name]:,.0f} files/s)')
+    
+    baseline = timings['shutil.rmtree']
+    for name, elapsed in timings.items():
+        print(f'{name:<20} speedup x{baseline / elapsed:.2f}')
+
+
+if __name__ == '__main__':
+    main()
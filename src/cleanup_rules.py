@@ -0,0 +1,267 @@
+"""
+Правила очистки EDT workspace: реестр правил, компиляция glob-шаблонов
+в единый матчер и сбор целей удаления за один обход директории.
+"""
+
+import os
+import re
+import fnmatch
+from typing import Dict, List, Optional, Tuple
+
+
+# Категории очистки, по которым ведется статистика workspace
+CATEGORIES = ('logs', 'history', 'snapshots', 'caches')
+
+# Реестр правил по умолчанию (white-list безопасных для удаления путей):
+# `*` - любое имя в пределах компонента пути, `**` - любая вложенность.
+# При совпадении нескольких правил применяется первое по порядку.
+DEFAULT_RULES = [
+    {
+        'name': 'workspaceLog',
+        'category': 'logs',
+        'patterns': ['.metadata/.log', '.metadata/.bak_*.log'],
+    },
+    {
+        'name': 'pluginLogs',
+        'category': 'logs',
+        'patterns': ['.metadata/.plugins/**/*.log'],
+    },
+    {
+        'name': 'localHistory',
+        'category': 'history',
+        'patterns': ['.metadata/.plugins/org.eclipse.core.resources/.history'],
+    },
+    {
+        'name': 'resourcesSnapshot',
+        'category': 'snapshots',
+        'patterns': ['.metadata/.plugins/org.eclipse.core.resources/.snap'],
+    },
+    {
+        'name': 'pluginSnapshots',
+        'category': 'snapshots',
+        'patterns': ['.metadata/.plugins/*/snapshots'],
+    },
+    {
+        'name': 'bundlePool',
+        'category': 'caches',
+        'patterns': ['.metadata/.plugins/org.eclipse.pde.core/.bundle_pool'],
+    },
+    {
+        'name': 'workbenchBackup',
+        'category': 'caches',
+        'patterns': ['.metadata/.plugins/org.eclipse.e4.workbench/workbench.xmi.bak'],
+    },
+    {
+        'name': 'safeTable',
+        'category': 'caches',
+        'patterns': ['.metadata/.plugins/org.eclipse.core.resources/.safetable'],
+    },
+    {
+        'name': 'jdtIndex',
+        'category': 'caches',
+        'patterns': ['.metadata/.plugins/org.eclipse.jdt.core/*.index'],
+    },
+]
+
+
+def build_rules(extra_rules: Optional[List[Dict]] = None,
+                disabled_rules: Optional[List[str]] = None) -> Tuple[List[Dict], List[str]]:
+    """
+    Собрать реестр правил: правила по умолчанию и правила из конфигурации.
+    
+    Правило из конфигурации с именем правила по умолчанию заменяет его.
+    Шаблоны задаются относительно workspace и должны начинаться с `.metadata/`.
+    
+    Args:
+        extra_rules: Дополнительные правила (name, category, patterns)
+        disabled_rules: Имена отключенных правил
+        
+    Returns:
+        Кортеж (список правил, список ошибок в описании правил)
+    """
+    rules = {rule['name']: rule for rule in DEFAULT_RULES}
+    errors = []
+    
+    for rule in extra_rules or []:
+        if not isinstance(rule, dict):
+            errors.append(f'Invalid cleanup rule: {rule!r}')
+            continue
+        
+        name = rule.get('name')
+        category = rule.get('category')
+        patterns = rule.get('patterns')
+        if not name or not isinstance(name, str):
+            errors.append(f'Cleanup rule without name: {rule!r}')
+            continue
+        if category not in CATEGORIES:
+            errors.append(f'Cleanup rule {name}: unknown category {category!r}')
+            continue
+        if not isinstance(patterns, list) or not patterns or not all(
+            isinstance(pattern, str) and pattern.startswith('.metadata/') and '..' not in pattern.split('/')
+            for pattern in patterns
+        ):
+            errors.append(f'Cleanup rule {name}: patterns must be paths under .metadata/')
+            continue
+        
+        rules[name] = {'name': name, 'category': category, 'patterns': list(patterns)}
+    
+    disabled = set(disabled_rules or [])
+    return [rule for name, rule in rules.items() if name not in disabled], errors
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Преобразовать glob-шаблон пути в регулярное выражение.
+    
+    Поддерживаются `*` и `?` в пределах одного компонента пути и `**`
+    для любого количества компонентов (в том числе нуля).
+    
+    Args:
+        pattern: Шаблон относительного пути с разделителем `/`
+    
+    Returns:
+        Регулярное выражение без якорей
+    """
+    parts = []
+    segments = pattern.strip('/').split('/')
+    for index, segment in enumerate(segments):
+        last = index == len(segments) - 1
+        if segment == '**':
+            parts.append('.*' if last else '(?:[^/]+/)*')
+            continue
+        
+        regex = ''
+        for char in segment:
+            if char == '*':
+                regex += '[^/]*'
+            elif char == '?':
+                regex += '[^/]'
+            else:
+                regex += re.escape(char)
+        parts.append(regex if last else regex + '/')
+    
+    return ''.join(parts)
+
+
+class RuleMatcher:
+    """Единый матчер для всех шаблонов очистки."""
+    
+    def __init__(self, rules: List[Dict]):
+        """
+        Скомпилировать шаблоны всех правил в одно регулярное выражение.
+        
+        Args:
+            rules: Правила очистки (name, category, patterns)
+        """
+        self.patterns = []
+        for rule in rules:
+            for pattern in rule['patterns']:
+                self.patterns.append((rule, pattern.strip('/').split('/')))
+        
+        flags = re.IGNORECASE if os.name == 'nt' else 0
+        alternatives = [
+            f'(?P<r{index}>{glob_to_regex("/".join(segments))})'
+            for index, (_, segments) in enumerate(self.patterns)
+        ]
+        self.regex = re.compile('^(?:' + '|'.join(alternatives) + ')$', flags) if alternatives else None
+    
+    def match(self, rel_path: str) -> Optional[Dict]:
+        """
+        Определить правило для пути.
+        
+        При совпадении нескольких шаблонов выбирается первый по порядку.
+        
+        Args:
+            rel_path: Путь относительно workspace с разделителем `/`
+            
+        Returns:
+            Правило или None если путь не подлежит удалению
+        """
+        if self.regex is None:
+            return None
+        
+        match = self.regex.match(rel_path)
+        if match is None:
+            return None
+        
+        return self.patterns[int(match.lastgroup[1:])][0]
+    
+    def can_contain_matches(self, rel_dir: str) -> bool:
+        """
+        Проверить, могут ли внутри директории быть пути под шаблоны.
+        
+        Позволяет не спускаться в директории, которые заведомо не содержат
+        целей очистки.
+        
+        Args:
+            rel_dir: Путь директории относительно workspace
+        
+        Returns:
+            True если в директорию нужно спускаться
+        """
+        dir_segments = rel_dir.strip('/').split('/')
+        if os.name == 'nt':
+            dir_segments = [segment.lower() for segment in dir_segments]
+        
+        return any(self.can_extend(dir_segments, segments) for _, segments in self.patterns)
+    
+    def can_extend(self, dir_segments: List[str], segments: List[str]) -> bool:
+        """
+        Проверить, совпадает ли директория с началом шаблона.
+        
+        Args:
+            dir_segments: Компоненты пути директории
+            segments: Компоненты шаблона
+        
+        Returns:
+            True если после директории в шаблоне остаются компоненты
+        """
+        if not dir_segments:
+            return bool(segments)
+        if not segments:
+            return False
+        if segments[0] == '**':
+            return True
+        
+        pattern = segments[0].lower() if os.name == 'nt' else segments[0]
+        if not fnmatch.fnmatchcase(dir_segments[0], pattern):
+            return False
+        return self.can_extend(dir_segments[1:], segments[1:])
+    
+    def collect_targets(self, workspace_path: str, start: str = '.metadata') -> List[Tuple[str, Dict]]:
+        """
+        Собрать цели удаления за один обход директории workspace.
+        
+        Совпавшая директория добавляется целиком, без спуска в нее.
+        
+        Args:
+            workspace_path: Путь к workspace
+            start: Директория обхода относительно workspace
+        
+        Returns:
+            Список пар (путь, правило)
+        """
+        targets = []
+        pending = [start]
+        
+        while pending:
+            rel_dir = pending.pop()
+            try:
+                with os.scandir(os.path.join(workspace_path, rel_dir)) as entries:
+                    for entry in entries:
+                        rel_path = f'{rel_dir}/{entry.name}'
+                        rule = self.match(rel_path)
+                        if rule is not None:
+                            targets.append((entry.path, rule))
+                            continue
+                        
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if is_dir and self.can_contain_matches(rel_path):
+                            pending.append(rel_path)
+            except (OSError, PermissionError):
+                continue
+        
+        return targets
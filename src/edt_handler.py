@@ -3,34 +3,60 @@
 """
 
 import os
-import glob
-from typing import Dict, List
-from .utils import get_size_gb, is_process_running, safe_remove_file, safe_remove_dir
+import json
+import time
+import shutil
+import struct
+import zipfile
+import urllib.parse
+import urllib.request
+from xml.etree import ElementTree
+from typing import Dict, List, Optional, Tuple
+from .utils import (
+    get_size_gb, get_size_bytes, is_process_running, remove_path_counted,
+    find_duplicate_files, replace_with_hardlink, safe_remove_file
+)
+from .trash import DeferredPurge
+from .cleanup_rules import RuleMatcher, CATEGORIES, build_rules
 
 
 class EdtHandler:
     """Класс для обслуживания EDT workspaces."""
     
-    # White-list безопасных для удаления путей
-    SAFE_TO_DELETE = {
-        'logs': [
-            '.metadata/.log',
-            '.metadata/.bak_*.log',
-        ],
-        'history': [
-            '.metadata/.plugins/org.eclipse.core.resources/.history',
-        ],
-        'snapshots': [
-            '.metadata/.plugins/org.eclipse.core.resources/.snap',
-            '.metadata/.plugins/*/snapshots',
-        ],
-        'caches': [
-            '.metadata/.plugins/org.eclipse.pde.core/.bundle_pool',
-            '.metadata/.plugins/org.eclipse.e4.workbench/workbench.xmi.bak',
-            '.metadata/.plugins/org.eclipse.core.resources/.safetable',
-            '.metadata/.plugins/org.eclipse.jdt.core/*.index',
-        ],
-    }
+    # Категории статистики очистки
+    CATEGORIES = CATEGORIES + ('orphans',)
+    
+    # Правило для метаданных удаленных проектов
+    ORPHAN_RULE = {'name': 'orphanedProjects', 'category': 'orphans', 'patterns': []}
+    
+    # Метаданные проектов в плагине ресурсов
+    RESOURCES_PLUGIN = 'org.eclipse.core.resources'
+    
+    # Плагины, хранящие состояние проекта в поддиректории с его именем
+    PROJECT_STATE_PLUGINS = [
+        'com._1c.g5.v8.dt.core',
+        'com.e1c.g5.dt.core',
+    ]
+    
+    # Пулы неизменяемых файлов, общие для workspaces, для дедупликации
+    DEFAULT_DEDUP_PATHS = [
+        '.metadata/.plugins/org.eclipse.pde.core/.bundle_pool',
+    ]
+    
+    # Правило очистки, заменяемое дедупликацией
+    DEDUP_REPLACED_RULE = 'bundlePool'
+    
+    # Служебная директория 1C-Sweeper внутри .metadata
+    SWEEPER_DIR = '.1c-sweeper'
+    
+    # Архив локальной истории
+    HISTORY_ARCHIVE = 'history.zip'
+    
+    # Телеметрия восстановления кэшей
+    TELEMETRY_FILE = 'telemetry.json'
+    
+    # Дата самой старой записи в корзинах локальной истории
+    HISTORY_INDEX_FILE = 'history-index.json'
     
     def __init__(self, config: dict, silent: bool = False):
         """
@@ -43,6 +69,15 @@ class EdtHandler:
         self.config = config
         self.silent = silent
         self.results = []
+        # Реестр правил очистки: правила по умолчанию и правила из конфигурации
+        disabled_rules = list(config.get('disabledRules', []))
+        if config.get('dedupPools', False):
+            # Пул дедуплицируется между workspaces вместо удаления
+            disabled_rules.append(self.DEDUP_REPLACED_RULE)
+        self.rules, self.rule_errors = build_rules(config.get('extraRules', []), disabled_rules)
+        self.matcher = RuleMatcher(self.rules)
+        # Отложенное удаление: перенос в корзину и очистка в фоне
+        self.trash = DeferredPurge(silent) if config.get('deferredDelete', False) else None
     
     def find_workspaces(self) -> List[str]:
         """
@@ -95,103 +130,706 @@ class EdtHandler:
         """
         Очистить workspace от временных файлов.
         
+        Шаблоны всех правил реестра проверяются единым матчером за один обход
+        .metadata. Файлы подсчитываются и измеряются во время удаления, без
+        отдельного обхода перед удалением.
+        
         Args:
             workspace_path: Путь к workspace
             
         Returns:
-            Статистика удаления по категориям
+            Статистика удаления по категориям (количество файлов и байт) и
+            по правилам в ключе 'rules'
         """
         stats = {
             'logsCleared': 0,
             'historyCleared': 0,
             'snapshotsCleared': 0,
             'cachesCleared': 0,
+            'logsBytes': 0,
+            'historyBytes': 0,
+            'snapshotsBytes': 0,
+            'cachesBytes': 0,
+            'orphansCleared': 0,
+            'orphansBytes': 0,
+            'targetsStaged': 0,
+            'historyArchived': 0,
+            'dedupLinked': 0,
+            'dedupBytes': 0,
+            'orphanedProjects': [],
+            'cacheTelemetry': {},
+            'rules': {},
+        }
+        
+        remove_orphans = self.config.get('removeOrphanedProjects', False)
+        active_rules = self.rules + ([self.ORPHAN_RULE] if remove_orphans else [])
+        for rule in active_rules:
+            stats['rules'][rule['name']] = {
+                'category': rule['category'],
+                'filesRemoved': 0,
+                'bytesFreed': 0,
+                'seconds': 0.0,
+            }
+        
+        # Цели собираются за один обход .metadata, затем удаляются
+        targets = self.matcher.collect_targets(workspace_path)
+        
+        if remove_orphans:
+            orphans, orphan_paths = self.find_orphaned_metadata(workspace_path)
+            stats['orphanedProjects'] = orphans
+            targets.extend((path, self.ORPHAN_RULE) for path in orphan_paths)
+        
+        use_telemetry = self.config.get('cacheTelemetry', False)
+        telemetry = self.load_telemetry(workspace_path) if use_telemetry else {}
+        now = time.time()
+        skipped_rules = {
+            name for name, rule_stats in stats['rules'].items()
+            if use_telemetry and rule_stats['category'] == 'caches'
+            and self.should_skip_cache(telemetry.get(name), now)
         }
+        # Объем целей кэш-правил: освобожденный или измеренный без удаления
+        sampled = {}
+        
+        for path, rule in targets:
+            is_cache = use_telemetry and rule['category'] == 'caches'
+            if rule['name'] in skipped_rules or (is_cache and self.trash):
+                # Кэш не удаляется или удаляется в фоне: измеряем объем сейчас
+                sampled[rule['name']] = sampled.get(rule['name'], 0) + get_size_bytes(path)
+            if rule['name'] in skipped_rules:
+                continue
+            self.delete_target(workspace_path, path, rule, stats)
+        
+        for rule_stats in stats['rules'].values():
+            rule_stats['seconds'] = round(rule_stats['seconds'], 3)
+        
+        if use_telemetry:
+            for name, rule_stats in stats['rules'].items():
+                if rule_stats['category'] != 'caches':
+                    continue
+                deleted = name not in skipped_rules
+                size_bytes = sampled.get(name, 0) if name in skipped_rules or self.trash else rule_stats['bytesFreed']
+                entry = self.record_cache_sample(telemetry.get(name), size_bytes, deleted, now)
+                telemetry[name] = entry
+                stats['cacheTelemetry'][name] = {
+                    'action': 'deleted' if deleted else 'skipped',
+                    'sampledBytes': size_bytes,
+                    'regrowthRatio': entry.get('regrowthRatio'),
+                    'regrowthDays': entry.get('regrowthDays'),
+                }
+            self.save_telemetry(workspace_path, telemetry)
+        
+        if self.trash:
+            self.trash.flush()
+        
+        return stats
+    
+    def delete_target(self, workspace_path: str, path: str, rule: Dict, stats: Dict):
+        """
+        Удалить цель очистки и учесть результат в статистике.
+        
+        При включенном отложенном удалении цель переносится в корзину, а
+        файлы и байты учитываются после фоновой очистки.
+        
+        Args:
+            workspace_path: Путь к workspace
+            path: Путь к файлу или директории
+            rule: Правило очистки, которому соответствует цель
+            stats: Статистика удаления для обновления
+        """
+        rule_stats = stats['rules'][rule['name']]
+        start_time = time.perf_counter()
+        
+        retention_days = self.config.get('historyRetentionDays', 0)
+        archive_history = self.config.get('historyArchive', False)
+        
+        if rule['category'] == 'history' and archive_history and os.path.isdir(path):
+            files, size_bytes = self.archive_history(workspace_path, path, retention_days)
+            stats['historyArchived'] += files
+            stats['historyCleared'] += files
+            stats['historyBytes'] += size_bytes
+            rule_stats['filesRemoved'] += files
+            rule_stats['bytesFreed'] += size_bytes
+        elif rule['category'] == 'history' and retention_days > 0 and os.path.isdir(path):
+            files, size_bytes = self.prune_history(workspace_path, path, retention_days, rule, stats)
+            stats['historyCleared'] += files
+            stats['historyBytes'] += size_bytes
+            rule_stats['filesRemoved'] += files
+            rule_stats['bytesFreed'] += size_bytes
+        elif self.trash and self.trash.stage(path, rule['name'], workspace_path):
+            stats['targetsStaged'] += 1
+        else:
+            files, size_bytes = remove_path_counted(path)
+            stats[f'{rule["category"]}Cleared'] += files
+            stats[f'{rule["category"]}Bytes'] += size_bytes
+            rule_stats['filesRemoved'] += files
+            rule_stats['bytesFreed'] += size_bytes
+        
+        rule_stats['seconds'] += time.perf_counter() - start_time
+    
+    def prune_history(self, workspace_path: str, history_path: str, retention_days: int,
+                      rule: Dict, stats: Dict) -> Tuple[int, int]:
+        """
+        Удалить записи локальной истории старше срока хранения.
         
-        # Удаляем логи
-        for pattern in self.SAFE_TO_DELETE['logs']:
-            full_pattern = os.path.join(workspace_path, pattern)
+        Записи истории хранятся в директориях-корзинах и не изменяются после
+        создания, поэтому mtime корзины не старше ее самой новой записи.
+        Корзина, не изменявшаяся дольше срока хранения, удаляется целиком без
+        проверки дат отдельных файлов. Eclipse распределяет записи по корзинам
+        случайно, и почти все корзины молодые, поэтому для каждой корзины
+        запоминается дата самой старой оставшейся записи: новые записи только
+        новее, и корзина, самая старая запись которой еще не устарела,
+        пропускается без проверки файлов.
+        
+        Args:
+            workspace_path: Путь к workspace
+            history_path: Путь к директории .history
+            retention_days: Срок хранения в днях
+            rule: Правило очистки истории
+            stats: Статистика удаления для обновления
             
-            # Обрабатываем паттерны с wildcard
-            if '*' in pattern:
-                for filepath in glob.glob(full_pattern):
-                    if os.path.isfile(filepath):
-                        if safe_remove_file(filepath):
-                            stats['logsCleared'] += 1
-            else:
-                # Точный путь к файлу
-                if os.path.exists(full_pattern):
-                    if safe_remove_file(full_pattern):
-                        stats['logsCleared'] += 1
+        Returns:
+            Кортеж (удалено файлов, удалено байт); записи, перенесенные в
+            корзину, учитываются после фоновой очистки
+        """
+        cutoff = time.time() - retention_days * 86400
+        files = 0
+        size_bytes = 0
+        
+        try:
+            with os.scandir(history_path) as buckets:
+                bucket_entries = list(buckets)
+        except (OSError, PermissionError):
+            return 0, 0
+        
+        oldest_entries = self.load_history_index(workspace_path)
+        updated_index = {}
+        
+        for bucket in bucket_entries:
+            try:
+                if not bucket.is_dir(follow_symlinks=False):
+                    continue
+                bucket_mtime = bucket.stat(follow_symlinks=False).st_mtime
+            except OSError:
+                continue
+            
+            if bucket_mtime < cutoff:
+                if self.trash and self.trash.stage(bucket.path, rule['name'], workspace_path):
+                    stats['targetsStaged'] += 1
+                    continue
+                bucket_files, bucket_bytes = remove_path_counted(bucket.path)
+                files += bucket_files
+                size_bytes += bucket_bytes
+                continue
+            
+            # Молодая корзина без устаревших записей пропускается без проверки файлов
+            oldest = oldest_entries.get(bucket.name)
+            if isinstance(oldest, (int, float)) and oldest >= cutoff:
+                updated_index[bucket.name] = oldest
+                continue
+            
+            # Удаляем только устаревшие записи и запоминаем самую старую из оставшихся
+            oldest = None
+            try:
+                with os.scandir(bucket.path) as entries:
+                    for entry in entries:
+                        try:
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            entry_stat = entry.stat(follow_symlinks=False)
+                            if entry_stat.st_mtime < cutoff:
+                                os.remove(entry.path)
+                                files += 1
+                                size_bytes += entry_stat.st_size
+                            elif oldest is None or entry_stat.st_mtime < oldest:
+                                oldest = entry_stat.st_mtime
+                        except (OSError, PermissionError):
+                            continue
+            except (OSError, PermissionError):
+                continue
+            
+            if oldest is not None:
+                updated_index[bucket.name] = oldest
+        
+        self.save_history_index(workspace_path, updated_index)
+        return files, size_bytes
+    
+    def get_history_index_path(self, workspace_path: str) -> str:
+        """
+        Получить путь к индексу корзин локальной истории workspace.
+        
+        Args:
+            workspace_path: Путь к workspace
+            
+        Returns:
+            Путь к файлу индекса
+        """
+        return os.path.join(workspace_path, '.metadata', self.SWEEPER_DIR, self.HISTORY_INDEX_FILE)
+    
+    def load_history_index(self, workspace_path: str) -> Dict:
+        """
+        Загрузить даты самых старых записей корзин локальной истории.
+        
+        Args:
+            workspace_path: Путь к workspace
+            
+        Returns:
+            Даты (Unix time) по именам корзин
+        """
+        try:
+            with open(self.get_history_index_path(workspace_path), 'r', encoding='utf-8') as f:
+                buckets = json.load(f).get('oldestEntries', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
         
-        # Также удаляем все *.log в plugins
+        return buckets if isinstance(buckets, dict) else {}
+    
+    def save_history_index(self, workspace_path: str, buckets: Dict):
+        """
+        Атомарно сохранить даты самых старых записей корзин локальной истории.
+        
+        Args:
+            workspace_path: Путь к workspace
+            buckets: Даты (Unix time) по именам корзин
+        """
+        index_path = self.get_history_index_path(workspace_path)
+        temp_path = index_path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'oldestEntries': buckets}, f, ensure_ascii=False)
+            os.replace(temp_path, index_path)
+        except OSError:
+            pass
+    
+    def read_project_name(self, project_file: str) -> Optional[str]:
+        """
+        Прочитать имя проекта из описания проекта (.project).
+        
+        Args:
+            project_file: Путь к файлу .project
+            
+        Returns:
+            Имя проекта или None если описание не читается
+        """
+        try:
+            name = ElementTree.parse(project_file).getroot().findtext('name')
+        except (OSError, ElementTree.ParseError):
+            return None
+        
+        return name.strip() if name and name.strip() else None
+    
+    def read_project_location(self, location_file: str) -> Optional[str]:
+        """
+        Прочитать расположение проекта вне workspace из файла .location.
+        
+        Eclipse записывает URI расположения строкой `URI//<uri>` в формате
+        DataOutputStream.writeUTF: перед строкой идут два байта ее длины.
+        
+        Args:
+            location_file: Путь к файлу .location
+            
+        Returns:
+            Путь к директории проекта или None если расположение не определено
+        """
+        try:
+            with open(location_file, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        
+        index = data.find(b'URI//')
+        if index < 2:
+            return None
+        
+        length = struct.unpack('>H', data[index - 2:index])[0]
+        try:
+            uri = data[index:index + length].decode('utf-8')[len('URI//'):]
+        except UnicodeDecodeError:
+            return None
+        
+        parsed = urllib.parse.urlparse(uri)
+        if parsed.scheme != 'file':
+            return None
+        
+        return urllib.request.url2pathname(parsed.path)
+    
+    def find_orphaned_metadata(self, workspace_path: str) -> Tuple[List[str], List[str]]:
+        """
+        Найти метаданные проектов, которых больше нет в workspace.
+        
+        Индекс живых проектов строится по описаниям `.project` в корне
+        workspace и по файлам `.location` проектов, расположенных вне
+        workspace. Метаданные проекта с нечитаемым или не файловым
+        расположением считаются живыми, как и проекта, родительская
+        директория которого сейчас недоступна (отключенный или не
+        подключенный для учетной записи задачи диск): удаленным проект
+        считается, только если его директория достижима, а `.project`
+        в ней нет. Кроме `.projects/<имя>` удаляется только состояние
+        плагинов из PROJECT_STATE_PLUGINS.
+        
+        Args:
+            workspace_path: Путь к workspace
+            
+        Returns:
+            Кортеж (имена удаленных проектов, пути к их метаданным)
+        """
         plugins_dir = os.path.join(workspace_path, '.metadata', '.plugins')
-        if os.path.isdir(plugins_dir):
-            for root, dirs, files in os.walk(plugins_dir):
-                for file in files:
-                    if file.endswith('.log'):
-                        filepath = os.path.join(root, file)
-                        if safe_remove_file(filepath):
-                            stats['logsCleared'] += 1
-        
-        # Удаляем историю
-        for pattern in self.SAFE_TO_DELETE['history']:
-            full_path = os.path.join(workspace_path, pattern)
-            if os.path.isdir(full_path):
-                # Подсчитываем файлы перед удалением
-                file_count = sum(1 for _, _, files in os.walk(full_path) for _ in files)
-                if safe_remove_dir(full_path):
-                    stats['historyCleared'] += file_count
-        
-        # Удаляем снапшоты
-        for pattern in self.SAFE_TO_DELETE['snapshots']:
-            if '*' in pattern:
-                # Паттерн с wildcard
-                base_path = os.path.join(workspace_path, pattern.split('*')[0])
-                suffix = pattern.split('*')[-1] if len(pattern.split('*')) > 1 else ''
-                
-                # Ищем все подходящие папки
-                metadata_plugins = os.path.join(workspace_path, '.metadata', '.plugins')
-                if os.path.isdir(metadata_plugins):
-                    for plugin_dir in os.listdir(metadata_plugins):
-                        snapshot_dir = os.path.join(metadata_plugins, plugin_dir, suffix.lstrip('/'))
-                        if os.path.isdir(snapshot_dir):
-                            file_count = sum(1 for _, _, files in os.walk(snapshot_dir) for _ in files)
-                            if safe_remove_dir(snapshot_dir):
-                                stats['snapshotsCleared'] += file_count
-            else:
-                full_path = os.path.join(workspace_path, pattern)
-                if os.path.isfile(full_path):
-                    if safe_remove_file(full_path):
-                        stats['snapshotsCleared'] += 1
-                elif os.path.isdir(full_path):
-                    file_count = sum(1 for _, _, files in os.walk(full_path) for _ in files)
-                    if safe_remove_dir(full_path):
-                        stats['snapshotsCleared'] += file_count
-        
-        # Удаляем кэши
-        for pattern in self.SAFE_TO_DELETE['caches']:
-            full_pattern = os.path.join(workspace_path, pattern)
-            
-            if '*' in pattern:
-                for path in glob.glob(full_pattern):
-                    if os.path.isfile(path):
-                        if safe_remove_file(path):
-                            stats['cachesCleared'] += 1
-                    elif os.path.isdir(path):
-                        file_count = sum(1 for _, _, files in os.walk(path) for _ in files)
-                        if safe_remove_dir(path):
-                            stats['cachesCleared'] += file_count
-            else:
-                if os.path.isfile(full_pattern):
-                    if safe_remove_file(full_pattern):
-                        stats['cachesCleared'] += 1
-                elif os.path.isdir(full_pattern):
-                    file_count = sum(1 for _, _, files in os.walk(full_pattern) for _ in files)
-                    if safe_remove_dir(full_pattern):
-                        stats['cachesCleared'] += file_count
+        projects_dir = os.path.join(plugins_dir, self.RESOURCES_PLUGIN, '.projects')
         
-        return stats
+        if not os.path.isdir(projects_dir):
+            return [], []
+        
+        # Проекты в корне workspace
+        live = set()
+        try:
+            with os.scandir(workspace_path) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') or not entry.is_dir(follow_symlinks=False):
+                        continue
+                    project_file = os.path.join(entry.path, '.project')
+                    if os.path.isfile(project_file):
+                        live.add(self.read_project_name(project_file) or entry.name)
+        except (OSError, PermissionError):
+            return [], []
+        
+        # Зарегистрированные проекты: живые вне workspace или удаленные
+        orphans = []
+        try:
+            with os.scandir(projects_dir) as entries:
+                for entry in entries:
+                    # Служебные скрытые проекты Eclipse (.org.eclipse.jdt.core.external.folders)
+                    if entry.name.startswith('.') or entry.name in live:
+                        continue
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    
+                    location_file = os.path.join(entry.path, '.location')
+                    if os.path.exists(location_file):
+                        location = self.read_project_location(location_file)
+                        if location is None or not self._is_location_missing(location):
+                            live.add(entry.name)
+                            continue
+                    
+                    orphans.append(entry.name)
+        except (OSError, PermissionError):
+            return [], []
+        
+        if not orphans:
+            return [], []
+        
+        paths = [os.path.join(projects_dir, name) for name in orphans]
+        
+        # Состояние известных плагинов в поддиректориях с именем проекта
+        for plugin in self.PROJECT_STATE_PLUGINS:
+            for name in orphans:
+                state_dir = os.path.join(plugins_dir, plugin, name)
+                if os.path.isdir(state_dir) and not os.path.islink(state_dir):
+                    paths.append(state_dir)
+        
+        return sorted(orphans), paths
+    
+    def _is_location_missing(self, location: str) -> bool:
+        """
+        Проверить, что проект по расположению вне workspace удален.
+        
+        Args:
+            location: Путь к директории проекта
+            
+        Returns:
+            True если родительская директория доступна, а `.project` в
+            директории проекта нет
+        """
+        location = os.path.normpath(location)
+        try:
+            if not os.path.isdir(os.path.dirname(location)):
+                return False
+            return not os.path.exists(os.path.join(location, '.project'))
+        except OSError:
+            return False
+    
+    def get_telemetry_path(self, workspace_path: str) -> str:
+        """
+        Получить путь к файлу телеметрии кэшей workspace.
+        
+        Args:
+            workspace_path: Путь к workspace
+            
+        Returns:
+            Путь к файлу телеметрии
+        """
+        return os.path.join(workspace_path, '.metadata', self.SWEEPER_DIR, self.TELEMETRY_FILE)
+    
+    def load_telemetry(self, workspace_path: str) -> Dict:
+        """
+        Загрузить телеметрию кэшей workspace.
+        
+        Args:
+            workspace_path: Путь к workspace
+            
+        Returns:
+            Записи телеметрии по именам правил
+        """
+        try:
+            with open(self.get_telemetry_path(workspace_path), 'r', encoding='utf-8') as f:
+                rules = json.load(f).get('rules', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+        
+        return rules if isinstance(rules, dict) else {}
+    
+    def save_telemetry(self, workspace_path: str, telemetry: Dict):
+        """
+        Атомарно сохранить телеметрию кэшей workspace.
+        
+        Args:
+            workspace_path: Путь к workspace
+            telemetry: Записи телеметрии по именам правил
+        """
+        telemetry_path = self.get_telemetry_path(workspace_path)
+        temp_path = telemetry_path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(telemetry_path), exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'rules': telemetry}, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, telemetry_path)
+        except OSError:
+            pass
+    
+    def record_cache_sample(self, entry: Optional[Dict], size_bytes: int, deleted: bool, now: float) -> Dict:
+        """
+        Добавить замер объема кэша в запись телеметрии.
+        
+        Скорость восстановления измеряется при удалении, следующем за
+        предыдущим удалением: отношение освобожденного объема к объему,
+        освобожденному в прошлый раз, и число дней между удалениями.
+        
+        Args:
+            entry: Запись телеметрии правила или None
+            size_bytes: Объем целей правила
+            deleted: Кэш удален в этом запуске
+            now: Время замера (Unix time)
+            
+        Returns:
+            Обновленная запись телеметрии
+        """
+        entry = dict(entry or {})
+        entry['lastSample'] = {'at': int(now), 'bytes': size_bytes}
+        
+        if not deleted:
+            return entry
+        
+        last_deleted = entry.get('lastDeleted')
+        if last_deleted and last_deleted.get('bytes', 0) > 0:
+            entry['regrowthRatio'] = round(size_bytes / last_deleted['bytes'], 3)
+            entry['regrowthDays'] = round((now - last_deleted['at']) / 86400, 2)
+        
+        entry['lastDeleted'] = {'at': int(now), 'bytes': size_bytes}
+        return entry
+    
+    def should_skip_cache(self, entry: Optional[Dict], now: float) -> bool:
+        """
+        Определить, бессмысленно ли удалять кэш.
+        
+        Кэш пропускается, если после прошлого удаления он восстановился не
+        менее чем на долю cacheRegrowthRatio за cacheRegrowthDays дней:
+        удаление только заставит EDT перестраивать его. Через cacheSkipDays
+        после последнего удаления кэш удаляется снова для нового замера.
+        
+        Args:
+            entry: Запись телеметрии правила или None
+            now: Текущее время (Unix time)
+            
+        Returns:
+            True если удаление кэша следует пропустить
+        """
+        if not entry or entry.get('regrowthRatio') is None or not entry.get('lastDeleted'):
+            return False
+        
+        skip_days = self.config.get('cacheSkipDays', 30)
+        if now - entry['lastDeleted']['at'] > skip_days * 86400:
+            return False
+        
+        return (
+            entry['regrowthRatio'] >= self.config.get('cacheRegrowthRatio', 0.8)
+            and entry.get('regrowthDays', 0) <= self.config.get('cacheRegrowthDays', 7)
+        )
+    
+    def get_history_archive_path(self, workspace_path: str) -> str:
+        """
+        Получить путь к архиву локальной истории workspace.
+        
+        Args:
+            workspace_path: Путь к workspace
+            
+        Returns:
+            Путь к архиву
+        """
+        return os.path.join(workspace_path, '.metadata', self.SWEEPER_DIR, self.HISTORY_ARCHIVE)
+    
+    def archive_history(self, workspace_path: str, history_path: str, retention_days: int) -> Tuple[int, int]:
+        """
+        Перенести записи локальной истории старше срока хранения в архив.
+        
+        Записи упаковываются в один zip-архив workspace (Deflate, открывается
+        Проводником Windows и любым архиватором) под именами `<корзина>/<файл>`,
+        повторяющими структуру .history; центральный каталог архива служит
+        индексом для восстановления отдельных записей. Eclipse присваивает
+        каждой записи истории новый UUID, поэтому запись, уже присутствующая
+        в архиве, повторно не добавляется. Файлы удаляются только после
+        того, как дополненная копия архива атомарно заменила прежний архив.
+        
+        Args:
+            workspace_path: Путь к workspace
+            history_path: Путь к директории .history
+            retention_days: Срок хранения в днях (0 - архивировать все записи)
+            
+        Returns:
+            Кортеж (количество архивированных записей, освобождено байт с
+            учетом прироста архива)
+        """
+        cutoff = time.time() - retention_days * 86400
+        archive_path = self.get_history_archive_path(workspace_path)
+        
+        expired = []
+        try:
+            with os.scandir(history_path) as buckets:
+                for bucket in buckets:
+                    if not bucket.is_dir(follow_symlinks=False):
+                        continue
+                    # Корзина без изменений дольше срока хранения устарела целиком
+                    bucket_expired = bucket.stat(follow_symlinks=False).st_mtime < cutoff
+                    with os.scandir(bucket.path) as entries:
+                        for entry in entries:
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            entry_stat = entry.stat(follow_symlinks=False)
+                            if bucket_expired or entry_stat.st_mtime < cutoff:
+                                expired.append((entry.path, f'{bucket.name}/{entry.name}', entry_stat.st_size))
+        except (OSError, PermissionError):
+            pass
+        
+        if not expired:
+            return 0, 0
+        
+        # Архив - единственная копия уже удаленной истории: дописывание на месте,
+        # прерванное таймаутом, перезагрузкой или нехваткой места, повреждает
+        # центральный каталог. Поэтому дописывается копия, которая атомарно
+        # заменяет архив только после успешной записи
+        temp_path = archive_path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+            size_before = 0
+            if os.path.exists(archive_path):
+                size_before = os.path.getsize(archive_path)
+                shutil.copyfile(archive_path, temp_path)
+            elif os.path.exists(temp_path):
+                os.remove(temp_path)
+            
+            archived = []
+            with zipfile.ZipFile(temp_path, 'a', compression=zipfile.ZIP_DEFLATED) as archive:
+                known = set(archive.namelist())
+                for path, name, size_bytes in expired:
+                    try:
+                        if name not in known:
+                            archive.write(path, name)
+                            known.add(name)
+                        archived.append((path, size_bytes))
+                    except (OSError, PermissionError, ValueError):
+                        continue
+            
+            with open(temp_path, 'rb+') as f:
+                os.fsync(f.fileno())
+            os.replace(temp_path, archive_path)
+            size_after = os.path.getsize(archive_path)
+        except (OSError, zipfile.BadZipFile):
+            safe_remove_file(temp_path)
+            return 0, 0
+        
+        files = 0
+        removed_bytes = 0
+        for path, size_bytes in archived:
+            try:
+                os.remove(path)
+                files += 1
+                removed_bytes += size_bytes
+            except (OSError, PermissionError):
+                continue
+        
+        return files, removed_bytes - (size_after - size_before)
+    
+    def restore_history(self, workspace_path: str, names: Optional[List[str]] = None) -> int:
+        """
+        Восстановить записи локальной истории из архива.
+        
+        Args:
+            workspace_path: Путь к workspace
+            names: Имена записей `<корзина>/<файл>` (None - все записи)
+            
+        Returns:
+            Количество восстановленных записей
+        """
+        archive_path = self.get_history_archive_path(workspace_path)
+        history_path = os.path.join(
+            workspace_path, '.metadata', '.plugins', 'org.eclipse.core.resources', '.history'
+        )
+        
+        if not os.path.isfile(archive_path):
+            return 0
+        
+        # Восстановленные записи старше дат в индексе корзин истории
+        safe_remove_file(self.get_history_index_path(workspace_path))
+        
+        restored = 0
+        try:
+            with zipfile.ZipFile(archive_path, 'r') as archive:
+                wanted = set(names) if names is not None else None
+                for info in archive.infolist():
+                    if wanted is not None and info.filename not in wanted:
+                        continue
+                    
+                    bucket, _, entry_name = info.filename.partition('/')
+                    if not bucket or not entry_name or '/' in entry_name or bucket in ('.', '..'):
+                        continue
+                    
+                    target = os.path.join(history_path, bucket, entry_name)
+                    if os.path.exists(target):
+                        continue
+                    
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with archive.open(info) as source, open(target, 'wb') as destination:
+                        shutil.copyfileobj(source, destination)
+                    
+                    # Возвращаем исходную дату записи истории
+                    mtime = time.mktime(info.date_time + (0, 0, -1))
+                    os.utime(target, (mtime, mtime))
+                    restored += 1
+        except (OSError, zipfile.BadZipFile):
+            return restored
+        
+        return restored
+    
+    def update_space_stats(self, result: Dict):
+        """
+        Рассчитать итоги очистки workspace по статистике категорий.
+        
+        Размер после обработки рассчитывается по учету удаленных байт,
+        без повторного обхода workspace.
+        
+        Args:
+            result: Результат обработки workspace
+        """
+        stats = result['details']
+        result['filesDeleted'] = sum(stats[f'{category}Cleared'] for category in self.CATEGORIES)
+        result['bytesFreed'] = sum(stats[f'{category}Bytes'] for category in self.CATEGORIES)
+        result['bytesFreed'] += stats.get('dedupBytes', 0)
+        result['spaceSaved'] = round(result['bytesFreed'] / (1024 ** 3), 2)
+        result['sizeAfter'] = round(max(result['sizeBefore'] - result['spaceSaved'], 0.0), 2)
+        
+        actions = []
+        for category in self.CATEGORIES:
+            if stats[f'{category}Cleared'] > 0:
+                actions.append(f'clear_{category}')
+        result['actions'] = actions
     
     def process_workspace(self, workspace_path: str) -> Dict:
         """
@@ -211,17 +849,31 @@ class EdtHandler:
             'filesDeleted': 0,
             'duration': 0,
             'actions': [],
+            'sizeScope': 'workspace',
+            'bytesFreed': 0,
+            'rules': {},
+            'orphanedProjects': [],
+            'cacheTelemetry': {},
             'details': {
                 'logsCleared': 0,
                 'historyCleared': 0,
                 'snapshotsCleared': 0,
                 'cachesCleared': 0,
+                'logsBytes': 0,
+                'historyBytes': 0,
+                'snapshotsBytes': 0,
+                'cachesBytes': 0,
+                'orphansCleared': 0,
+                'orphansBytes': 0,
+                'targetsStaged': 0,
+                'historyArchived': 0,
+                'dedupLinked': 0,
+                'dedupBytes': 0,
             },
             'status': 'pending',
             'errors': []
         }
         
-        import time
         start_time = time.time()
         
         try:
@@ -232,8 +884,18 @@ class EdtHandler:
                 result['errors'].append('Not an EDT workspace (no .metadata directory)')
                 return result
             
-            # Получаем размер до обработки
-            result['sizeBefore'] = get_size_gb(workspace_path)
+            # Получаем размер до обработки: всего workspace или только .metadata,
+            # которую затрагивает очистка
+            size_scope = self.config.get('sizeScope', 'workspace')
+            result['sizeScope'] = size_scope
+            if size_scope == 'metadata':
+                result['sizeBefore'] = get_size_gb(metadata_dir)
+                if self.config.get('reportWorkspaceSize', False):
+                    result['workspaceSize'] = get_size_gb(workspace_path)
+            else:
+                result['sizeBefore'] = get_size_gb(workspace_path)
+                if self.config.get('reportWorkspaceSize', False):
+                    result['workspaceSize'] = result['sizeBefore']
             
             # Проверяем порог размера
             threshold = self.config.get('sizeThresholdGB', 5)
@@ -250,22 +912,11 @@ class EdtHandler:
             
             # Выполняем очистку
             stats = self.clean_workspace(workspace_path)
+            result['rules'] = stats.pop('rules')
+            result['orphanedProjects'] = stats.pop('orphanedProjects')
+            result['cacheTelemetry'] = stats.pop('cacheTelemetry')
             result['details'] = stats
-            result['filesDeleted'] = sum(stats.values())
-            
-            # Формируем список действий
-            if stats['logsCleared'] > 0:
-                result['actions'].append('clear_logs')
-            if stats['historyCleared'] > 0:
-                result['actions'].append('clear_history')
-            if stats['snapshotsCleared'] > 0:
-                result['actions'].append('clear_snapshots')
-            if stats['cachesCleared'] > 0:
-                result['actions'].append('clear_caches')
-            
-            # Получаем размер после обработки
-            result['sizeAfter'] = get_size_gb(workspace_path)
-            result['spaceSaved'] = round(result['sizeBefore'] - result['sizeAfter'], 2)
+            self.update_space_stats(result)
             
             result['status'] = 'success'
             
@@ -294,6 +945,15 @@ class EdtHandler:
         if not self.silent:
             print(f'[INFO] Found {len(workspaces)} EDT workspaces')
         
+        if not self.silent:
+            for error in self.rule_errors:
+                print(f'[ERROR] {error}')
+        
+        # Остатки прерванной отложенной очистки удаляются до проверки порога:
+        # workspace, мусор которого уже в корзине, обычно пропускается по размеру
+        purge = self.trash or DeferredPurge(self.silent)
+        resumed = sum(purge.resume(workspace) for workspace in workspaces)
+        
         results = []
         for i, workspace in enumerate(workspaces, 1):
             if not self.silent:
@@ -303,13 +963,134 @@ class EdtHandler:
             results.append(result)
             
             if not self.silent:
-                if result['status'] == 'success':
+                if result['status'] == 'success' and result['details']['targetsStaged']:
+                    print(f'[SUCCESS] Targets moved to trash: {result["details"]["targetsStaged"]}')
+                elif result['status'] == 'success':
                     print(f'[SUCCESS] Space saved: {result["spaceSaved"]} GB, files deleted: {result["filesDeleted"]}')
                 elif result['status'] == 'skipped':
                     print(f'[INFO] Skipped: {result["errors"][0]}')
                 else:
                     print(f'[ERROR] Failed: {", ".join(result["errors"])}')
         
+        if self.trash or resumed:
+            self.apply_purge_stats(results, purge)
+        
+        if self.config.get('dedupPools', False):
+            self.dedup_pools(results)
+        
         self.results = results
         return results
+    
+    def collect_dedup_candidates(self, workspace_path: str) -> List[str]:
+        """
+        Собрать файлы пулов workspace для дедупликации.
+        
+        Args:
+            workspace_path: Путь к workspace
+            
+        Returns:
+            Пути к файлам
+        """
+        filepaths = []
+        pending = [
+            os.path.join(workspace_path, *rel_path.split('/'))
+            for rel_path in self.config.get('dedupPaths', self.DEFAULT_DEDUP_PATHS)
+        ]
+        
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            filepaths.append(entry.path)
+            except (OSError, PermissionError):
+                continue
+        
+        return filepaths
+    
+    def dedup_pools(self, results: List[Dict]) -> Dict:
+        """
+        Заменить одинаковые файлы пулов разных workspaces жесткими ссылками.
+        
+        Пулы (bundle pool и т.п.) только читаются EDT, поэтому одна копия
+        может безопасно использоваться всеми workspaces. Заблокированные
+        workspaces и workspaces с ошибкой обработки пропускаются. Экономия
+        учитывается в результате того workspace, чей файл заменен.
+        
+        Args:
+            results: Результаты обработки workspaces
+            
+        Returns:
+            Итоги дедупликации (filesLinked, bytesSaved)
+        """
+        summary = {'filesLinked': 0, 'bytesSaved': 0}
+        owners = {}
+        
+        for result in results:
+            if result['status'] == 'error' or self.is_workspace_locked(result['path']):
+                continue
+            for filepath in self.collect_dedup_candidates(result['path']):
+                owners[filepath] = result
+        
+        min_bytes = self.config.get('dedupMinBytes', 4096)
+        for group in find_duplicate_files(list(owners), min_bytes):
+            source = group[0]
+            for target in group[1:]:
+                try:
+                    target_stat = os.stat(target)
+                except OSError:
+                    continue
+                
+                if not replace_with_hardlink(source, target):
+                    continue
+                
+                # Место освобождается, только если на старый файл не было других ссылок
+                saved = target_stat.st_size if target_stat.st_nlink == 1 else 0
+                details = owners[target]['details']
+                details['dedupLinked'] += 1
+                details['dedupBytes'] += saved
+                summary['filesLinked'] += 1
+                summary['bytesSaved'] += saved
+        
+        for result in results:
+            if result['details']['dedupLinked']:
+                self.update_space_stats(result)
+        
+        if not self.silent:
+            print(f'[INFO] Pool dedup: {summary["filesLinked"]} files linked, '
+                  f'{round(summary["bytesSaved"] / (1024 ** 3), 2)} GB saved')
+        
+        return summary
+    
+    def apply_purge_stats(self, results: List[Dict], purge: DeferredPurge):
+        """
+        Дождаться фоновой очистки корзины и дополнить результаты.
+        
+        Args:
+            results: Результаты обработки workspaces
+            purge: Корзина, очистку которой нужно дождаться
+        """
+        if not self.silent:
+            print('[INFO] Waiting for deferred purge to finish')
+        
+        purged = purge.wait()
+        
+        for result in results:
+            if result['status'] != 'success':
+                continue
+            for name, rule_stats in result['rules'].items():
+                files, size_bytes = purged.get((result['path'], name), (0, 0))
+                rule_stats['filesRemoved'] += files
+                rule_stats['bytesFreed'] += size_bytes
+                result['details'][f'{rule_stats["category"]}Cleared'] += files
+                result['details'][f'{rule_stats["category"]}Bytes'] += size_bytes
+            self.update_space_stats(result)
+        
+        resumed_files, resumed_bytes = purged.get((None, None), (0, 0))
+        if resumed_files and not self.silent:
+            print(f'[INFO] Purged leftovers of interrupted run: {resumed_files} files, '
+                  f'{round(resumed_bytes / (1024 ** 3), 2)} GB')
 
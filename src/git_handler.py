@@ -4,163 +4,1891 @@
 
 import os
 import re
+import sys
+import zlib
+import mmap
+import fnmatch
+import time
+import struct
+import hashlib
+import statistics
 import subprocess
-from typing import Dict, List, Optional
-from .utils import get_size_gb, is_path_locked
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+from .utils import (
+    get_size_bytes,
+    is_path_locked,
+    safe_remove_dir,
+    is_git_dir,
+    resolve_git_dir,
+    get_common_git_dir,
+    get_object_store_id,
+)
 
 
 class GitHandler:
     """Класс для обслуживания Git-репозиториев."""
     
-    def __init__(self, config: dict, silent: bool = False):
+    # Команды, по которым замеряется отклик репозитория до и после оптимизации
+    BENCHMARK_COMMANDS = {
+        'revList': ['rev-list', '--count', 'HEAD'],
+        'log': ['log', '--format=%H', '-n', '1000'],
+        'revListObjects': ['rev-list', '--count', '--objects', '--use-bitmap-index', 'HEAD'],
+    }
+    
+    # Настройки, отключающие автоматический gc git/EDT на время работы разработчиков
+    AUTO_GC_SETTINGS = {
+        'gc.auto': '0',
+        'maintenance.auto': 'false',
+    }
+    
+    # Значение gc.auto по умолчанию в git
+    DEFAULT_GC_AUTO = '6700'
+    
+    # Значение gc.worktreePruneExpire по умолчанию в git
+    DEFAULT_WORKTREE_PRUNE_EXPIRE = '3.months.ago'
+    
+    # Временные файлы и блокировки, остающиеся после прерванных операций git
+    STALE_FILE_PATTERNS = [
+        ('tmpPack', re.compile(r'^tmp_pack_')),
+        ('tmpIdx', re.compile(r'^tmp_idx_')),
+        ('tmpObj', re.compile(r'^tmp_obj_')),
+        ('tmpFiles', re.compile(r'^\.tmp-')),
+        ('gcState', re.compile(r'^gc\.(pid|log)$')),
+        ('locks', re.compile(r'\.lock$')),
+    ]
+    
+    # Каталоги .git, не относящиеся к хранилищу объектов самого репозитория
+    STALE_SCAN_EXCLUDE = {'lfs', 'modules'}
+    
+    # Расширения заведомо несжимаемых двоичных файлов 1С и общих форматов
+    BINARY_EXTENSIONS = {
+        '.bin', '.epf', '.erf', '.cf', '.cfe', '.dt', '.cfu',
+        '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico',
+        '.zip', '.7z', '.rar', '.gz', '.jar', '.pdf', '.docx', '.xlsx',
+    }
+    
+    # Отношение сжатого размера к исходному, начиная с которого данные считаются несжимаемыми
+    INCOMPRESSIBLE_RATIO = 0.9
+    
+    # Размер фрагмента blob для оценки сжимаемости
+    COMPRESSION_SAMPLE_SIZE = 64 * 1024
+    
+    # Маркер блока правил 1C-Sweeper в .git/info/attributes
+    ATTRIBUTES_MARKER = '# 1C-Sweeper: delta policy'
+    
+    # Размер блока при потоковом хешировании pack-файлов
+    CHECKSUM_CHUNK_SIZE = 8 * 1024 * 1024
+    
+    def __init__(self, config: dict, silent: bool = False, max_workers: int = 1):
+        """
+        Инициализация обработчика.
+        
+        Args:
+            config: Конфигурация Git (repos, searchPaths, sizeThresholdGB)
+            silent: Тихий режим работы
+            max_workers: Количество репозиториев, обрабатываемых параллельно
+        """
+        self.config = config
+        self.silent = silent
+        self.max_workers = max(1, max_workers)
+        self.results = []
+        self.worktrees = {}
+    
+    def check_git_available(self) -> bool:
+        """
+        Проверить доступность Git в системе.
+        
+        Returns:
+            True если Git доступен, False иначе
+        """
+        try:
+            subprocess.run(
+                ['git', '--version'],
+                capture_output=True,
+                check=True,
+                timeout=10
+            )
+            return True
+        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+            return False
+    
+    def run_git(self, repo_path: str, args: List[str], timeout: int = 300) -> subprocess.CompletedProcess:
+        """
+        Выполнить команду git в репозитории.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            args: Аргументы команды (без "git")
+            timeout: Таймаут в секундах
+            
+        Returns:
+            Результат выполнения команды
+        """
+        return subprocess.run(
+            ['git'] + args,
+            cwd=repo_path,
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            timeout=timeout
+        )
+    
+    def get_git_version(self) -> Optional[Tuple[int, ...]]:
+        """
+        Получить версию Git.
+        
+        Returns:
+            Кортеж (major, minor, patch) или None если версию определить не удалось
+        """
+        try:
+            output = subprocess.run(
+                ['git', '--version'],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return None
+        
+        # "git version 2.39.5" или "git version 2.42.0.windows.2"
+        match = re.search(r'(\d+)\.(\d+)(?:\.(\d+))?', output.stdout)
+        if not match:
+            return None
+        return tuple(int(part or 0) for part in match.groups())
+    
+    def get_git_dir(self, repo_path: str) -> str:
+        """
+        Получить общий каталог git репозитория (с хранилищем объектов и ссылками).
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Путь к каталогу git
+        """
+        git_dir = resolve_git_dir(repo_path, allow_bare=True)
+        if git_dir is None:
+            return os.path.join(repo_path, '.git')
+        return get_common_git_dir(git_dir)
+    
+    def list_worktrees(self, repo_path: str) -> List[str]:
+        """
+        Получить связанные worktree репозитория.
+        
+        Args:
+            repo_path: Путь к основному рабочему каталогу
+            
+        Returns:
+            Список путей к рабочим каталогам связанных worktree
+        """
+        worktrees_dir = os.path.join(self.get_git_dir(repo_path), 'worktrees')
+        worktrees = []
+        try:
+            with os.scandir(worktrees_dir) as entries:
+                for entry in entries:
+                    # Файл gitdir содержит путь к файлу .git рабочего каталога worktree
+                    try:
+                        with open(os.path.join(entry.path, 'gitdir'), 'r', encoding='utf-8') as f:
+                            dot_git = f.read().strip()
+                    except (OSError, UnicodeDecodeError):
+                        continue
+                    worktrees.append(os.path.realpath(os.path.dirname(dot_git)))
+        except (OSError, PermissionError):
+            pass
+        return sorted(worktrees)
+    
+    def find_repositories(self) -> List[str]:
+        """
+        Найти все репозитории для обработки.
+        
+        Рабочие каталоги с общим хранилищем объектов (worktree, один репозиторий
+        по разным путям) обрабатываются один раз; остальные рабочие каталоги
+        сохраняются в self.worktrees.
+        
+        Returns:
+            Список путей к репозиториям
+        """
+        from .utils import find_git_repos
+        
+        checkouts = set()
+        
+        # Добавляем явно указанные репозитории
+        explicit_repos = self.config.get('repos', [])
+        for repo in explicit_repos:
+            if resolve_git_dir(repo):
+                checkouts.add(os.path.realpath(repo))
+        
+        # Ищем репозитории в searchPaths
+        search_paths = self.config.get('searchPaths', [])
+        found_repos = find_git_repos(search_paths)
+        checkouts.update(found_repos)
+        
+        # Группируем рабочие каталоги по хранилищу объектов
+        stores = {}
+        for checkout in sorted(checkouts):
+            store_id = get_object_store_id(resolve_git_dir(checkout))
+            stores.setdefault(store_id, []).append(checkout)
+        
+        repos = []
+        self.worktrees = {}
+        for store_checkouts in stores.values():
+            # Предпочитаем основной рабочий каталог, у которого .git - общий каталог
+            primary = store_checkouts[0]
+            for checkout in store_checkouts:
+                git_dir = resolve_git_dir(checkout)
+                if get_common_git_dir(git_dir) == git_dir:
+                    primary = checkout
+                    break
+            repos.append(primary)
+            
+            attached = set(self.list_worktrees(primary))
+            attached.update(store_checkouts)
+            attached.discard(primary)
+            if attached:
+                self.worktrees[primary] = sorted(attached)
+        
+        return sorted(repos)
+    
+    def get_repository_size_bytes(self, repo_path: str) -> int:
+        """
+        Получить размер репозитория вместе с хранилищем объектов.
+        
+        Общий каталог git связанного worktree или репозитория с отдельным
+        каталогом git находится вне рабочего каталога и учитывается отдельно.
+        Submodules обрабатываются и учитываются отдельно.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Размер в байтах
+        """
+        git_dir = self.get_git_dir(repo_path)
+        exclude = [os.path.join(git_dir, 'modules')]
+        size_bytes = get_size_bytes(repo_path, exclude)
+        
+        checkout = os.path.normcase(os.path.realpath(repo_path))
+        store = os.path.normcase(os.path.realpath(git_dir))
+        try:
+            inside = os.path.commonpath([checkout, store]) == checkout
+        except ValueError:
+            # Пути на разных дисках
+            inside = False
+        if not inside:
+            size_bytes += get_size_bytes(git_dir, exclude)
+        
+        return size_bytes
+    
+    def find_submodules(self, repo_path: str) -> List[str]:
+        """
+        Найти хранилища объектов submodules в .git/modules (включая вложенные).
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Список путей к каталогам git submodules
+        """
+        submodules = []
+        pending = [os.path.join(self.get_git_dir(repo_path), 'modules')]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if not entry.is_dir(follow_symlinks=False):
+                            continue
+                        if is_git_dir(entry.path):
+                            submodules.append(os.path.abspath(entry.path))
+                            pending.append(os.path.join(entry.path, 'modules'))
+                        else:
+                            # Имя submodule может содержать "/", например modules/ext/core
+                            pending.append(entry.path)
+            except (OSError, PermissionError):
+                continue
+        return sorted(submodules)
+    
+    def find_stale_files(self, repo_path: str) -> List[Dict]:
+        """
+        Найти временные файлы и блокировки, оставшиеся после прерванных операций git.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Список файлов с категорией, размером, возрастом и признаком устаревания
+        """
+        git_dir = self.get_git_dir(repo_path)
+        max_age_hours = self.config.get('staleTempHours', 24)
+        now = time.time()
+        found = []
+        
+        pending = [git_dir]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if current == git_dir and entry.name in self.STALE_SCAN_EXCLUDE:
+                                continue
+                            pending.append(entry.path)
+                            continue
+                        
+                        for category, pattern in self.STALE_FILE_PATTERNS:
+                            if not pattern.search(entry.name):
+                                continue
+                            # gc.pid и gc.log имеют смысл только в корне .git
+                            if category == 'gcState' and current != git_dir:
+                                break
+                            try:
+                                stat = entry.stat(follow_symlinks=False)
+                            except OSError:
+                                break
+                            age_hours = (now - stat.st_mtime) / 3600
+                            found.append({
+                                'path': entry.path,
+                                'category': category,
+                                'size': stat.st_size,
+                                'age_hours': round(age_hours, 1),
+                                'stale': age_hours >= max_age_hours
+                            })
+                            break
+            except (OSError, PermissionError):
+                continue
+        
+        return found
+    
+    def remove_stale_files(self, stale_files: List[Dict]) -> Dict[str, Dict[str, int]]:
+        """
+        Удалить устаревшие временные файлы и блокировки.
+        
+        Args:
+            stale_files: Результат find_stale_files
+            
+        Returns:
+            Статистика удаления по категориям: {категория: {'files': N, 'bytes': N}}
+        """
+        removed = {}
+        
+        for item in stale_files:
+            if not item['stale']:
+                continue
+            try:
+                os.remove(item['path'])
+            except (OSError, PermissionError):
+                continue
+            category = removed.setdefault(item['category'], {'files': 0, 'bytes': 0})
+            category['files'] += 1
+            category['bytes'] += item['size']
+        
+        return removed
+    
+    def get_garbage_info(self, repo_path: str) -> Dict:
+        """
+        Получить информацию о garbage в репозитории.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Словарь с информацией о garbage
+        """
+        result = {
+            'size_gb': 0.0,
+            'pack_files_without_idx': [],
+            'stale_files': []
+        }
+        
+        try:
+            # Выполняем git count-objects -v
+            output = subprocess.run(
+                ['git', 'count-objects', '-v'],
+                cwd=repo_path,
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
+            
+            if output.returncode == 0:
+                # Ищем строку "size-garbage: N"
+                for line in output.stdout.splitlines():
+                    if line.startswith('size-garbage:'):
+                        # Размер в килобайтах
+                        size_kb = int(line.split(':')[1].strip())
+                        result['size_gb'] = round(size_kb / (1024 * 1024), 2)
+                        break
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, ValueError):
+            pass
+        
+        # Ищем pack-файлы без .idx
+        pack_dir = os.path.join(self.get_git_dir(repo_path), 'objects', 'pack')
+        if os.path.isdir(pack_dir):
+            try:
+                pack_files = [f for f in os.listdir(pack_dir) if f.endswith('.pack')]
+                for pack_file in pack_files:
+                    idx_file = pack_file[:-5] + '.idx'  # заменяем .pack на .idx
+                    if idx_file not in os.listdir(pack_dir):
+                        pack_path = os.path.join(pack_dir, pack_file)
+                        pack_size = os.path.getsize(pack_path) / (1024 ** 3)  # в ГБ
+                        result['pack_files_without_idx'].append({
+                            'name': pack_file,
+                            'size_gb': round(pack_size, 2)
+                        })
+            except (OSError, PermissionError):
+                pass
+        
+        # Ищем временные файлы и блокировки
+        result['stale_files'] = self.find_stale_files(repo_path)
+        
+        return result
+    
+    def remove_garbage_packs(self, repo_path: str) -> int:
+        """
+        Удалить некомплектные pack-файлы (без .idx).
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Количество удаленных pack-файлов
+        """
+        removed_count = 0
+        pack_dir = os.path.join(self.get_git_dir(repo_path), 'objects', 'pack')
+        
+        if not os.path.isdir(pack_dir):
+            return 0
+        
+        try:
+            pack_files = [f for f in os.listdir(pack_dir) if f.endswith('.pack')]
+            
+            for pack_file in pack_files:
+                idx_file = pack_file[:-5] + '.idx'
+                
+                # Если нет соответствующего .idx файла - удаляем
+                if idx_file not in os.listdir(pack_dir):
+                    pack_path = os.path.join(pack_dir, pack_file)
+                    try:
+                        os.remove(pack_path)
+                        removed_count += 1
+                        
+                        # Также удаляем связанный .mtimes файл если есть
+                        mtimes_file = pack_file[:-5] + '.mtimes'
+                        mtimes_path = os.path.join(pack_dir, mtimes_file)
+                        if os.path.exists(mtimes_path):
+                            os.remove(mtimes_path)
+                    except (OSError, PermissionError):
+                        continue
+        except (OSError, PermissionError):
+            pass
+        
+        return removed_count
+    
+    def measure_git_timings(self, repo_path: str) -> Dict[str, Optional[float]]:
+        """
+        Замерить время выполнения типовых команд git.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Словарь {команда: время в мс}, None если команда не выполнилась
+        """
+        timings = {}
+        
+        for name, args in self.BENCHMARK_COMMANDS.items():
+            start = time.perf_counter()
+            try:
+                output = self.run_git(repo_path, args, timeout=120)
+                elapsed = (time.perf_counter() - start) * 1000
+                timings[name] = round(elapsed, 1) if output.returncode == 0 else None
+            except subprocess.TimeoutExpired:
+                timings[name] = None
+        
+        return timings
+    
+    def optimize_repository(self, repo_path: str) -> Dict:
+        """
+        Записать или обновить вспомогательные структуры git для ускорения чтения.
+        
+        Split commit-graph дописывает новый слой только для новых коммитов,
+        multi-pack-index с bitmap пересобирается по текущему набору pack-файлов.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Словарь с признаками записанных структур и ошибками
+        """
+        stats = {
+            'commitGraph': False,
+            'multiPackIndex': False,
+            'bitmaps': False,
+            'errors': []
+        }
+        
+        try:
+            output = self.run_git(
+                repo_path,
+                ['commit-graph', 'write', '--reachable', '--split', '--changed-paths'],
+                timeout=900
+            )
+            if output.returncode == 0:
+                stats['commitGraph'] = True
+            else:
+                stats['errors'].append(f'Commit-graph write failed: {output.stderr.strip()}')
+        except subprocess.TimeoutExpired as e:
+            stats['errors'].append(f'Commit-graph write failed: {str(e)}')
+        
+        try:
+            output = self.run_git(repo_path, ['multi-pack-index', 'write', '--bitmap'], timeout=900)
+            if output.returncode == 0:
+                stats['multiPackIndex'] = True
+                stats['bitmaps'] = True
+            else:
+                # Старые версии git не умеют писать bitmap для multi-pack-index
+                output = self.run_git(repo_path, ['multi-pack-index', 'write'], timeout=900)
+                if output.returncode == 0:
+                    stats['multiPackIndex'] = True
+                else:
+                    stats['errors'].append(f'Multi-pack-index write failed: {output.stderr.strip()}')
+        except subprocess.TimeoutExpired as e:
+            stats['errors'].append(f'Multi-pack-index write failed: {str(e)}')
+        
+        return stats
+    
+    def count_index_entries(self, repo_path: str) -> int:
+        """
+        Получить количество записей в индексе по заголовку .git/index.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Количество записей, 0 если индекс отсутствует или поврежден
+        """
+        index_path = os.path.join(resolve_git_dir(repo_path) or os.path.join(repo_path, '.git'), 'index')
+        try:
+            with open(index_path, 'rb') as f:
+                header = f.read(12)
+        except (OSError, PermissionError):
+            return 0
+        
+        # Заголовок: сигнатура "DIRC", версия и количество записей (big-endian)
+        if len(header) < 12 or header[:4] != b'DIRC':
+            return 0
+        return struct.unpack('>I', header[8:12])[0]
+    
+    def measure_status_latency(self, repo_path: str) -> Optional[float]:
+        """
+        Замерить время выполнения git status.
+        
+        Первый запуск прогревает кэши (файловой системы, untracked cache,
+        fsmonitor), замеряется второй.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Время в мс или None если git status не выполнился
+        """
+        elapsed = None
+        for _ in range(2):
+            start = time.perf_counter()
+            try:
+                output = self.run_git(repo_path, ['status', '--porcelain'], timeout=300)
+            except subprocess.TimeoutExpired:
+                return None
+            if output.returncode != 0:
+                return None
+            elapsed = round((time.perf_counter() - start) * 1000, 1)
+        return elapsed
+    
+    def is_fsmonitor_supported(self) -> bool:
+        """
+        Проверить поддержку встроенного fsmonitor (Windows и macOS, Git 2.36+).
+        
+        Returns:
+            True если fsmonitor поддерживается, False иначе
+        """
+        if sys.platform not in ('win32', 'darwin'):
+            return False
+        version = self.get_git_version()
+        return version is not None and version >= (2, 36)
+    
+    def tune_index(self, repo_path: str) -> Dict:
+        """
+        Включить настройки git для больших рабочих деревьев (аналог feature.manyFiles).
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Статистика: количество записей индекса, примененные настройки, время git status
+        """
+        stats = {
+            'indexEntries': self.count_index_entries(repo_path),
+            'applied': [],
+            'statusMsBefore': None,
+            'statusMsAfter': None,
+            'errors': []
+        }
+        
+        threshold = self.config.get('manyFilesThreshold', 20000)
+        if stats['indexEntries'] < threshold:
+            return stats
+        
+        # JGit, через который с Git работает EDT, не читает индекс с расширением
+        # split index (link), поэтому split index включается только явно
+        split_index = self.config.get('splitIndex', False)
+        settings = [('index.version', '4')]
+        if split_index:
+            settings.append(('core.splitIndex', 'true'))
+        settings.append(('core.untrackedCache', 'true'))
+        if self.is_fsmonitor_supported():
+            settings.append(('core.fsmonitor', 'true'))
+        
+        # Пропускаем уже примененные настройки
+        pending = []
+        for key, value in settings:
+            if (self.get_local_config(repo_path, key) or '').lower() != value:
+                pending.append((key, value))
+        
+        if not pending:
+            return stats
+        
+        stats['statusMsBefore'] = self.measure_status_latency(repo_path)
+        
+        for key, value in pending:
+            output = self.run_git(repo_path, ['config', '--local', key, value], timeout=30)
+            if output.returncode == 0:
+                stats['applied'].append(key)
+            else:
+                stats['errors'].append(f'Failed to set {key}: {output.stderr.strip()}')
+        
+        # Перезаписываем индекс сразу, не дожидаясь следующей операции
+        rewrite = ['update-index', '--index-version', '4', '--untracked-cache']
+        if split_index:
+            rewrite.append('--split-index')
+        try:
+            output = self.run_git(repo_path, rewrite, timeout=600)
+            if output.returncode != 0:
+                stats['errors'].append(f'Index rewrite failed: {output.stderr.strip()}')
+        except subprocess.TimeoutExpired as e:
+            stats['errors'].append(f'Index rewrite failed: {str(e)}')
+        
+        stats['statusMsAfter'] = self.measure_status_latency(repo_path)
+        
+        return stats
+    
+    def get_local_config(self, repo_path: str, key: str) -> Optional[str]:
+        """
+        Получить значение параметра из локальной конфигурации репозитория.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            key: Имя параметра
+            
+        Returns:
+            Значение параметра или None если он не задан
+        """
+        output = self.run_git(repo_path, ['config', '--local', '--get', key], timeout=30)
+        if output.returncode != 0:
+            return None
+        return output.stdout.strip()
+    
+    def take_over_auto_gc(self, repo_path: str) -> bool:
+        """
+        Отключить автоматический gc в репозитории.
+        
+        Исходные значения сохраняются в секции sweeper локальной конфигурации
+        (например, gc.auto -> sweeper.gc.auto) для восстановления при деинсталляции.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            True если настройки были изменены, False если уже отключены или при ошибке
+        """
+        if self.get_local_config(repo_path, 'sweeper.autoGcTakeover') == 'true':
+            return False
+        
+        # Измененные параметры: (имя, исходное значение, сохранено ли оно в этом вызове)
+        changed = []
+        for key, value in self.AUTO_GC_SETTINGS.items():
+            original = self.get_local_config(repo_path, key)
+            # Сохраненное значение не перезаписывается: оно могло остаться от прерванного
+            # запуска, а текущее значение тогда уже изменено 1C-Sweeper
+            saved = False
+            if original is not None and self.get_local_config(repo_path, f'sweeper.{key}') is None:
+                output = self.run_git(repo_path, ['config', '--local', f'sweeper.{key}', original], timeout=30)
+                if output.returncode != 0:
+                    self.rollback_auto_gc(repo_path, changed)
+                    return False
+                saved = True
+            
+            output = self.run_git(repo_path, ['config', '--local', key, value], timeout=30)
+            changed.append((key, original, saved))
+            if output.returncode != 0:
+                self.rollback_auto_gc(repo_path, changed)
+                return False
+        
+        output = self.run_git(repo_path, ['config', '--local', 'sweeper.autoGcTakeover', 'true'], timeout=30)
+        if output.returncode != 0:
+            self.rollback_auto_gc(repo_path, changed)
+            return False
+        return True
+    
+    def rollback_auto_gc(self, repo_path: str, changed: List[Tuple[str, Optional[str], bool]]):
+        """
+        Вернуть параметры, измененные незавершенным отключением автоматического gc.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            changed: Измененные параметры (имя, исходное значение, сохранено ли оно)
+        """
+        for key, original, saved in reversed(changed):
+            if original is not None:
+                self.run_git(repo_path, ['config', '--local', key, original], timeout=30)
+            else:
+                self.run_git(repo_path, ['config', '--local', '--unset', key], timeout=30)
+            if saved:
+                self.run_git(repo_path, ['config', '--local', '--unset', f'sweeper.{key}'], timeout=30)
+    
+    def restore_auto_gc(self, repo_path: str) -> bool:
+        """
+        Восстановить исходные настройки автоматического gc.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            True если настройки восстановлены, False если они не изменялись
+        """
+        if self.get_local_config(repo_path, 'sweeper.autoGcTakeover') != 'true':
+            return False
+        
+        for key in self.AUTO_GC_SETTINGS:
+            original = self.get_local_config(repo_path, f'sweeper.{key}')
+            if original is not None:
+                self.run_git(repo_path, ['config', '--local', key, original], timeout=30)
+                self.run_git(repo_path, ['config', '--local', '--unset', f'sweeper.{key}'], timeout=30)
+            else:
+                self.run_git(repo_path, ['config', '--local', '--unset', key], timeout=30)
+        
+        self.run_git(repo_path, ['config', '--local', '--unset', 'sweeper.autoGcTakeover'], timeout=30)
+        return True
+    
+    def run_auto_gc(self, repo_path: str) -> bool:
+        """
+        Выполнить git gc --auto с исходным порогом gc.auto.
+        
+        Используется для репозиториев ниже порога размера, когда автоматический
+        gc отключен и обслуживание хранилища объектов выполняет 1C-Sweeper.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            True если gc выполнен успешно, False иначе
+        """
+        gc_auto = self.get_local_config(repo_path, 'sweeper.gc.auto') or self.DEFAULT_GC_AUTO
+        try:
+            output = self.run_git(repo_path, ['-c', f'gc.auto={gc_auto}', 'gc', '--auto'], timeout=900)
+            return output.returncode == 0
+        except subprocess.TimeoutExpired:
+            return False
+    
+    def check_pack_checksum(self, file_path: str) -> bool:
+        """
+        Проверить контрольную сумму в конце .pack или .idx файла.
+        
+        Последние байты файла содержат SHA-1 (или SHA-256) всего предшествующего
+        содержимого. Файл читается через mmap блоками, без загрузки в память.
+        
+        Args:
+            file_path: Путь к .pack или .idx файлу
+            
+        Returns:
+            True если контрольная сумма совпадает, False иначе
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    return False
+                
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    for algorithm, digest_size in (('sha1', 20), ('sha256', 32)):
+                        if size <= digest_size:
+                            continue
+                        
+                        digest = hashlib.new(algorithm)
+                        view = memoryview(data)
+                        try:
+                            end = size - digest_size
+                            for offset in range(0, end, self.CHECKSUM_CHUNK_SIZE):
+                                digest.update(view[offset:min(offset + self.CHECKSUM_CHUNK_SIZE, end)])
+                        finally:
+                            view.release()
+                        
+                        if digest.digest() == data[size - digest_size:]:
+                            return True
+        except (OSError, ValueError):
+            return False
+        
+        return False
+    
+    def verify_repository(self, repo_path: str) -> Dict:
+        """
+        Быстрая проверка целостности репозитория после gc.
+        
+        Проверяет контрольные суммы pack/idx файлов в пуле потоков и выполняет
+        git fsck --connectivity-only с ограничением по времени.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Результат проверки: статус, проверенные и поврежденные файлы, длительность
+        """
+        stats = {
+            'status': 'ok',
+            'filesChecked': 0,
+            'corruptFiles': [],
+            'connectivity': 'skipped',
+            'duration': 0.0
+        }
+        
+        start = time.perf_counter()
+        
+        pack_dir = os.path.join(self.get_git_dir(repo_path), 'objects', 'pack')
+        files = []
+        if os.path.isdir(pack_dir):
+            try:
+                files = [
+                    os.path.join(pack_dir, f) for f in os.listdir(pack_dir)
+                    if f.endswith('.pack') or f.endswith('.idx')
+                ]
+            except (OSError, PermissionError):
+                pass
+        
+        workers = self.config.get('verifyWorkers', min(4, os.cpu_count() or 1))
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for file_path, valid in zip(files, executor.map(self.check_pack_checksum, files)):
+                stats['filesChecked'] += 1
+                if not valid:
+                    stats['corruptFiles'].append(os.path.basename(file_path))
+        
+        timeout = self.config.get('fsckTimeoutSeconds', 600)
+        try:
+            output = self.run_git(
+                repo_path,
+                ['fsck', '--connectivity-only', '--no-dangling', '--no-progress'],
+                timeout=timeout
+            )
+            stats['connectivity'] = 'ok' if output.returncode == 0 else 'failed'
+        except subprocess.TimeoutExpired:
+            stats['connectivity'] = 'timeout'
+        
+        if stats['corruptFiles'] or stats['connectivity'] == 'failed':
+            stats['status'] = 'corrupt'
+        elif stats['connectivity'] == 'timeout':
+            stats['status'] = 'partial'
+        
+        stats['duration'] = round(time.perf_counter() - start, 2)
+        return stats
+    
+    def get_reflog_pinned_bytes(self, repo_path: str) -> Optional[int]:
+        """
+        Получить объем объектов, достижимых только из reflog.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Объем в байтах или None если git не поддерживает --disk-usage
+        """
+        try:
+            output = self.run_git(
+                repo_path,
+                ['rev-list', '--disk-usage', '--objects', '--reflog', '--not', '--all'],
+                timeout=600
+            )
+        except subprocess.TimeoutExpired:
+            return None
+        
+        if output.returncode != 0:
+            return None
+        try:
+            return int(output.stdout.strip() or 0)
+        except ValueError:
+            return None
+    
+    def prune_history(self, repo_path: str) -> Dict:
+        """
+        Очистить reflog, кэш rerere и устаревшие worktree перед сборкой мусора.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Статистика: объем, освобожденный reflog, размер rr-cache, удаленные worktree
+        """
+        stats = {
+            'reflogExpired': False,
+            'reflogFreedBytes': None,
+            'rerereCacheBytes': 0,
+            'worktreesPruned': 0,
+            'errors': []
+        }
+        
+        # Reflog удерживает недостижимые объекты от удаления при gc
+        expire_days = self.config.get('reflogExpireDays', 0)
+        if expire_days:
+            pinned_before = self.get_reflog_pinned_bytes(repo_path)
+            expire = f'{int(expire_days)}.days.ago'
+            try:
+                output = self.run_git(
+                    repo_path,
+                    ['reflog', 'expire', f'--expire={expire}', f'--expire-unreachable={expire}', '--all'],
+                    timeout=600
+                )
+                if output.returncode == 0:
+                    stats['reflogExpired'] = True
+                else:
+                    stats['errors'].append(f'Reflog expire failed: {output.stderr.strip()}')
+            except subprocess.TimeoutExpired as e:
+                stats['errors'].append(f'Reflog expire failed: {str(e)}')
+            
+            pinned_after = self.get_reflog_pinned_bytes(repo_path)
+            if pinned_before is not None and pinned_after is not None:
+                stats['reflogFreedBytes'] = max(pinned_before - pinned_after, 0)
+        
+        # Кэш разрешений конфликтов rerere
+        if self.config.get('clearRerereCache', False):
+            rr_cache = os.path.join(self.get_git_dir(repo_path), 'rr-cache')
+            if os.path.isdir(rr_cache):
+                rr_cache_bytes = get_size_bytes(rr_cache)
+                if safe_remove_dir(rr_cache):
+                    stats['rerereCacheBytes'] = rr_cache_bytes
+        
+        # Worktree, рабочие каталоги которых уже удалены. Срок gc.worktreePruneExpire
+        # защищает worktree на отключенных сетевых и съемных дисках: их HEAD и
+        # индекс удерживают объекты от удаления при gc --prune=now
+        if self.config.get('pruneWorktrees', True):
+            try:
+                output = self.run_git(repo_path, ['config', '--get', 'gc.worktreePruneExpire'], timeout=30)
+                expire = output.stdout.strip() if output.returncode == 0 else ''
+                output = self.run_git(
+                    repo_path,
+                    ['worktree', 'prune', '--verbose', f'--expire={expire or self.DEFAULT_WORKTREE_PRUNE_EXPIRE}'],
+                    timeout=120
+                )
+                if output.returncode == 0:
+                    lines = (output.stdout + output.stderr).splitlines()
+                    stats['worktreesPruned'] = sum(1 for line in lines if line.startswith('Removing'))
+            except subprocess.TimeoutExpired as e:
+                stats['errors'].append(f'Worktree prune failed: {str(e)}')
+        
+        return stats
+    
+    def count_refs(self, repo_path: str) -> Tuple[int, int]:
+        """
+        Подсчитать loose и packed ссылки репозитория.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Кортеж (количество loose ссылок, количество packed ссылок)
+        """
+        git_dir = self.get_git_dir(repo_path)
+        
+        loose = 0
+        pending = [os.path.join(git_dir, 'refs')]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif not entry.name.endswith('.lock'):
+                            loose += 1
+            except (OSError, PermissionError):
+                continue
+        
+        packed = 0
+        try:
+            with open(os.path.join(git_dir, 'packed-refs'), 'rb') as f:
+                for line in f:
+                    # Строки "#" - заголовок, "^" - объект аннотированного тега
+                    if line[:1] not in (b'#', b'^'):
+                        packed += 1
+        except (OSError, PermissionError):
+            pass
+        
+        return loose, packed
+    
+    def measure_ref_lookup(self, repo_path: str) -> Optional[float]:
+        """
+        Замерить время перечисления всех ссылок репозитория.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Время в мс или None если команда не выполнилась
+        """
+        start = time.perf_counter()
+        try:
+            output = self.run_git(repo_path, ['for-each-ref', '--format=%(refname)'], timeout=300)
+        except subprocess.TimeoutExpired:
+            return None
+        if output.returncode != 0:
+            return None
+        return round((time.perf_counter() - start) * 1000, 1)
+    
+    def pack_refs(self, repo_path: str) -> Dict:
+        """
+        Упаковать loose ссылки в packed-refs, если их больше порога.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Статистика: количество ссылок и время их перечисления до и после
+        """
+        loose, packed = self.count_refs(repo_path)
+        stats = {
+            'looseBefore': loose,
+            'looseAfter': loose,
+            'packed': packed,
+            'lookupMsBefore': None,
+            'lookupMsAfter': None,
+            'refsPacked': False,
+            'errors': []
+        }
+        
+        threshold = self.config.get('packRefsThreshold', 1000)
+        if loose < threshold:
+            return stats
+        
+        stats['lookupMsBefore'] = self.measure_ref_lookup(repo_path)
+        
+        try:
+            output = self.run_git(repo_path, ['pack-refs', '--all', '--prune'], timeout=600)
+            if output.returncode == 0:
+                stats['refsPacked'] = True
+            else:
+                stats['errors'].append(f'Pack refs failed: {output.stderr.strip()}')
+        except subprocess.TimeoutExpired as e:
+            stats['errors'].append(f'Pack refs failed: {str(e)}')
+        
+        stats['looseAfter'], stats['packed'] = self.count_refs(repo_path)
+        stats['lookupMsAfter'] = self.measure_ref_lookup(repo_path)
+        
+        return stats
+    
+    def is_lfs_available(self, repo_path: str) -> bool:
+        """
+        Проверить доступность Git LFS.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            True если git lfs установлен, False иначе
+        """
+        try:
+            return self.run_git(repo_path, ['lfs', 'version'], timeout=30).returncode == 0
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return False
+    
+    def prune_lfs(self, repo_path: str) -> Dict:
+        """
+        Удалить из локального кэша LFS объекты, не используемые недавними коммитами.
+        
+        Сохраняются объекты текущего checkout, а также ссылок и коммитов
+        за последние lfsRetentionDays дней; неотправленные объекты git lfs
+        не удаляет.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Статистика: размер кэша LFS до и после очистки в байтах
+        """
+        stats = {
+            'bytesBefore': 0,
+            'bytesAfter': 0,
+            'bytesFreed': 0,
+            'pruned': False,
+            'errors': []
+        }
+        
+        lfs_objects = os.path.join(self.get_git_dir(repo_path), 'lfs', 'objects')
+        if not os.path.isdir(lfs_objects):
+            return stats
+        
+        stats['bytesBefore'] = get_size_bytes(lfs_objects)
+        stats['bytesAfter'] = stats['bytesBefore']
+        
+        if not self.is_lfs_available(repo_path):
+            stats['errors'].append('Git LFS is not available')
+            return stats
+        
+        retention_days = int(self.config.get('lfsRetentionDays', 7))
+        try:
+            output = self.run_git(
+                repo_path,
+                [
+                    '-c', f'lfs.fetchrecentrefsdays={retention_days}',
+                    '-c', f'lfs.fetchrecentcommitsdays={retention_days}',
+                    '-c', 'lfs.pruneoffsetdays=0',
+                    'lfs', 'prune'
+                ],
+                timeout=1800
+            )
+            if output.returncode == 0:
+                stats['pruned'] = True
+            else:
+                stats['errors'].append(f'LFS prune failed: {output.stderr.strip()}')
+        except subprocess.TimeoutExpired as e:
+            stats['errors'].append(f'LFS prune failed: {str(e)}')
+        
+        stats['bytesAfter'] = get_size_bytes(lfs_objects)
+        stats['bytesFreed'] = max(stats['bytesBefore'] - stats['bytesAfter'], 0)
+        
+        return stats
+    
+    def iter_ignored_files(self, repo_path: str) -> Iterator[str]:
+        """
+        Перечислить игнорируемые неотслеживаемые файлы рабочего дерева.
+        
+        Вывод git ls-files читается потоково, без буферизации всего списка.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Yields:
+            Пути к файлам относительно корня репозитория
+        """
+        process = subprocess.Popen(
+            ['git', 'ls-files', '--others', '--ignored', '--exclude-standard', '-z'],
+            cwd=repo_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            tail = b''
+            while True:
+                chunk = process.stdout.read(64 * 1024)
+                if not chunk:
+                    break
+                parts = (tail + chunk).split(b'\0')
+                tail = parts.pop()
+                for part in parts:
+                    if part:
+                        yield part.decode('utf-8', 'surrogateescape')
+            if tail:
+                yield tail.decode('utf-8', 'surrogateescape')
+        finally:
+            process.stdout.close()
+            process.wait()
+    
+    def matches_cleanup_patterns(self, rel_path: str, patterns: List[str]) -> bool:
+        """
+        Проверить, подпадает ли файл под allow-list шаблонов очистки.
+        
+        Шаблон без "/" сравнивается с именем файла, шаблон с "/" - с путем
+        относительно корня репозитория.
+        
+        Args:
+            rel_path: Путь относительно корня репозитория (через "/")
+            patterns: Список шаблонов fnmatch
+            
+        Returns:
+            True если файл подпадает хотя бы под один шаблон
+        """
+        name = rel_path.rsplit('/', 1)[-1]
+        for pattern in patterns:
+            target = rel_path if '/' in pattern else name
+            if fnmatch.fnmatch(target, pattern):
+                return True
+        return False
+    
+    def clean_ignored_files(self, repo_path: str) -> Dict:
+        """
+        Удалить игнорируемые артефакты сборки из рабочего дерева.
+        
+        Удаляются только файлы, подпадающие под ignoredCleanupPatterns.
+        Размеры берутся из одного os.scandir на каталог, удаление
+        выполняется в пуле потоков.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Статистика: количество удаленных файлов и освобожденный объем в байтах
+        """
+        stats = {
+            'files': 0,
+            'bytes': 0
+        }
+        
+        patterns = self.config.get('ignoredCleanupPatterns', [])
+        if not patterns:
+            return stats
+        
+        repo_root = os.path.abspath(repo_path)
+        stat_cache = {}
+        candidates = []
+        
+        for rel_path in self.iter_ignored_files(repo_path):
+            if '..' in rel_path.split('/') or not self.matches_cleanup_patterns(rel_path, patterns):
+                continue
+            
+            parent, _, name = rel_path.rpartition('/')
+            if parent not in stat_cache:
+                sizes = {}
+                try:
+                    with os.scandir(os.path.join(repo_root, parent)) as entries:
+                        for entry in entries:
+                            if entry.is_file(follow_symlinks=False):
+                                sizes[entry.name] = entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+                stat_cache[parent] = sizes
+            
+            if name in stat_cache[parent]:
+                candidates.append((os.path.join(repo_root, rel_path), stat_cache[parent][name]))
+        
+        def remove(candidate: Tuple[str, int]) -> int:
+            try:
+                os.remove(candidate[0])
+                return candidate[1]
+            except (OSError, PermissionError):
+                return -1
+        
+        workers = self.config.get('cleanupWorkers', 4)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for size in executor.map(remove, candidates):
+                if size >= 0:
+                    stats['files'] += 1
+                    stats['bytes'] += size
+        
+        return stats
+    
+    def read_blob_sample(self, repo_path: str, blob: str) -> bytes:
+        """
+        Прочитать начальный фрагмент blob без чтения его целиком.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            blob: Хеш blob
+            
+        Returns:
+            Первые COMPRESSION_SAMPLE_SIZE байт содержимого
+        """
+        process = subprocess.Popen(
+            ['git', 'cat-file', 'blob', blob],
+            cwd=repo_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            return process.stdout.read(self.COMPRESSION_SAMPLE_SIZE)
+        finally:
+            process.stdout.close()
+            process.kill()
+            process.wait()
+    
+    def is_incompressible(self, sample: bytes) -> bool:
+        """
+        Проверить, что данные практически не сжимаются.
+        
+        Args:
+            sample: Фрагмент данных
+            
+        Returns:
+            True если сжатие дает выигрыш менее 10%
         """
-        Инициализация обработчика.
+        if not sample:
+            return False
+        return len(zlib.compress(sample, 6)) / len(sample) >= self.INCOMPRESSIBLE_RATIO
+    
+    def analyze_binary_blobs(self, repo_path: str) -> Dict:
+        """
+        Найти типы файлов, для которых поиск дельт при repack бесполезен.
+        
+        Файлы HEAD группируются по расширению. Известные двоичные форматы
+        отбираются по расширению, остальные крупные группы - по степени сжатия
+        нескольких наибольших blob.
         
         Args:
-            config: Конфигурация Git (repos, searchPaths, sizeThresholdGB)
-            silent: Тихий режим работы
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Предлагаемая политика: расширения, строки gitattributes, core.bigFileThreshold
         """
-        self.config = config
-        self.silent = silent
-        self.results = []
+        policy = {
+            'extensions': [],
+            'attributes': [],
+            'bigFileThreshold': self.config.get('bigFileThreshold', '50m'),
+            'applied': False,
+            'repackTimeSaved': None,
+            'repackSample': None
+        }
+        
+        try:
+            output = self.run_git(repo_path, ['ls-tree', '-r', '-l', '-z', 'HEAD'], timeout=300)
+        except subprocess.TimeoutExpired:
+            return policy
+        if output.returncode != 0:
+            return policy
+        
+        # Записи вида "<mode> blob <hash> <size>\t<path>"
+        groups = {}
+        for record in output.stdout.split('\0'):
+            meta, _, path = record.partition('\t')
+            fields = meta.split()
+            if len(fields) != 4 or fields[1] != 'blob' or not fields[3].isdigit():
+                continue
+            ext = os.path.splitext(path)[1].lower()
+            if not ext:
+                continue
+            group = groups.setdefault(ext, {'files': 0, 'bytes': 0, 'largest': []})
+            group['files'] += 1
+            group['bytes'] += int(fields[3])
+            group['largest'].append((int(fields[3]), fields[2]))
+        
+        min_bytes = self.config.get('binaryAnalysisMinBytes', 10 * 1024 * 1024)
+        for ext, group in sorted(groups.items()):
+            if ext in self.BINARY_EXTENSIONS:
+                reason = 'extension'
+            elif group['bytes'] >= min_bytes:
+                samples = sorted(group['largest'], reverse=True)[:3]
+                if not all(self.is_incompressible(self.read_blob_sample(repo_path, blob)) for _, blob in samples):
+                    continue
+                reason = 'compression'
+            else:
+                continue
+            
+            policy['extensions'].append({
+                'extension': ext,
+                'files': group['files'],
+                'bytes': group['bytes'],
+                'reason': reason
+            })
+            policy['attributes'].append(f'*{ext} -delta')
+        
+        return policy
     
-    def check_git_available(self) -> bool:
+    def read_delta_policy(self, repo_path: str) -> List[str]:
         """
-        Проверить доступность Git в системе.
+        Прочитать примененные правила -delta из блока 1C-Sweeper в .git/info/attributes.
         
+        Args:
+            repo_path: Путь к репозиторию
+            
         Returns:
-            True если Git доступен, False иначе
+            Строки правил; пустой список если политика не применялась
         """
+        attributes_path = os.path.join(self.get_git_dir(repo_path), 'info', 'attributes')
         try:
-            subprocess.run(
-                ['git', '--version'],
+            with open(attributes_path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except (OSError, UnicodeDecodeError):
+            return []
+        
+        if self.ATTRIBUTES_MARKER not in lines:
+            return []
+        
+        rules = []
+        for line in lines[lines.index(self.ATTRIBUTES_MARKER) + 1:]:
+            if not line.endswith(' -delta'):
+                break
+            rules.append(line)
+        return rules
+    
+    def collect_delta_sample(self, repo_path: str, extensions: List[str]) -> List[Tuple[str, str]]:
+        """
+        Собрать ограниченную выборку blob с расширениями политики -delta.
+        
+        Выборка берется из последних deltaSampleCommits коммитов (несколько версий
+        одних файлов, между которыми git ищет дельты) и ограничена объемом
+        deltaSampleBytes.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            extensions: Расширения файлов политики
+            
+        Returns:
+            Список пар (хеш blob, путь)
+        """
+        try:
+            output = self.run_git(
+                repo_path,
+                ['rev-list', '--objects', '--all', f'--max-count={self.config.get("deltaSampleCommits", 200)}'],
+                timeout=300
+            )
+        except subprocess.TimeoutExpired:
+            return []
+        if output.returncode != 0:
+            return []
+        
+        candidates = {}
+        for line in output.stdout.splitlines():
+            objectname, _, path = line.partition(' ')
+            if path and os.path.splitext(path)[1].lower() in extensions:
+                candidates.setdefault(objectname, path)
+        if not candidates:
+            return []
+        
+        try:
+            output = subprocess.run(
+                ['git', 'cat-file', '--batch-check=%(objectname) %(objecttype) %(objectsize)'],
+                cwd=repo_path,
+                input='\n'.join(candidates) + '\n',
                 capture_output=True,
-                check=True,
-                timeout=10
+                text=True,
+                timeout=300
             )
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            return False
+        except subprocess.TimeoutExpired:
+            return []
+        
+        limit = self.config.get('deltaSampleBytes', 32 * 1024 * 1024)
+        sample = []
+        total = 0
+        for line in output.stdout.splitlines():
+            fields = line.split()
+            if len(fields) != 3 or fields[1] != 'blob' or not fields[2].isdigit():
+                continue
+            if total + int(fields[2]) > limit:
+                continue
+            total += int(fields[2])
+            sample.append((fields[0], candidates[fields[0]]))
+        return sample
     
-    def find_repositories(self) -> List[str]:
+    def measure_pack_seconds(self, repo_path: str, sample: List[Tuple[str, str]], with_paths: bool) -> Optional[float]:
         """
-        Найти все репозитории для обработки.
+        Замерить время упаковки выборки объектов без записи результата.
+        
+        Атрибут -delta проверяется git по пути объекта: выборка без путей
+        упаковывается с поиском дельт, как без политики, а с путями - по правилам
+        .git/info/attributes. Pack-файл отбрасывается, репозиторий не изменяется.
         
+        Args:
+            repo_path: Путь к репозиторию
+            sample: Выборка (хеш blob, путь)
+            with_paths: Передавать пути объектов
+            
         Returns:
-            Список путей к репозиториям
+            Время в секундах или None если упаковка не выполнилась
         """
-        from .utils import find_git_repos
+        lines = [f'{objectname} {path}' if with_paths else objectname for objectname, path in sample]
+        start = time.perf_counter()
+        try:
+            output = subprocess.run(
+                ['git', 'pack-objects', '--no-reuse-delta', '--stdout', '-q'],
+                cwd=repo_path,
+                input=('\n'.join(lines) + '\n').encode('utf-8'),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=120
+            )
+        except subprocess.TimeoutExpired:
+            return None
+        if output.returncode != 0:
+            return None
+        return time.perf_counter() - start
+    
+    def measure_delta_policy(self, repo_path: str, policy: Dict) -> Optional[Dict]:
+        """
+        Оценить экономию времени упаковки от примененной политики -delta.
         
-        repos = set()
+        Выборка упаковывается поочередно без политики и с ней (порядок пар
+        чередуется, первый прогон прогревает кэш и не учитывается); экономия -
+        разность медиан. Количество пар ограничено так, чтобы замер уложился
+        в deltaMeasureBudgetSeconds.
         
-        # Добавляем явно указанные репозитории
-        explicit_repos = self.config.get('repos', [])
-        for repo in explicit_repos:
-            if os.path.isdir(os.path.join(repo, '.git')):
-                repos.add(os.path.abspath(repo))
+        Args:
+            repo_path: Путь к репозиторию
+            policy: Примененная политика (результат analyze_binary_blobs)
+            
+        Returns:
+            Словарь с объемом выборки и временем упаковки или None если замер невозможен
+        """
+        extensions = [item['extension'] for item in policy['extensions']]
+        sample = self.collect_delta_sample(repo_path, extensions)
+        if not sample:
+            return None
         
-        # Ищем репозитории в searchPaths
-        search_paths = self.config.get('searchPaths', [])
-        found_repos = find_git_repos(search_paths)
-        repos.update(found_repos)
+        budget = self.config.get('deltaMeasureBudgetSeconds', 120)
+        warmup = self.measure_pack_seconds(repo_path, sample, True)
+        # Прогон без политики дольше прогрева, поэтому пара оценивается в три прогрева
+        if warmup is None or warmup * 4 > budget:
+            return None
         
-        return sorted(list(repos))
+        rounds = min(self.config.get('deltaMeasureRounds', 3), max(1, int(budget / (warmup * 3 + 0.001))))
+        timings = {False: [], True: []}
+        for index in range(rounds):
+            order = (False, True) if index % 2 == 0 else (True, False)
+            for with_paths in order:
+                elapsed = self.measure_pack_seconds(repo_path, sample, with_paths)
+                if elapsed is None:
+                    return None
+                timings[with_paths].append(elapsed)
+        
+        without_policy = statistics.median(timings[False])
+        with_policy = statistics.median(timings[True])
+        return {
+            'objects': len(sample),
+            'secondsWithout': round(without_policy, 2),
+            'secondsWith': round(with_policy, 2),
+            'secondsSaved': round(without_policy - with_policy, 2),
+        }
     
-    def get_garbage_info(self, repo_path: str) -> Dict:
+    def apply_delta_policy(self, repo_path: str, policy: Dict) -> bool:
         """
-        Получить информацию о garbage в репозитории.
+        Записать политику -delta в .git/info/attributes и задать core.bigFileThreshold.
+        
+        Правила записываются в локальный для репозитория файл и не попадают в коммиты.
         
         Args:
             repo_path: Путь к репозиторию
+            policy: Результат analyze_binary_blobs
             
         Returns:
-            Словарь с информацией о garbage
+            True если политика применена, False иначе
         """
-        result = {
-            'size_gb': 0.0,
-            'pack_files_without_idx': []
-        }
+        if not policy['attributes']:
+            return False
+        
+        attributes_path = os.path.join(self.get_git_dir(repo_path), 'info', 'attributes')
+        lines = []
+        if os.path.isfile(attributes_path):
+            with open(attributes_path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        
+        # Заменяем ранее записанный блок 1C-Sweeper, остальные правила сохраняем
+        if self.ATTRIBUTES_MARKER in lines:
+            start = lines.index(self.ATTRIBUTES_MARKER)
+            end = start + 1
+            while end < len(lines) and lines[end].endswith(' -delta'):
+                end += 1
+            del lines[start:end]
+        lines.append(self.ATTRIBUTES_MARKER)
+        lines.extend(policy['attributes'])
         
         try:
-            # Выполняем git count-objects -v
+            os.makedirs(os.path.dirname(attributes_path), exist_ok=True)
+            with open(attributes_path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        except (OSError, PermissionError):
+            return False
+        
+        output = self.run_git(
+            repo_path,
+            ['config', '--local', 'core.bigFileThreshold', policy['bigFileThreshold']],
+            timeout=30
+        )
+        if output.returncode != 0:
+            return False
+        self.run_git(repo_path, ['config', '--local', 'sweeper.deltaPolicyApplied', 'true'], timeout=30)
+        return True
+    
+    def get_root_commits(self, repo_path: str) -> Tuple[str, ...]:
+        """
+        Получить корневые коммиты истории HEAD.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            
+        Returns:
+            Отсортированный кортеж хешей корневых коммитов (пустой при ошибке)
+        """
+        try:
+            output = self.run_git(repo_path, ['rev-list', '--max-parents=0', 'HEAD'], timeout=300)
+        except (OSError, subprocess.TimeoutExpired):
+            return ()
+        if output.returncode != 0:
+            return ()
+        return tuple(sorted(output.stdout.split()))
+    
+    def find_clone_groups(self, repositories: List[str]) -> Dict[str, List[str]]:
+        """
+        Сгруппировать клоны одного репозитория по корневым коммитам.
+        
+        Args:
+            repositories: Список путей к репозиториям
+            
+        Returns:
+            Словарь {корневой коммит: список клонов}, только группы из 2+ клонов
+        """
+        groups = {}
+        for repo in repositories:
+            roots = self.get_root_commits(repo)
+            if roots:
+                groups.setdefault(roots[0], []).append(repo)
+        return {root: repos for root, repos in groups.items() if len(repos) > 1}
+    
+    def init_shared_store(self, store_path: str) -> bool:
+        """
+        Создать общее хранилище объектов для группы клонов.
+        
+        В хранилище отключены автоматический gc и удаление недостижимых
+        объектов: клоны ссылаются на его объекты через alternates, и gc
+        в хранилище не должен удалить объект, нужный хотя бы одному клону.
+        
+        Args:
+            store_path: Путь к bare-репозиторию хранилища
+            
+        Returns:
+            True если хранилище готово к использованию, False иначе
+        """
+        if not os.path.isdir(store_path):
             output = subprocess.run(
-                ['git', 'count-objects', '-v'],
-                cwd=repo_path,
+                ['git', 'init', '--bare', '-q', store_path],
                 capture_output=True,
-                text=True,
-                timeout=30
+                timeout=60
             )
+            if output.returncode != 0:
+                return False
+        
+        for key, value in (('gc.auto', '0'), ('gc.pruneExpire', 'never'), ('gc.reflogExpire', 'never')):
+            output = self.run_git(store_path, ['config', key, value], timeout=30)
+            if output.returncode != 0:
+                return False
+        return True
+    
+    def list_refs(self, repo_path: str, prefix: str = 'refs/') -> Optional[Dict[str, str]]:
+        """
+        Получить ссылки репозитория с указанным префиксом.
+        
+        Args:
+            repo_path: Путь к репозиторию
+            prefix: Префикс имен ссылок
             
-            if output.returncode == 0:
-                # Ищем строку "size-garbage: N"
-                for line in output.stdout.splitlines():
-                    if line.startswith('size-garbage:'):
-                        # Размер в килобайтах
-                        size_kb = int(line.split(':')[1].strip())
-                        result['size_gb'] = round(size_kb / (1024 * 1024), 2)
-                        break
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, ValueError):
-            pass
+        Returns:
+            Словарь {имя ссылки без префикса: хеш объекта} или None при ошибке
+        """
+        try:
+            output = self.run_git(repo_path, ['for-each-ref', '--format=%(objectname) %(refname)', prefix], timeout=300)
+        except subprocess.TimeoutExpired:
+            return None
+        if output.returncode != 0:
+            return None
         
-        # Ищем pack-файлы без .idx
-        pack_dir = os.path.join(repo_path, '.git', 'objects', 'pack')
-        if os.path.isdir(pack_dir):
+        refs = {}
+        for line in output.stdout.splitlines():
+            objectname, _, refname = line.partition(' ')
+            if refname.startswith(prefix):
+                refs[refname[len(prefix):]] = objectname
+        return refs
+    
+    def count_objects(self, git_dir: str) -> Dict[str, int]:
+        """
+        Подсчитать loose-объекты и pack-файлы хранилища объектов.
+        
+        Args:
+            git_dir: Каталог git
+            
+        Returns:
+            Словарь {'loose': количество loose-объектов, 'packs': количество pack-файлов}
+        """
+        counts = {'loose': 0, 'packs': 0}
+        try:
+            output = self.run_git(git_dir, ['count-objects', '-v'], timeout=60)
+        except subprocess.TimeoutExpired:
+            return counts
+        
+        # Строки вида "count: N" и "packs: N"
+        for line in output.stdout.splitlines():
+            key, _, value = line.partition(':')
+            if key == 'count' and value.strip().isdigit():
+                counts['loose'] = int(value)
+            elif key == 'packs' and value.strip().isdigit():
+                counts['packs'] = int(value)
+        return counts
+    
+    def maintain_shared_store(self, store_path: str) -> Dict:
+        """
+        Объединить pack-файлы общего хранилища без удаления объектов.
+        
+        Каждый fetch из клона добавляет в хранилище pack-файл или loose-объекты,
+        и поиск объектов во всех подключенных клонах замедляется. При превышении
+        порогов sharedStoreMaxPacks или sharedStoreMaxLoose выполняется repack
+        с --keep-unreachable: объекты, недостижимые из ссылок хранилища, могут
+        быть нужны клонам и сохраняются.
+        
+        Args:
+            store_path: Путь к общему хранилищу
+            
+        Returns:
+            Статистика: количество pack-файлов и loose-объектов до и после, размер хранилища
+        """
+        counts = self.count_objects(store_path)
+        stats = {
+            'packsBefore': counts['packs'],
+            'packsAfter': counts['packs'],
+            'looseBefore': counts['loose'],
+            'looseAfter': counts['loose'],
+            'repacked': False,
+            'storeBytes': 0,
+            'errors': []
+        }
+        
+        needs_repack = (
+            counts['packs'] > self.config.get('sharedStoreMaxPacks', 20)
+            or counts['loose'] > self.config.get('sharedStoreMaxLoose', 6700)
+        )
+        if needs_repack and not is_path_locked(store_path):
             try:
-                pack_files = [f for f in os.listdir(pack_dir) if f.endswith('.pack')]
-                for pack_file in pack_files:
-                    idx_file = pack_file[:-5] + '.idx'  # заменяем .pack на .idx
-                    if idx_file not in os.listdir(pack_dir):
-                        pack_path = os.path.join(pack_dir, pack_file)
-                        pack_size = os.path.getsize(pack_path) / (1024 ** 3)  # в ГБ
-                        result['pack_files_without_idx'].append({
-                            'name': pack_file,
-                            'size_gb': round(pack_size, 2)
-                        })
-            except (OSError, PermissionError):
-                pass
+                output = self.run_git(store_path, ['repack', '-a', '-d', '--keep-unreachable', '-q'], timeout=3600)
+                if output.returncode == 0:
+                    stats['repacked'] = True
+                else:
+                    stats['errors'].append(f'Shared store repack failed: {output.stderr.strip()}')
+            except subprocess.TimeoutExpired as e:
+                stats['errors'].append(f'Shared store repack failed: {str(e)}')
+            counts = self.count_objects(store_path)
+            stats['packsAfter'] = counts['packs']
+            stats['looseAfter'] = counts['loose']
         
-        return result
+        stats['storeBytes'] = get_size_bytes(os.path.join(store_path, 'objects'))
+        return stats
     
-    def remove_garbage_packs(self, repo_path: str) -> int:
+    def share_objects(self, repo_path: str, store_path: str) -> Dict:
         """
-        Удалить некомплектные pack-файлы (без .idx).
+        Перенести объекты клона в общее хранилище и подключить его через alternates.
         
         Args:
-            repo_path: Путь к репозиторию
+            repo_path: Путь к клону
+            store_path: Путь к общему хранилищу
             
         Returns:
-            Количество удаленных pack-файлов
+            Статистика: размер .git/objects клона до и после, признак подключения
         """
-        removed_count = 0
-        pack_dir = os.path.join(repo_path, '.git', 'objects', 'pack')
+        objects_dir = os.path.join(self.get_git_dir(repo_path), 'objects')
+        alternates = os.path.join(objects_dir, 'info', 'alternates')
+        store_objects = os.path.abspath(os.path.join(store_path, 'objects')).replace('\\', '/')
         
-        if not os.path.isdir(pack_dir):
-            return 0
+        stats = {
+            'store': store_path,
+            'objectsBytesBefore': get_size_bytes(objects_dir),
+            'objectsBytesAfter': 0,
+            'shared': False,
+            'fetchSkipped': False,
+            'errors': []
+        }
+        stats['objectsBytesAfter'] = stats['objectsBytesBefore']
+        
+        # Проверки безопасности: shallow-клоны и чужие alternates не трогаем
+        if os.path.exists(os.path.join(self.get_git_dir(repo_path), 'shallow')):
+            stats['errors'].append('Shallow clone cannot use shared object store')
+            return stats
+        
+        existing = ''
+        if os.path.isfile(alternates):
+            with open(alternates, 'r', encoding='utf-8') as f:
+                existing = f.read().strip()
+            if existing and existing != store_objects:
+                stats['errors'].append('Repository already uses another alternates store')
+                return stats
+        
+        # Ссылки клона копируются в отдельное пространство имен хранилища;
+        # если все они уже есть в хранилище с теми же значениями, fetch не нужен
+        clone_id = hashlib.sha1(os.path.abspath(repo_path).encode('utf-8')).hexdigest()[:12]
+        clone_refs = self.list_refs(repo_path)
+        store_refs = self.list_refs(store_path, f'refs/clones/{clone_id}/')
+        if existing and clone_refs and store_refs is not None and \
+                all(store_refs.get(name) == objectname for name, objectname in clone_refs.items()):
+            stats['fetchSkipped'] = True
+        else:
+            try:
+                output = self.run_git(
+                    store_path,
+                    ['fetch', '--no-tags', '--quiet', os.path.abspath(repo_path), f'+refs/*:refs/clones/{clone_id}/*'],
+                    timeout=3600
+                )
+            except subprocess.TimeoutExpired as e:
+                stats['errors'].append(f'Fetch into shared store failed: {str(e)}')
+                return stats
+            if output.returncode != 0:
+                stats['errors'].append(f'Fetch into shared store failed: {output.stderr.strip()}')
+                return stats
+        
+        # Убеждаемся, что хранилище содержит HEAD клона, до удаления локальных объектов
+        head = self.run_git(repo_path, ['rev-parse', '--verify', '-q', 'HEAD'], timeout=30).stdout.strip()
+        if not head or self.run_git(store_path, ['cat-file', '-e', head], timeout=30).returncode != 0:
+            stats['errors'].append('Shared store does not contain repository HEAD')
+            return stats
+        
+        stats['shared'] = True
+        if existing:
+            # Клон уже подключен, дубликаты удалит очередной gc (он выполняет repack -l)
+            return stats
         
+        os.makedirs(os.path.dirname(alternates), exist_ok=True)
+        with open(alternates, 'w', encoding='utf-8') as f:
+            f.write(store_objects + '\n')
+        
+        # repack -l не включает в локальные pack-файлы объекты из alternates
         try:
-            pack_files = [f for f in os.listdir(pack_dir) if f.endswith('.pack')]
+            output = self.run_git(repo_path, ['repack', '-a', '-d', '-l', '-q'], timeout=3600)
+            if output.returncode != 0:
+                stats['errors'].append(f'Repack after sharing failed: {output.stderr.strip()}')
+        except subprocess.TimeoutExpired as e:
+            stats['errors'].append(f'Repack after sharing failed: {str(e)}')
+        
+        stats['objectsBytesAfter'] = get_size_bytes(objects_dir)
+        return stats
+    
+    def consolidate_shared_objects(self, repositories: List[str]) -> Dict[str, Dict]:
+        """
+        Объединить объекты клонов одного репозитория в общие хранилища.
+        
+        Args:
+            repositories: Список путей к репозиториям
             
-            for pack_file in pack_files:
-                idx_file = pack_file[:-5] + '.idx'
-                
-                # Если нет соответствующего .idx файла - удаляем
-                if idx_file not in os.listdir(pack_dir):
-                    pack_path = os.path.join(pack_dir, pack_file)
-                    try:
-                        os.remove(pack_path)
-                        removed_count += 1
-                        
-                        # Также удаляем связанный .mtimes файл если есть
-                        mtimes_file = pack_file[:-5] + '.mtimes'
-                        mtimes_path = os.path.join(pack_dir, mtimes_file)
-                        if os.path.exists(mtimes_path):
-                            os.remove(mtimes_path)
-                    except (OSError, PermissionError):
-                        continue
-        except (OSError, PermissionError):
-            pass
+        Returns:
+            Словарь {путь к клону: статистика share_objects}
+        """
+        shared_path = self.config.get('sharedObjectsPath')
+        if not shared_path:
+            return {}
         
-        return removed_count
+        results = {}
+        for root, clones in self.find_clone_groups(repositories).items():
+            store_path = os.path.join(shared_path, f'{root}.git')
+            if not self.init_shared_store(store_path):
+                for clone in clones:
+                    results[clone] = {'store': store_path, 'shared': False,
+                                      'errors': ['Failed to initialize shared store']}
+                continue
+            
+            for clone in clones:
+                if is_path_locked(self.get_git_dir(clone)):
+                    results[clone] = {'store': store_path, 'shared': False,
+                                      'errors': ['Repository is locked by another process']}
+                    continue
+                results[clone] = self.share_objects(clone, store_path)
+            
+            # Обслуживание хранилища и его собственный размер: экономия группы клонов
+            # равна уменьшению их .git/objects за вычетом размера хранилища
+            maintenance = self.maintain_shared_store(store_path)
+            errors = maintenance.pop('errors')
+            for index, clone in enumerate(clones):
+                results[clone]['storeMaintenance'] = dict(maintenance)
+                if index == 0:
+                    results[clone]['errors'].extend(errors)
+        
+        return results
     
     def process_repository(self, repo_path: str) -> Dict:
         """
@@ -180,39 +1908,61 @@ class GitHandler:
             'garbageBefore': 0.0,
             'garbageAfter': 0.0,
             'garbagePacksRemoved': 0,
+            'staleFilesRemoved': {},
+            'historyPruning': {},
+            'refs': {},
+            'lfs': {},
+            'ignoredCleanup': {},
+            'deltaPolicy': {},
+            'gcDuration': 0.0,
+            'optimization': {},
+            'gitTimingsMs': {},
+            'indexTuning': {},
+            'verification': {},
             'duration': 0,
             'actions': [],
             'status': 'pending',
             'errors': []
         }
         
-        import time
         start_time = time.time()
         
         try:
             # Проверяем существование репозитория
-            if not os.path.isdir(os.path.join(repo_path, '.git')):
+            if resolve_git_dir(repo_path, allow_bare=True) is None:
                 result['status'] = 'error'
                 result['errors'].append('Not a Git repository')
                 return result
             
-            # Получаем размер до обработки
-            result['sizeBefore'] = get_size_gb(repo_path)
+            # Получаем размер до обработки вместе с хранилищем объектов
+            result['sizeBefore'] = round(self.get_repository_size_bytes(repo_path) / (1024 ** 3), 2)
+            
+            # Отключаем автоматический gc, обслуживание выполняется в окне 1C-Sweeper
+            takeover = self.config.get('autoGcTakeover', False)
+            if takeover and self.take_over_auto_gc(repo_path):
+                result['actions'].append('auto_gc_takeover')
             
             # Проверяем порог размера
             threshold = self.config.get('sizeThresholdGB', 15)
             if result['sizeBefore'] < threshold:
                 result['status'] = 'skipped'
                 result['errors'].append(f'Size {result["sizeBefore"]} GB below threshold {threshold} GB')
+                if takeover and not is_path_locked(self.get_git_dir(repo_path)):
+                    if self.run_auto_gc(repo_path):
+                        result['actions'].append('auto_gc')
                 return result
             
             # Проверяем блокировку
-            git_dir = os.path.join(repo_path, '.git')
+            git_dir = self.get_git_dir(repo_path)
             if is_path_locked(git_dir):
                 result['status'] = 'error'
                 result['errors'].append('Repository is locked by another process')
                 return result
             
+            optimize = self.config.get('optimizeAfterGc', True)
+            if optimize:
+                result['gitTimingsMs']['before'] = self.measure_git_timings(repo_path)
+            
             # Получаем информацию о garbage
             garbage_info = self.get_garbage_info(repo_path)
             result['garbageBefore'] = garbage_info['size_gb']
@@ -224,6 +1974,20 @@ class GitHandler:
                 if removed > 0:
                     result['actions'].append('remove_garbage_packs')
             
+            # Удаляем устаревшие временные файлы и блокировки
+            if garbage_info['stale_files']:
+                stale_removed = self.remove_stale_files(garbage_info['stale_files'])
+                result['staleFilesRemoved'] = stale_removed
+                if stale_removed:
+                    result['actions'].append('remove_stale_files')
+            
+            # Упаковываем ссылки до remote prune, которому нужен их обход
+            refs = self.pack_refs(repo_path)
+            result['errors'].extend(refs.pop('errors'))
+            result['refs'] = refs
+            if refs['refsPacked']:
+                result['actions'].append('pack_refs')
+            
             # Выполняем git remote prune origin
             try:
                 subprocess.run(
@@ -237,10 +2001,47 @@ class GitHandler:
             except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
                 result['errors'].append(f'Remote prune failed: {str(e)}')
             
-            # Выполняем git gc --prune=now
+            # Очищаем reflog, rr-cache и устаревшие worktree до сборки мусора
+            pruning = self.prune_history(repo_path)
+            result['errors'].extend(pruning.pop('errors'))
+            result['historyPruning'] = pruning
+            if pruning['reflogExpired'] or pruning['rerereCacheBytes'] or pruning['worktreesPruned']:
+                result['actions'].append('prune_history')
+            
+            # Очищаем кэш LFS, который не обслуживается git gc
+            if self.config.get('lfsPrune', True):
+                lfs = self.prune_lfs(repo_path)
+                result['errors'].extend(lfs.pop('errors'))
+                if lfs['bytesBefore']:
+                    result['lfs'] = lfs
+                if lfs['bytesFreed'] > 0:
+                    result['actions'].append('lfs_prune')
+            
+            # Анализируем двоичные файлы и предлагаем (или применяем) политику -delta
+            delta_mode = self.config.get('binaryDeltaPolicy', 'propose')
+            if delta_mode in ('propose', 'apply'):
+                policy = self.analyze_binary_blobs(repo_path)
+                if delta_mode == 'apply' and policy['attributes']:
+                    # Эффект замеряется на ограниченной выборке только при записи новых правил
+                    changed = policy['attributes'] != self.read_delta_policy(repo_path)
+                    if self.apply_delta_policy(repo_path, policy):
+                        policy['applied'] = True
+                        result['actions'].append('delta_policy')
+                        measurement = self.measure_delta_policy(repo_path, policy) if changed else None
+                        if measurement is not None:
+                            policy['repackSample'] = measurement
+                            policy['repackTimeSaved'] = measurement['secondsSaved']
+                result['deltaPolicy'] = policy
+            
+            # Выполняем git gc --prune=now; при оптимизации gc не перезаписывает
+            # commit-graph одним файлом, чтобы сохранить цепочку split-слоев
+            gc_command = ['git', 'gc', '--prune=now']
+            if optimize:
+                gc_command = ['git', '-c', 'gc.writeCommitGraph=false', 'gc', '--prune=now']
+            gc_start = time.perf_counter()
             try:
                 subprocess.run(
-                    ['git', 'gc', '--prune=now'],
+                    gc_command,
                     cwd=repo_path,
                     capture_output=True,
                     timeout=900,  # 15 минут
@@ -251,13 +2052,49 @@ class GitHandler:
                 result['errors'].append(f'Git gc failed: {str(e)}')
                 result['status'] = 'error'
                 return result
+            result['gcDuration'] = round(time.perf_counter() - gc_start, 1)
+            
+            # Проверяем целостность после gc
+            if self.config.get('verifyAfterGc', True):
+                verification = self.verify_repository(repo_path)
+                result['verification'] = verification
+                result['actions'].append('verify')
+                if verification['status'] == 'corrupt':
+                    corrupt = ', '.join(verification['corruptFiles']) or 'connectivity check failed'
+                    result['errors'].append(f'Verification failed: {corrupt}')
+                    result['status'] = 'error'
+                    return result
+            
+            # Записываем commit-graph, multi-pack-index и bitmap
+            if optimize:
+                optimization = self.optimize_repository(repo_path)
+                result['errors'].extend(optimization.pop('errors'))
+                result['optimization'] = optimization
+                if optimization['commitGraph'] or optimization['multiPackIndex']:
+                    result['actions'].append('optimize')
+                result['gitTimingsMs']['after'] = self.measure_git_timings(repo_path)
+            
+            # Настраиваем индекс для больших рабочих деревьев
+            if self.config.get('indexTuning', False):
+                tuning = self.tune_index(repo_path)
+                result['errors'].extend(tuning.pop('errors'))
+                result['indexTuning'] = tuning
+                if tuning['applied']:
+                    result['actions'].append('tune_index')
+            
+            # Удаляем игнорируемые артефакты сборки из рабочего дерева
+            if self.config.get('cleanIgnored', False):
+                ignored = self.clean_ignored_files(repo_path)
+                result['ignoredCleanup'] = ignored
+                if ignored['files'] > 0:
+                    result['actions'].append('clean_ignored')
             
             # Получаем информацию о garbage после очистки
             garbage_info_after = self.get_garbage_info(repo_path)
             result['garbageAfter'] = garbage_info_after['size_gb']
             
             # Получаем размер после обработки
-            result['sizeAfter'] = get_size_gb(repo_path)
+            result['sizeAfter'] = round(self.get_repository_size_bytes(repo_path) / (1024 ** 3), 2)
             result['spaceSaved'] = round(result['sizeBefore'] - result['sizeAfter'], 2)
             
             result['status'] = 'success'
@@ -292,21 +2129,55 @@ class GitHandler:
         if not self.silent:
             print(f'[INFO] Found {len(repositories)} Git repositories')
         
+        # Объединяем объекты клонов одного репозитория в общие хранилища
+        shared = self.consolidate_shared_objects(repositories)
+        
+        # Submodules обрабатываются как самостоятельные задачи в общем пуле
+        tasks = [(repo, None) for repo in repositories]
+        if self.config.get('processSubmodules', True):
+            known_stores = {get_object_store_id(self.get_git_dir(repo)) for repo in repositories}
+            for repo in repositories:
+                for submodule in self.find_submodules(repo):
+                    store_id = get_object_store_id(submodule)
+                    if store_id not in known_stores:
+                        known_stores.add(store_id)
+                        tasks.append((submodule, repo))
+        
+        task_results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self.process_repository, path): (path, parent)
+                for path, parent in tasks
+            }
+            for i, future in enumerate(as_completed(futures), 1):
+                path, parent = futures[future]
+                result = future.result()
+                task_results[path] = result
+                
+                if not self.silent:
+                    kind = 'submodule' if parent else 'repository'
+                    print(f'[INFO] Processed {kind} {i}/{len(tasks)}: {path}')
+                    if result['status'] == 'success':
+                        print(f'[SUCCESS] Space saved: {result["spaceSaved"]} GB')
+                    elif result['status'] == 'skipped':
+                        print(f'[INFO] Skipped: {result["errors"][0]}')
+                    else:
+                        print(f'[ERROR] Failed: {", ".join(result["errors"])}')
+        
         results = []
-        for i, repo in enumerate(repositories, 1):
-            if not self.silent:
-                print(f'[INFO] Processing repository {i}/{len(repositories)}: {repo}')
+        for repo in repositories:
+            result = task_results[repo]
+            if repo in self.worktrees:
+                result['worktrees'] = self.worktrees[repo]
+            if repo in shared:
+                result['sharedObjects'] = shared[repo]
+                result['errors'].extend(shared[repo].pop('errors'))
             
-            result = self.process_repository(repo)
+            submodules = [task_results[path] for path, parent in tasks if parent == repo]
+            if submodules:
+                result['submodules'] = submodules
+                result['submodulesSpaceSaved'] = round(sum(sub['spaceSaved'] for sub in submodules), 2)
             results.append(result)
-            
-            if not self.silent:
-                if result['status'] == 'success':
-                    print(f'[SUCCESS] Space saved: {result["spaceSaved"]} GB')
-                elif result['status'] == 'skipped':
-                    print(f'[INFO] Skipped: {result["errors"][0]}')
-                else:
-                    print(f'[ERROR] Failed: {", ".join(result["errors"])}')
         
         self.results = results
         return results
@@ -0,0 +1,262 @@
+"""
+Обработчик артефактов аварийного завершения JVM: дампы кучи, журналы
+hs_err и устаревшие файлы hsperfdata, оставленные EDT.
+"""
+
+import os
+import re
+import time
+import tempfile
+import psutil
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from .utils import safe_remove_file
+
+
+class JvmHandler:
+    """Класс для очистки артефактов аварийного завершения JVM."""
+    
+    # Имена артефактов с PID процесса JVM
+    ARTIFACT_PATTERNS = {
+        'heapDumps': re.compile(r'^java_pid(\d+)(?:\.\d+)?\.hprof$', re.IGNORECASE),
+        'errorLogs': re.compile(r'^(?:hs_err|replay)_pid(\d+)\.log$', re.IGNORECASE),
+    }
+    
+    # Файлы производительности JVM: hsperfdata_<пользователь>/<pid>
+    HSPERFDATA_PREFIX = 'hsperfdata_'
+    
+    # Имена процессов, которые могут владеть артефактами
+    JVM_PROCESS_NAMES = ['java', 'javaw', '1cedt', 'eclipse']
+    
+    # Директории, в которые обход не спускается
+    SKIP_DIRS = {'.git', 'node_modules', '.metadata'}
+    
+    def __init__(self, config: dict, silent: bool = False, workspaces: Optional[List[str]] = None):
+        """
+        Инициализация обработчика.
+        
+        Args:
+            config: Конфигурация JVM (searchPaths, includeHome, includeTemp,
+                    minAgeHours, maxDepth)
+            silent: Тихий режим работы
+            workspaces: Пути к EDT workspaces для поиска артефактов
+        """
+        self.config = config
+        self.silent = silent
+        self.workspaces = workspaces or []
+        self.results = []
+    
+    def get_search_roots(self) -> List[str]:
+        """
+        Получить корневые директории поиска без повторов.
+        
+        Returns:
+            Список существующих директорий
+        """
+        roots = list(self.config.get('searchPaths', []))
+        
+        if self.config.get('includeWorkspaces', True):
+            roots.extend(self.workspaces)
+        if self.config.get('includeHome', True):
+            roots.append(str(Path.home()))
+        if self.config.get('includeTemp', True):
+            roots.append(tempfile.gettempdir())
+        
+        unique = []
+        seen = set()
+        for root in roots:
+            if not os.path.isdir(root):
+                continue
+            key = os.path.normcase(os.path.realpath(root))
+            if key not in seen:
+                seen.add(key)
+                unique.append(root)
+        
+        return unique
+    
+    def get_process_snapshot(self) -> Dict[int, Optional[str]]:
+        """
+        Получить снимок запущенных процессов.
+        
+        Returns:
+            Имена процессов по PID (None если имя недоступно)
+        """
+        snapshot = {}
+        for proc in psutil.process_iter(['pid', 'name']):
+            try:
+                snapshot[proc.info['pid']] = proc.info['name']
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return snapshot
+    
+    def is_owner_alive(self, pid: int, snapshot: Dict[int, Optional[str]]) -> bool:
+        """
+        Проверить, жив ли процесс JVM, оставивший артефакт.
+        
+        PID, занятый процессом с известным не-JVM именем, считается
+        переиспользованным: владелец артефакта завершен.
+        
+        Args:
+            pid: PID из имени артефакта
+            snapshot: Снимок процессов
+        
+        Returns:
+            True если владелец может быть жив
+        """
+        if pid not in snapshot:
+            return False
+        
+        name = snapshot[pid]
+        if not name:
+            return True
+        
+        name = name.lower()
+        return any(jvm_name in name for jvm_name in self.JVM_PROCESS_NAMES)
+    
+    def match_artifact(self, dirname: str, filename: str) -> Optional[Tuple[str, int]]:
+        """
+        Определить тип артефакта по имени файла.
+        
+        Args:
+            dirname: Имя директории файла
+            filename: Имя файла
+        
+        Returns:
+            Кортеж (тип, PID) или None если файл не артефакт JVM
+        """
+        for kind, pattern in self.ARTIFACT_PATTERNS.items():
+            match = pattern.match(filename)
+            if match:
+                return kind, int(match.group(1))
+        
+        if dirname.lower().startswith(self.HSPERFDATA_PREFIX) and filename.isdigit():
+            return 'perfData', int(filename)
+        
+        return None
+    
+    def find_artifacts(self, roots: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Найти артефакты JVM за один ограниченный обход корневых директорий.
+        
+        Обход не спускается глубже maxDepth, в служебные директории и по
+        ссылкам; директория, достижимая из нескольких корней, обходится один раз.
+        
+        Args:
+            roots: Корневые директории поиска
+        
+        Returns:
+            Найденные артефакты по корневым директориям
+        """
+        max_depth = self.config.get('maxDepth', 3)
+        cutoff = time.time() - self.config.get('minAgeHours', 1) * 3600
+        
+        found = {root: [] for root in roots}
+        visited: Set[Tuple[int, int]] = set()
+        pending = [(root, root, 0) for root in roots]
+        
+        while pending:
+            root, current, depth = pending.pop()
+            try:
+                current_stat = os.stat(current)
+            except OSError:
+                continue
+            
+            dir_id = (current_stat.st_dev, current_stat.st_ino)
+            if dir_id in visited:
+                continue
+            visited.add(dir_id)
+            
+            dirname = os.path.basename(current)
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if depth < max_depth and entry.name not in self.SKIP_DIRS:
+                                    pending.append((root, entry.path, depth + 1))
+                                continue
+                            
+                            artifact = self.match_artifact(dirname, entry.name)
+                            if artifact is None or not entry.is_file(follow_symlinks=False):
+                                continue
+                            
+                            entry_stat = entry.stat(follow_symlinks=False)
+                            if entry_stat.st_mtime > cutoff:
+                                continue
+                            
+                            kind, pid = artifact
+                            found[root].append({
+                                'path': entry.path,
+                                'type': kind,
+                                'pid': pid,
+                                'bytes': entry_stat.st_size,
+                            })
+                        except OSError:
+                            continue
+            except (OSError, PermissionError):
+                continue
+        
+        return found
+    
+    def process_all(self) -> List[Dict]:
+        """
+        Найти и удалить артефакты JVM во всех директориях поиска.
+        
+        Returns:
+            Список результатов по корневым директориям
+        """
+        roots = self.get_search_roots()
+        
+        if not roots:
+            if not self.silent:
+                print('[INFO] No directories to search for JVM artifacts')
+            return []
+        
+        if not self.silent:
+            print(f'[INFO] Searching JVM crash artifacts in {len(roots)} directories')
+        
+        start_time = time.time()
+        found = self.find_artifacts(roots)
+        snapshot = self.get_process_snapshot()
+        
+        results = []
+        for root in roots:
+            result = {
+                'path': root,
+                'artifactsFound': len(found[root]),
+                'artifactsDeleted': 0,
+                'bytesFound': sum(artifact['bytes'] for artifact in found[root]),
+                'bytesFreed': 0,
+                'spaceSaved': 0.0,
+                'skippedAlive': 0,
+                'artifacts': [],
+                'status': 'success',
+                'errors': []
+            }
+            
+            for artifact in found[root]:
+                if self.is_owner_alive(artifact['pid'], snapshot):
+                    result['skippedAlive'] += 1
+                    continue
+                
+                if safe_remove_file(artifact['path']):
+                    result['artifactsDeleted'] += 1
+                    result['bytesFreed'] += artifact['bytes']
+                    result['artifacts'].append(artifact)
+                else:
+                    result['errors'].append(f'Failed to remove {artifact["path"]}')
+            
+            result['spaceSaved'] = round(result['bytesFreed'] / (1024 ** 3), 2)
+            if result['errors']:
+                result['status'] = 'error'
+            elif not found[root]:
+                result['status'] = 'skipped'
+            result['duration'] = int(time.time() - start_time)
+            results.append(result)
+            
+            if not self.silent and found[root]:
+                print(f'[SUCCESS] {root}: {result["artifactsDeleted"]} artifacts removed, '
+                      f'{result["spaceSaved"]} GB saved')
+        
+        self.results = results
+        return results
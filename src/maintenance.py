@@ -13,6 +13,7 @@ from typing import Dict, Optional
 from .git_handler import GitHandler
 from .edt_handler import EdtHandler
 from .db_handler import DatabaseHandler
+from .jvm_handler import JvmHandler
 from .reporter import Reporter
 from .utils import format_log_message
 
@@ -74,9 +75,10 @@ class MaintenanceSystem:
         has_git = 'git' in settings
         has_edt = 'edt' in settings
         has_db = 'database' in settings
+        has_jvm = 'jvm' in settings
         
-        if not (has_git or has_edt or has_db):
-            self.log_error('Configuration must have at least one handler section (git, edt, database)')
+        if not (has_git or has_edt or has_db or has_jvm):
+            self.log_error('Configuration must have at least one handler section (git, edt, database, jvm)')
             return False
         
         return True
@@ -129,12 +131,14 @@ class MaintenanceSystem:
         git_results = []
         edt_results = []
         db_results = []
+        jvm_results = []
         
         # Отслеживаем какие секции были обработаны
         processed_sections = {
             'git': False,
             'edt': False,
-            'database': False
+            'database': False,
+            'jvm': False
         }
         
         has_errors = False
@@ -144,7 +148,10 @@ class MaintenanceSystem:
             processed_sections['git'] = True
             self.log_info('=== Processing Git repositories ===')
             try:
-                git_handler = GitHandler(settings['git'], self.silent)
+                max_workers = 1
+                if general_settings.get('parallelProcessing', False):
+                    max_workers = general_settings.get('maxParallelTasks', 2)
+                git_handler = GitHandler(settings['git'], self.silent, max_workers)
                 git_results = git_handler.process_all()
                 
                 # Проверяем наличие ошибок
@@ -188,6 +195,23 @@ class MaintenanceSystem:
                 self.log_error(f'Database handler error: {e}')
                 has_errors = True
         
+        # Обрабатываем артефакты аварийного завершения JVM
+        if 'jvm' in settings:
+            processed_sections['jvm'] = True
+            self.log_info('=== Processing JVM crash artifacts ===')
+            try:
+                workspaces = [result['path'] for result in edt_results if result.get('path')]
+                jvm_handler = JvmHandler(settings['jvm'], self.silent, workspaces)
+                jvm_results = jvm_handler.process_all()
+                
+                # Проверяем наличие ошибок
+                for result in jvm_results:
+                    if result.get('status') == 'error':
+                        has_errors = True
+            except Exception as e:
+                self.log_error(f'JVM handler error: {e}')
+                has_errors = True
+        
         # Формируем отчет
         end_time = datetime.now()
         
@@ -200,7 +224,8 @@ class MaintenanceSystem:
             db_results,
             start_time,
             end_time,
-            processed_sections
+            processed_sections,
+            jvm_results
         )
         
         # Сохраняем отчет
@@ -30,7 +30,8 @@ class Reporter:
         db_results: List[Dict],
         start_time: datetime,
         end_time: datetime,
-        processed_sections: Dict[str, bool] = None
+        processed_sections: Dict[str, bool] = None,
+        jvm_results: List[Dict] = None
     ) -> Dict:
         """
         Сгенерировать отчет о выполненных операциях.
@@ -41,6 +42,8 @@ class Reporter:
             db_results: Результаты обработки баз 1С
             start_time: Время начала обслуживания
             end_time: Время окончания обслуживания
+            processed_sections: Обработанные секции конфигурации
+            jvm_results: Результаты очистки артефактов JVM
             
         Returns:
             Структура отчета
@@ -61,6 +64,7 @@ class Reporter:
         # Обрабатываем результаты Git
         for result in git_results:
             total_space_saved += result.get('spaceSaved', 0.0)
+            total_space_saved += result.get('submodulesSpaceSaved', 0.0)
             if result.get('status') == 'success':
                 git_success += 1
             elif result.get('status') == 'error':
@@ -100,6 +104,21 @@ class Reporter:
                         'errors': result['errors']
                     })
         
+        # Обрабатываем результаты очистки артефактов JVM
+        jvm_results = jvm_results or []
+        jvm_found = 0
+        jvm_deleted = 0
+        for result in jvm_results:
+            total_space_saved += result.get('spaceSaved', 0.0)
+            jvm_found += result.get('artifactsFound', 0)
+            jvm_deleted += result.get('artifactsDeleted', 0)
+            if result.get('status') == 'error' and result.get('errors'):
+                errors.append({
+                    'type': 'jvm',
+                    'path': result.get('path'),
+                    'errors': result['errors']
+                })
+        
         # Формируем отчет
         report = {
             'reportVersion': '1.0',
@@ -117,6 +136,8 @@ class Reporter:
                 'databasesProcessed': len(db_results),
                 'databasesSuccess': db_success,
                 'databasesFailed': db_failed,
+                'jvmArtifactsFound': jvm_found,
+                'jvmArtifactsDeleted': jvm_deleted,
             },
             'errors': errors
         }
@@ -128,6 +149,8 @@ class Reporter:
             report['edtWorkspaces'] = edt_results
         if processed_sections and processed_sections.get('database', False):
             report['databases'] = db_results
+        if processed_sections and processed_sections.get('jvm', False):
+            report['jvmArtifacts'] = jvm_results
         
         return report
     
@@ -214,6 +237,13 @@ class Reporter:
                 print(f'  Причина: Базы данных не найдены в указанных путях')
                 print()
         
+        # Артефакты JVM - показываем если есть конфигурация
+        if 'jvmArtifacts' in report:
+            print(f'Артефакты JVM:')
+            print(f'  Найдено: {summary["jvmArtifactsFound"]}')
+            print(f'  Удалено: {summary["jvmArtifactsDeleted"]}')
+            print()
+        
         # Ошибки
         if report['errors']:
             print(f'ОШИБКИ ({len(report["errors"])}):')
@@ -0,0 +1,317 @@
+"""
+Отложенное удаление: перенос целей очистки в корзину на том же устройстве
+и фоновая очистка корзины с низким приоритетом ввода-вывода.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import threading
+from typing import Dict, Optional, Tuple
+from .utils import remove_path_counted
+
+
+class DeferredPurge:
+    """Корзина с журналом и фоновым потоком очистки."""
+    
+    # Имя директории корзины рядом с workspace
+    TRASH_DIR_NAME = '.1c-sweeper-trash'
+    
+    # Журнал перенесенных в корзину записей
+    JOURNAL_NAME = 'journal.json'
+    
+    # Фоновый режим потока на Windows (SetThreadPriority)
+    THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+    
+    def __init__(self, silent: bool = False):
+        """
+        Инициализация корзины.
+        
+        Args:
+            silent: Тихий режим работы
+        """
+        self.silent = silent
+        # Директории корзины по идентификатору устройства
+        self.trash_dirs = {}
+        # Записи журналов по директориям корзины
+        self.journals = {}
+        # Освобождено по (workspace, правило): [файлов, байт]
+        self.purged = {}
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.thread = None
+    
+    def get_trash_path(self, workspace_path: str) -> str:
+        """
+        Получить путь к директории корзины рядом с workspace.
+        
+        Args:
+            workspace_path: Путь к workspace
+        
+        Returns:
+            Путь к директории корзины (может не существовать)
+        """
+        parent = os.path.dirname(os.path.abspath(workspace_path))
+        return os.path.join(parent, self.TRASH_DIR_NAME)
+    
+    def resume(self, workspace_path: str) -> int:
+        """
+        Поставить в очередь остатки прерванной очистки из корзины рядом с workspace.
+        
+        Корзина не создается; остатки удаляются независимо от того, будет ли
+        workspace обработан в этом запуске.
+        
+        Args:
+            workspace_path: Путь к workspace
+        
+        Returns:
+            Количество записей, поставленных в очередь
+        """
+        trash_dir = self.get_trash_path(workspace_path)
+        if trash_dir in self.journals or not os.path.isdir(trash_dir):
+            return 0
+        return len(self.load_journal(trash_dir))
+    
+    def get_trash_dir(self, workspace_path: str) -> Optional[str]:
+        """
+        Получить директорию корзины на устройстве workspace.
+        
+        Корзина создается рядом с workspace и используется только если
+        находится на том же устройстве, иначе перенос не будет атомарным.
+        
+        Args:
+            workspace_path: Путь к workspace
+        
+        Returns:
+            Путь к директории корзины или None если перенос невозможен
+        """
+        try:
+            device = os.stat(workspace_path).st_dev
+        except OSError:
+            return None
+        
+        if device in self.trash_dirs:
+            return self.trash_dirs[device]
+        
+        trash_dir = self.get_trash_path(workspace_path)
+        try:
+            os.makedirs(trash_dir, exist_ok=True)
+            if os.stat(trash_dir).st_dev != device:
+                trash_dir = None
+        except OSError:
+            trash_dir = None
+        
+        self.trash_dirs[device] = trash_dir
+        if trash_dir is not None:
+            self.load_journal(trash_dir)
+        return trash_dir
+    
+    def load_journal(self, trash_dir: str) -> Dict:
+        """
+        Загрузить журнал корзины и поставить в очередь незавершенные записи.
+        
+        Записи, оставшиеся после прерванной очистки, удаляются в этом запуске.
+        
+        Args:
+            trash_dir: Путь к директории корзины
+        
+        Returns:
+            Записи журнала
+        """
+        if trash_dir in self.journals:
+            return self.journals[trash_dir]
+        
+        entries = {}
+        journal_path = os.path.join(trash_dir, self.JOURNAL_NAME)
+        try:
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('entries', {})
+        except (OSError, ValueError, AttributeError):
+            entries = {}
+        
+        # Содержимое корзины без записи в журнале тоже подлежит удалению,
+        # а записи журнала без содержимого уже удалены
+        try:
+            names = [name for name in os.listdir(trash_dir) if not name.startswith(self.JOURNAL_NAME)]
+        except OSError:
+            names = []
+        
+        pending = {}
+        for name in names:
+            entry = entries.get(name)
+            pending[name] = dict(entry) if isinstance(entry, dict) else {}
+            pending[name]['resumed'] = True
+        
+        with self.lock:
+            self.journals[trash_dir] = pending
+        
+        for name in names:
+            self.enqueue(trash_dir, name)
+        
+        return pending
+    
+    def write_journal(self, trash_dir: str):
+        """
+        Атомарно записать журнал корзины.
+        
+        Args:
+            trash_dir: Путь к директории корзины
+        """
+        journal_path = os.path.join(trash_dir, self.JOURNAL_NAME)
+        temp_path = journal_path + '.tmp'
+        
+        with self.lock:
+            data = {'entries': dict(self.journals.get(trash_dir, {}))}
+        
+        try:
+            if not data['entries']:
+                if os.path.exists(journal_path):
+                    os.remove(journal_path)
+                return
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, journal_path)
+        except OSError:
+            pass
+    
+    def stage(self, path: str, rule: str, workspace_path: str) -> bool:
+        """
+        Перенести цель очистки в корзину.
+        
+        Args:
+            path: Путь к файлу или директории
+            rule: Имя правила очистки
+            workspace_path: Путь к workspace
+        
+        Returns:
+            True если цель перенесена и будет удалена в фоне
+        """
+        trash_dir = self.get_trash_dir(workspace_path)
+        if trash_dir is None:
+            return False
+        
+        name = uuid.uuid4().hex
+        try:
+            os.rename(path, os.path.join(trash_dir, name))
+        except OSError:
+            return False
+        
+        with self.lock:
+            self.journals[trash_dir][name] = {
+                'workspace': workspace_path,
+                'rule': rule,
+                'source': path,
+                'stagedAt': int(time.time()),
+            }
+        self.enqueue(trash_dir, name)
+        return True
+    
+    def flush(self):
+        """Записать журналы всех корзин после переноса целей."""
+        for trash_dir in list(self.journals):
+            self.write_journal(trash_dir)
+    
+    def enqueue(self, trash_dir: str, name: str):
+        """
+        Поставить запись корзины в очередь фоновой очистки.
+        
+        Args:
+            trash_dir: Путь к директории корзины
+            name: Имя записи в корзине
+        """
+        self.start()
+        self.queue.put((trash_dir, name))
+    
+    def start(self):
+        """Запустить фоновый поток очистки, если он еще не запущен."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.purge_worker, name='sweeper-purge', daemon=True)
+            self.thread.start()
+    
+    def set_idle_priority(self) -> bool:
+        """
+        Понизить приоритет ввода-вывода текущего потока.
+        
+        Returns:
+            True если приоритет понижен
+        """
+        try:
+            if sys.platform == 'win32':
+                import ctypes
+                kernel32 = ctypes.windll.kernel32
+                return bool(kernel32.SetThreadPriority(
+                    kernel32.GetCurrentThread(), self.THREAD_MODE_BACKGROUND_BEGIN
+                ))
+            
+            if sys.platform.startswith('linux') and hasattr(threading, 'get_native_id'):
+                import psutil
+                # На Linux ionice применяется к отдельному потоку по его TID
+                psutil.Process(threading.get_native_id()).ionice(psutil.IOPRIO_CLASS_IDLE)
+                return True
+        except Exception:
+            return False
+        
+        return False
+    
+    def purge_worker(self):
+        """Фоновый поток: удаляет записи корзины из очереди."""
+        self.set_idle_priority()
+        
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                self.purge_entry(*item)
+            finally:
+                self.queue.task_done()
+    
+    def purge_entry(self, trash_dir: str, name: str) -> Tuple[int, int]:
+        """
+        Удалить одну запись корзины и учесть освобожденное место.
+        
+        Args:
+            trash_dir: Путь к директории корзины
+            name: Имя записи в корзине
+        
+        Returns:
+            Кортеж (удалено файлов, удалено байт)
+        """
+        # Фоновое удаление выполняется одним потоком, чтобы не мешать работе
+        files, size_bytes = remove_path_counted(os.path.join(trash_dir, name), max_workers=1)
+        
+        with self.lock:
+            entry = self.journals.get(trash_dir, {}).pop(name, {})
+            # Записи, оставшиеся от прерванного запуска, учитываются отдельно
+            if entry.get('resumed'):
+                key = (None, None)
+            else:
+                key = (entry.get('workspace'), entry.get('rule'))
+            totals = self.purged.setdefault(key, [0, 0])
+            totals[0] += files
+            totals[1] += size_bytes
+        
+        return files, size_bytes
+    
+    def wait(self) -> Dict[Tuple, list]:
+        """
+        Дождаться завершения фоновой очистки и обновить журналы.
+        
+        Returns:
+            Освобожденное место по (workspace, правило): [файлов, байт];
+            записи прерванных запусков учитываются под ключом (None, None)
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        
+        self.flush()
+        
+        with self.lock:
+            return {key: list(value) for key, value in self.purged.items()}
@@ -4,41 +4,72 @@
 
 import os
 import re
-import shutil
+import stat
+import hashlib
 import psutil
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 
 
-def get_size_gb(path: str) -> float:
+def get_size_gb(path: str, exclude: Optional[List[str]] = None) -> float:
     """
     Получить размер файла или директории в гигабайтах.
     
     Args:
         path: Путь к файлу или директории
+        exclude: Вложенные директории, не учитываемые в размере
         
     Returns:
         Размер в ГБ с точностью до сотых
     """
+    size_gb = get_size_bytes(path, exclude) / (1024 ** 3)
+    return round(size_gb, 2)
+
+
+def get_size_bytes(path: str, exclude: Optional[List[str]] = None) -> int:
+    """
+    Получить размер файла или директории в байтах.
+    
+    Args:
+        path: Путь к файлу или директории
+        exclude: Вложенные директории, не учитываемые в размере
+        
+    Returns:
+        Размер в байтах
+    """
     if not os.path.exists(path):
-        return 0.0
+        return 0
     
     if os.path.isfile(path):
-        size_bytes = os.path.getsize(path)
-    else:
-        size_bytes = 0
-        for dirpath, dirnames, filenames in os.walk(path):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                try:
-                    size_bytes += os.path.getsize(filepath)
-                except (OSError, FileNotFoundError):
-                    # Файл может быть удален или недоступен
-                    continue
+        return os.path.getsize(path)
     
-    size_gb = size_bytes / (1024 ** 3)
-    return round(size_gb, 2)
+    excluded = {os.path.normcase(os.path.abspath(p)) for p in (exclude or [])}
+    
+    # os.scandir отдает атрибуты файлов вместе с содержимым каталога,
+    # на Windows это избавляет от отдельного вызова stat на каждый файл
+    size_bytes = 0
+    pending = [path]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if excluded and os.path.normcase(os.path.abspath(entry.path)) in excluded:
+                                continue
+                            pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            size_bytes += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        # Файл может быть удален или недоступен
+                        continue
+        except (OSError, PermissionError):
+            continue
+    
+    return size_bytes
 
 
 def is_path_locked(path: str) -> bool:
@@ -98,10 +129,105 @@ def is_process_running(process_names: List[str]) -> bool:
     return False
 
 
+def is_git_dir(path: str) -> bool:
+    """
+    Проверить, является ли путь каталогом git (bare-репозиторий, .git/modules/<имя>).
+    
+    Args:
+        path: Путь для проверки
+        
+    Returns:
+        True если в каталоге есть HEAD и objects, False иначе
+    """
+    return os.path.isfile(os.path.join(path, 'HEAD')) and os.path.isdir(os.path.join(path, 'objects'))
+
+
+def resolve_git_dir(path: str, allow_bare: bool = False) -> Optional[str]:
+    """
+    Получить каталог git рабочего каталога.
+    
+    Поддерживается как обычный каталог .git, так и файл .git со ссылкой
+    "gitdir: <путь>" (связанные worktree и submodules).
+    
+    Args:
+        path: Путь к рабочему каталогу
+        allow_bare: Принимать путь, который сам является каталогом git
+        
+    Returns:
+        Абсолютный путь к каталогу git или None если это не репозиторий
+    """
+    dot_git = os.path.join(path, '.git')
+    if os.path.isdir(dot_git):
+        return os.path.abspath(dot_git)
+    
+    if os.path.isfile(dot_git):
+        try:
+            with open(dot_git, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+        except (OSError, UnicodeDecodeError):
+            return None
+        
+        if content.startswith('gitdir:'):
+            git_dir = os.path.normpath(os.path.join(path, content[len('gitdir:'):].strip()))
+            if os.path.isdir(git_dir):
+                return os.path.abspath(git_dir)
+        return None
+    
+    if allow_bare and is_git_dir(path):
+        return os.path.abspath(path)
+    
+    return None
+
+
+def get_common_git_dir(git_dir: str) -> str:
+    """
+    Получить общий каталог git (с хранилищем объектов) для каталога worktree.
+    
+    Args:
+        git_dir: Каталог git рабочего каталога
+        
+    Returns:
+        Общий каталог git; для основного рабочего каталога совпадает с git_dir
+    """
+    commondir_file = os.path.join(git_dir, 'commondir')
+    if os.path.isfile(commondir_file):
+        try:
+            with open(commondir_file, 'r', encoding='utf-8') as f:
+                common_dir = f.read().strip()
+            return os.path.abspath(os.path.normpath(os.path.join(git_dir, common_dir)))
+        except (OSError, UnicodeDecodeError):
+            pass
+    return git_dir
+
+
+def get_object_store_id(git_dir: str) -> Tuple:
+    """
+    Получить идентификатор хранилища объектов (устройство и inode каталога objects).
+    
+    Один и тот же репозиторий, доступный через symlink, пересекающиеся
+    пути поиска или связанные worktree, получает одинаковый идентификатор.
+    
+    Args:
+        git_dir: Каталог git рабочего каталога
+        
+    Returns:
+        Кортеж (st_dev, st_ino) или (нормализованный путь,) если каталог недоступен
+    """
+    common_dir = get_common_git_dir(git_dir)
+    try:
+        stat = os.stat(os.path.join(common_dir, 'objects'))
+        return (stat.st_dev, stat.st_ino)
+    except OSError:
+        return (os.path.normcase(os.path.realpath(common_dir)),)
+
+
 def find_git_repos(search_paths: List[str]) -> List[str]:
     """
     Найти все Git-репозитории в указанных путях (поиск на один уровень вглубь).
     
+    Учитываются рабочие каталоги с файлом .git (связанные worktree),
+    пути приводятся к реальным для исключения дубликатов через symlink.
+    
     Args:
         search_paths: Список путей для поиска
         
@@ -115,17 +241,15 @@ def find_git_repos(search_paths: List[str]) -> List[str]:
             continue
         
         # Проверяем сам путь
-        if os.path.isdir(os.path.join(search_path, '.git')):
-            repos.append(os.path.abspath(search_path))
+        if resolve_git_dir(search_path):
+            repos.append(os.path.realpath(search_path))
         
         # Ищем на один уровень вглубь
         try:
             for item in os.listdir(search_path):
                 item_path = os.path.join(search_path, item)
-                if os.path.isdir(item_path):
-                    git_dir = os.path.join(item_path, '.git')
-                    if os.path.isdir(git_dir):
-                        repos.append(os.path.abspath(item_path))
+                if os.path.isdir(item_path) and resolve_git_dir(item_path):
+                    repos.append(os.path.realpath(item_path))
         except (OSError, PermissionError):
             continue
     
@@ -299,11 +423,413 @@ def safe_remove_dir(dirpath: str) -> bool:
     Returns:
         True если успешно удалена, False иначе
     """
+    _, _, removed = remove_tree(dirpath)
+    return removed
+
+
+# Количество потоков удаления по умолчанию: удаление упирается в IOPS диска,
+# а не в процессор, поэтому потоков больше, чем ядер
+REMOVE_TREE_WORKERS = 8
+
+# Атрибут точки повторной обработки (junction, symlink) на Windows
+FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+
+_DIR_FD_SUPPORTED = (
+    os.unlink in os.supports_dir_fd
+    and os.scandir in os.supports_fd
+    and hasattr(os, 'O_DIRECTORY')
+)
+
+
+def _is_link_entry(entry: os.DirEntry) -> bool:
+    """
+    Проверить, является ли запись ссылкой на директорию (symlink, junction).
+    
+    Содержимое таких ссылок не удаляется, удаляется только сама ссылка.
+    
+    Args:
+        entry: Запись каталога
+        
+    Returns:
+        True если запись является ссылкой или точкой повторной обработки
+    """
+    if entry.is_symlink():
+        return True
+    
+    attributes = getattr(entry.stat(follow_symlinks=False), 'st_file_attributes', 0)
+    return bool(attributes & FILE_ATTRIBUTE_REPARSE_POINT)
+
+
+def _unlink_entry(name: str, path: str, dir_fd: Optional[int]) -> bool:
+    """
+    Удалить файл, при отказе в доступе сняв атрибут только для чтения.
+    
+    Args:
+        name: Имя файла в директории
+        path: Полный путь к файлу
+        dir_fd: Дескриптор директории или None
+        
+    Returns:
+        True если файл удален
+    """
+    try:
+        if dir_fd is not None:
+            os.unlink(name, dir_fd=dir_fd)
+        else:
+            os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return False
+    except PermissionError:
+        pass
+    except OSError:
+        return False
+    
     try:
-        if os.path.exists(dirpath):
-            shutil.rmtree(dirpath)
+        os.chmod(path, stat.S_IWRITE | stat.S_IREAD)
+        os.unlink(path)
+        return True
+    except (OSError, PermissionError):
+        return False
+
+
+def _remove_link(path: str) -> bool:
+    """
+    Удалить ссылку на директорию, не затрагивая ее содержимое.
+    
+    Args:
+        path: Путь к ссылке
+        
+    Returns:
+        True если ссылка удалена
+    """
+    # Junction на Windows удаляется как директория, symlink - как файл
+    for remove in (os.unlink, os.rmdir):
+        try:
+            remove(path)
+            return True
+        except (OSError, PermissionError):
+            continue
+    return False
+
+
+def _open_directory(dirpath: str, expected: Optional[os.stat_result]) -> Tuple[Optional[int], Iterator[os.DirEntry]]:
+    """
+    Открыть директорию для очистки, не переходя по ссылкам.
+    
+    Между обходом родительской директории и открытием дочерней ее могут
+    заменить ссылкой (symlink, junction) на директорию вне дерева. Поэтому
+    директория открывается без перехода по ссылке и сверяется с записью,
+    полученной при обходе родителя; на Windows перед обходом повторно
+    проверяется атрибут точки повторной обработки.
+    
+    Args:
+        dirpath: Путь к директории
+        expected: Атрибуты директории из обхода родителя (lstat) или None
+        
+    Returns:
+        Кортеж (дескриптор директории или None, итератор записей)
+        
+    Raises:
+        OSError: Если директорию не удалось открыть или она была подменена
+    """
+    if _DIR_FD_SUPPORTED:
+        dir_fd = os.open(dirpath, os.O_RDONLY | os.O_DIRECTORY | getattr(os, 'O_NOFOLLOW', 0))
+        try:
+            if expected is not None and not os.path.samestat(expected, os.fstat(dir_fd)):
+                raise OSError(f'Directory was replaced during removal: {dirpath}')
+            return dir_fd, os.scandir(dir_fd)
+        except BaseException:
+            os.close(dir_fd)
+            raise
+    
+    dir_stat = os.lstat(dirpath)
+    attributes = getattr(dir_stat, 'st_file_attributes', 0)
+    if not stat.S_ISDIR(dir_stat.st_mode) or stat.S_ISLNK(dir_stat.st_mode) or \
+            attributes & FILE_ATTRIBUTE_REPARSE_POINT:
+        raise OSError(f'Directory was replaced during removal: {dirpath}')
+    return None, os.scandir(dirpath)
+
+
+def _clear_directory(dirpath: str, expected: Optional[os.stat_result] = None) -> Tuple[int, int, List[Tuple], bool]:
+    """
+    Удалить файлы одной директории, не спускаясь в поддиректории.
+    
+    Где поддерживается, файлы удаляются относительно дескриптора директории,
+    без повторного разбора полного пути для каждого файла.
+    
+    Args:
+        dirpath: Путь к директории
+        expected: Атрибуты директории из обхода родителя (lstat) или None
+        
+    Returns:
+        Кортеж (удалено файлов, удалено байт, поддиректории с их атрибутами, без ошибок)
+    """
+    files = 0
+    size_bytes = 0
+    subdirs = []
+    ok = True
+    
+    try:
+        dir_fd, iterator = _open_directory(dirpath, expected)
+    except FileNotFoundError:
+        return 0, 0, [], True
+    except (OSError, PermissionError):
+        return 0, 0, [], False
+    
+    try:
+        with iterator as entries:
+            for entry in entries:
+                entry_path = os.path.join(dirpath, entry.name)
+                try:
+                    if _is_link_entry(entry):
+                        if _remove_link(entry_path):
+                            files += 1
+                        else:
+                            ok = False
+                        continue
+                    
+                    entry_stat = entry.stat(follow_symlinks=False)
+                    if stat.S_ISDIR(entry_stat.st_mode):
+                        # На Windows атрибуты записи scandir не содержат st_ino
+                        subdirs.append((entry_path, entry_stat if _DIR_FD_SUPPORTED else None))
+                        continue
+                    
+                    entry_size = entry_stat.st_size
+                except (OSError, PermissionError):
+                    ok = False
+                    continue
+                
+                if _unlink_entry(entry.name, entry_path, dir_fd):
+                    files += 1
+                    size_bytes += entry_size
+                elif os.path.lexists(entry_path):
+                    ok = False
+    except (OSError, PermissionError):
+        ok = False
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+    
+    return files, size_bytes, subdirs, ok
+
+
+def remove_tree(path: str, max_workers: int = REMOVE_TREE_WORKERS) -> Tuple[int, int, bool]:
+    """
+    Удалить дерево директорий, распределяя поддиректории по пулу потоков.
+    
+    Каждая задача пула очищает файлы одной директории и возвращает ее
+    поддиректории, которые сразу ставятся в очередь. После очистки всех
+    файлов директории удаляются снизу вверх. Ссылки на директории
+    (symlink, junction) удаляются без перехода по ним.
+    
+    Args:
+        path: Путь к директории
+        max_workers: Максимальное количество потоков удаления
+        
+    Returns:
+        Кортеж (удалено файлов, удалено байт, дерево удалено полностью)
+    """
+    try:
+        path_stat = os.lstat(path)
+    except FileNotFoundError:
+        return 0, 0, True
+    except (OSError, PermissionError):
+        return 0, 0, False
+    
+    attributes = getattr(path_stat, 'st_file_attributes', 0)
+    if stat.S_ISLNK(path_stat.st_mode) or attributes & FILE_ATTRIBUTE_REPARSE_POINT:
+        return 0, 0, _remove_link(path)
+    
+    if not stat.S_ISDIR(path_stat.st_mode):
+        return 0, 0, False
+    
+    files = 0
+    size_bytes = 0
+    ok = True
+    # Родительская директория всегда попадает в список раньше дочерних
+    directories = [path]
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = {executor.submit(_clear_directory, path, path_stat if _DIR_FD_SUPPORTED else None)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dir_files, dir_bytes, subdirs, dir_ok = future.result()
+                files += dir_files
+                size_bytes += dir_bytes
+                ok = ok and dir_ok
+                for subdir, subdir_stat in subdirs:
+                    directories.append(subdir)
+                    pending.add(executor.submit(_clear_directory, subdir, subdir_stat))
+    
+    for directory in reversed(directories):
+        try:
+            os.rmdir(directory)
+        except FileNotFoundError:
+            continue
+        except PermissionError:
+            try:
+                os.chmod(directory, stat.S_IWRITE | stat.S_IREAD | stat.S_IEXEC)
+                os.rmdir(directory)
+            except (OSError, PermissionError):
+                ok = False
+        except OSError:
+            ok = False
+    
+    return files, size_bytes, ok
+
+
+def remove_path_counted(path: str, max_workers: int = REMOVE_TREE_WORKERS) -> Tuple[int, int]:
+    """
+    Удалить файл или директорию, подсчитав удаленные файлы и байты.
+    
+    Подсчет выполняется во время удаления: размер каждого файла берется
+    из записи каталога перед его удалением.
+    
+    Args:
+        path: Путь к файлу или директории
+        max_workers: Максимальное количество потоков удаления директории
+        
+    Returns:
+        Кортеж (количество удаленных файлов, их суммарный размер в байтах)
+    """
+    try:
+        path_stat = os.lstat(path)
+    except OSError:
+        return 0, 0
+    
+    if stat.S_ISDIR(path_stat.st_mode):
+        files, size_bytes, _ = remove_tree(path, max_workers)
+        return files, size_bytes
+    
+    try:
+        os.remove(path)
+        return 1, path_stat.st_size
+    except (OSError, PermissionError):
+        return 0, 0
+
+
+# Размер блока чтения при хэшировании файлов
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Объем начала файла для предварительного хэша
+PARTIAL_HASH_SIZE = 64 * 1024
+
+
+def hash_file(filepath: str, limit: Optional[int] = None) -> Optional[str]:
+    """
+    Вычислить SHA-256 файла или его начала.
+    
+    Args:
+        filepath: Путь к файлу
+        limit: Количество байт от начала файла (None - весь файл)
+        
+    Returns:
+        Хэш в шестнадцатеричном виде или None при ошибке чтения
+    """
+    digest = hashlib.sha256()
+    remaining = limit
+    try:
+        with open(filepath, 'rb') as f:
+            while remaining is None or remaining > 0:
+                size = HASH_CHUNK_SIZE if remaining is None else min(HASH_CHUNK_SIZE, remaining)
+                chunk = f.read(size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                if remaining is not None:
+                    remaining -= len(chunk)
+    except (OSError, PermissionError):
+        return None
+    
+    return digest.hexdigest()
+
+
+def find_duplicate_files(filepaths: List[str], min_bytes: int = 1) -> List[List[str]]:
+    """
+    Найти файлы с одинаковым содержимым на одном устройстве.
+    
+    Кандидаты группируются по устройству и размеру, затем отсеиваются
+    хэшем начала файла и подтверждаются хэшем всего файла. Пути к одному
+    и тому же inode (уже связанные жесткими ссылками) учитываются один раз.
+    
+    Args:
+        filepaths: Пути к файлам
+        min_bytes: Минимальный размер файла
+        
+    Returns:
+        Группы путей с одинаковым содержимым; первым идет путь к файлу
+        с наибольшим числом жестких ссылок
+    """
+    by_size = {}
+    for filepath in filepaths:
+        try:
+            file_stat = os.stat(filepath, follow_symlinks=False)
+        except OSError:
+            continue
+        if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_size < min_bytes:
+            continue
+        
+        inodes = by_size.setdefault((file_stat.st_dev, file_stat.st_size), {})
+        inodes.setdefault(file_stat.st_ino, (file_stat.st_nlink, filepath))
+    
+    groups = []
+    for (_, size), inodes in by_size.items():
+        if len(inodes) < 2:
+            continue
+        
+        candidates = [filepath for _, filepath in sorted(inodes.values(), key=lambda item: (-item[0], item[1]))]
+        
+        by_partial = {}
+        for filepath in candidates:
+            partial = hash_file(filepath, PARTIAL_HASH_SIZE)
+            if partial is not None:
+                by_partial.setdefault(partial, []).append(filepath)
+        
+        for partial_group in by_partial.values():
+            if len(partial_group) < 2:
+                continue
+            
+            # Файл не длиннее предварительного блока уже захэширован полностью
+            if size <= PARTIAL_HASH_SIZE:
+                groups.append(partial_group)
+                continue
+            
+            by_full = {}
+            for filepath in partial_group:
+                full = hash_file(filepath)
+                if full is not None:
+                    by_full.setdefault(full, []).append(filepath)
+            
+            groups.extend(group for group in by_full.values() if len(group) > 1)
+    
+    return groups
+
+
+def replace_with_hardlink(source: str, target: str) -> bool:
+    """
+    Атомарно заменить файл жесткой ссылкой на другой файл.
+    
+    Ссылка создается под временным именем рядом с заменяемым файлом и
+    переименовывается поверх него, поэтому файл не пропадает ни на миг.
+    
+    Args:
+        source: Путь к сохраняемому файлу
+        target: Путь к заменяемому файлу
+        
+    Returns:
+        True если файл заменен
+    """
+    temp_path = f'{target}.sweeper-link'
+    try:
+        if os.path.getsize(source) != os.path.getsize(target):
+            return False
+        os.link(source, temp_path)
+        os.replace(temp_path, target)
         return True
     except (OSError, PermissionError):
+        safe_remove_file(temp_path)
         return False
 
 
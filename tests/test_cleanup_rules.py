@@ -0,0 +1,105 @@
+"""
+Тесты для модуля cleanup_rules.
+"""
+
+import pytest
+from src.cleanup_rules import RuleMatcher, glob_to_regex, build_rules, DEFAULT_RULES
+
+
+RULES = [
+    {'name': 'logs', 'category': 'logs', 'patterns': ['.metadata/.log', '.metadata/.plugins/**/*.log']},
+    {'name': 'history', 'category': 'history',
+     'patterns': ['.metadata/.plugins/org.eclipse.core.resources/.history']},
+    {'name': 'snapshots', 'category': 'snapshots', 'patterns': ['.metadata/.plugins/*/snapshots']},
+]
+
+
+class TestRuleMatcher:
+    """Тесты класса RuleMatcher."""
+    
+    @pytest.mark.parametrize('rel_path,category', [
+        ('.metadata/.log', 'logs'),
+        ('.metadata/.plugins/a.log', 'logs'),
+        ('.metadata/.plugins/a/b/c.log', 'logs'),
+        ('.metadata/.plugins/org.eclipse.core.resources/.history', 'history'),
+        ('.metadata/.plugins/com.example/snapshots', 'snapshots'),
+        ('.metadata/other.log', None),
+        ('.metadata/.plugins/a/b/snapshots', None),
+    ])
+    def test_match(self, rel_path, category):
+        """Тест определения правила пути."""
+        rule = RuleMatcher(RULES).match(rel_path)
+        assert (rule['category'] if rule else None) == category
+    
+    def test_glob_double_star_matches_zero_dirs(self):
+        """Тест: `**` совпадает и без вложенных директорий."""
+        assert glob_to_regex('a/**/*.log') == 'a/(?:[^/]+/)*[^/]*\\.log'
+    
+    def test_can_contain_matches(self):
+        """Тест отсечения директорий без целей очистки."""
+        matcher = RuleMatcher(RULES)
+        
+        assert matcher.can_contain_matches('.metadata') is True
+        assert matcher.can_contain_matches('.metadata/.plugins/x/y') is True
+        assert matcher.can_contain_matches('.metadata/.projects') is False
+    
+    def test_collect_targets_single_pass(self, tmp_path):
+        """Тест сбора целей: совпавшая директория не обходится внутри."""
+        plugins = tmp_path / ".metadata" / ".plugins"
+        history = plugins / "org.eclipse.core.resources" / ".history"
+        history.mkdir(parents=True)
+        (history / "inner.log").write_text("x")
+        (plugins / "deep" / "dir").mkdir(parents=True)
+        (plugins / "deep" / "dir" / "trace.log").write_text("x")
+        (plugins / "deep" / "settings.prefs").write_text("x")
+        (tmp_path / ".metadata" / ".log").write_text("x")
+        
+        targets = sorted(
+            (path, rule['name']) for path, rule in RuleMatcher(RULES).collect_targets(str(tmp_path))
+        )
+        
+        assert targets == sorted([
+            (str(tmp_path / ".metadata" / ".log"), 'logs'),
+            (str(plugins / "deep" / "dir" / "trace.log"), 'logs'),
+            (str(history), 'history'),
+        ])
+    
+    def test_collect_targets_missing_metadata(self, tmp_path):
+        """Тест обхода workspace без .metadata."""
+        assert RuleMatcher(RULES).collect_targets(str(tmp_path)) == []
+
+
+class TestBuildRules:
+    """Тесты функции build_rules."""
+    
+    def test_default_rules(self):
+        """Тест реестра по умолчанию."""
+        rules, errors = build_rules()
+        
+        assert errors == []
+        assert [rule['name'] for rule in rules] == [rule['name'] for rule in DEFAULT_RULES]
+    
+    def test_extra_and_disabled_rules(self):
+        """Тест добавления правила из конфигурации и отключения правила."""
+        rules, errors = build_rules(
+            [{'name': 'dtDerived', 'category': 'caches', 'patterns': ['.metadata/.plugins/com._1c.g5.v8.dt.*/derived']}],
+            ['localHistory']
+        )
+        names = [rule['name'] for rule in rules]
+        
+        assert errors == []
+        assert 'dtDerived' in names
+        assert 'localHistory' not in names
+    
+    @pytest.mark.parametrize('rule', [
+        {'category': 'caches', 'patterns': ['.metadata/x']},
+        {'name': 'bad', 'category': 'unknown', 'patterns': ['.metadata/x']},
+        {'name': 'bad', 'category': 'caches', 'patterns': ['src/**']},
+        {'name': 'bad', 'category': 'caches', 'patterns': ['.metadata/../src']},
+    ])
+    def test_invalid_rules(self, rule):
+        """Тест отклонения некорректных правил."""
+        rules, errors = build_rules([rule])
+        
+        assert len(errors) == 1
+        assert len(rules) == len(DEFAULT_RULES)
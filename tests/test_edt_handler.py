@@ -2,6 +2,9 @@
 Тесты для модуля edt_handler.
 """
 
+import os
+import time
+import zipfile
 import pytest
 from unittest.mock import Mock, patch
 from src.edt_handler import EdtHandler
@@ -108,6 +111,389 @@ class TestEdtHandler:
         assert 'historyCleared' in stats
         assert 'snapshotsCleared' in stats
         assert 'cachesCleared' in stats
+        assert stats['logsCleared'] == 1
+        assert stats['logsBytes'] == len("log content")
+        assert not log_file.exists()
+    
+    def test_clean_workspace_counts_history_bytes(self, tmp_path):
+        """Тест подсчета файлов и байт удаленной истории."""
+        ws_path = tmp_path / "workspace"
+        history = ws_path / ".metadata" / ".plugins" / "org.eclipse.core.resources" / ".history"
+        (history / "1a").mkdir(parents=True)
+        (history / "1a" / "entry1").write_bytes(b"a" * 50)
+        (history / "1a" / "entry2").write_bytes(b"b" * 70)
+        
+        handler = EdtHandler({})
+        stats = handler.clean_workspace(str(ws_path))
+        
+        assert stats['historyCleared'] == 2
+        assert stats['historyBytes'] == 120
+        assert not history.exists()
+    
+    def test_process_workspace_accounts_freed_bytes(self, tmp_path):
+        """Тест расчета освобожденного места без повторного обхода workspace."""
+        ws_path = tmp_path / "workspace"
+        metadata = ws_path / ".metadata"
+        metadata.mkdir(parents=True)
+        (metadata / ".log").write_bytes(b"x" * 1024)
+        
+        handler = EdtHandler({'sizeThresholdGB': 0})
+        
+        with patch('src.edt_handler.get_size_gb', return_value=1.0) as size_mock:
+            result = handler.process_workspace(str(ws_path))
+        
+        assert result['status'] == 'success'
+        assert result['bytesFreed'] == 1024
+        assert result['filesDeleted'] == 1
+        assert result['sizeAfter'] == round(1.0 - result['spaceSaved'], 2)
+        assert size_mock.call_count == 1
+    
+    def test_process_workspace_rule_stats(self, tmp_path):
+        """Тест статистики по правилам, включая правило из конфигурации."""
+        ws_path = tmp_path / "workspace"
+        derived = ws_path / ".metadata" / ".plugins" / "com._1c.g5.v8.dt.core" / "derived"
+        derived.mkdir(parents=True)
+        (derived / "data.bin").write_bytes(b"d" * 32)
+        (ws_path / ".metadata" / ".log").write_bytes(b"l" * 8)
+        
+        handler = EdtHandler({
+            'sizeThresholdGB': 0,
+            'extraRules': [{
+                'name': 'dtDerived',
+                'category': 'caches',
+                'patterns': ['.metadata/.plugins/com._1c.g5.v8.dt.*/derived'],
+            }],
+            'disabledRules': ['workspaceLog'],
+        })
+        
+        result = handler.process_workspace(str(ws_path))
+        
+        assert result['rules']['dtDerived']['filesRemoved'] == 1
+        assert result['rules']['dtDerived']['bytesFreed'] == 32
+        assert result['rules']['dtDerived']['seconds'] >= 0
+        assert 'workspaceLog' not in result['rules']
+        assert (ws_path / ".metadata" / ".log").exists()
+        assert result['details']['cachesBytes'] == 32
+    
+    def test_clean_workspace_history_retention(self, tmp_path):
+        """Тест хранения локальной истории: удаляются только старые записи."""
+        ws_path = tmp_path / "workspace"
+        history = ws_path / ".metadata" / ".plugins" / "org.eclipse.core.resources" / ".history"
+        old_bucket = history / "0a"
+        young_bucket = history / "1b"
+        old_bucket.mkdir(parents=True)
+        young_bucket.mkdir()
+        old_time = time.time() - 30 * 86400
+        
+        (old_bucket / "old1").write_bytes(b"o" * 10)
+        (old_bucket / "old2").write_bytes(b"o" * 20)
+        (young_bucket / "stale").write_bytes(b"s" * 5)
+        (young_bucket / "fresh").write_bytes(b"f" * 7)
+        for path in (old_bucket / "old1", old_bucket / "old2", young_bucket / "stale", old_bucket):
+            os.utime(path, (old_time, old_time))
+        
+        handler = EdtHandler({'historyRetentionDays': 7})
+        stats = handler.clean_workspace(str(ws_path))
+        
+        assert stats['historyCleared'] == 3
+        assert stats['historyBytes'] == 35
+        assert not old_bucket.exists()
+        assert not (young_bucket / "stale").exists()
+        assert (young_bucket / "fresh").exists()
+        assert history.exists()
+    
+    def test_history_retention_skips_young_buckets(self, tmp_path):
+        """Тест пропуска корзин без устаревших записей по индексу самых старых записей."""
+        ws_path = tmp_path / "workspace"
+        history = ws_path / ".metadata" / ".plugins" / "org.eclipse.core.resources" / ".history"
+        bucket = history / "3c"
+        bucket.mkdir(parents=True)
+        now = time.time()
+        (bucket / "stale").write_bytes(b"s" * 5)
+        (bucket / "recent").write_bytes(b"r" * 7)
+        os.utime(bucket / "stale", (now - 30 * 86400, now - 30 * 86400))
+        os.utime(bucket / "recent", (now - 3 * 86400, now - 3 * 86400))
+        
+        handler = EdtHandler({'historyRetentionDays': 7})
+        stats = handler.clean_workspace(str(ws_path))
+        
+        assert stats['historyCleared'] == 1
+        assert handler.load_history_index(str(ws_path)) == {'3c': pytest.approx(now - 3 * 86400)}
+        
+        # Корзина молодая после удаления записи, но ее файлы больше не проверяются
+        (bucket / "added").write_bytes(b"a")
+        os.utime(bucket / "added", (now - 30 * 86400, now - 30 * 86400))
+        stats = handler.clean_workspace(str(ws_path))
+        
+        assert stats['historyCleared'] == 0
+        assert (bucket / "added").exists()
+        
+        # Когда самая старая запись устаревает, корзина проверяется снова
+        handler.config['historyRetentionDays'] = 2
+        stats = handler.clean_workspace(str(ws_path))
+        
+        assert stats['historyCleared'] == 2
+        assert os.listdir(bucket) == []
+        assert handler.load_history_index(str(ws_path)) == {}
+    
+    def test_archive_and_restore_history(self, tmp_path):
+        """Тест архивации старой истории и восстановления записи из архива."""
+        ws_path = tmp_path / "workspace"
+        history = ws_path / ".metadata" / ".plugins" / "org.eclipse.core.resources" / ".history"
+        bucket = history / "2c"
+        bucket.mkdir(parents=True)
+        old_time = time.time() - 30 * 86400
+        (bucket / "old").write_bytes(b"old history entry " * 100)
+        (bucket / "fresh").write_bytes(b"fresh")
+        os.utime(bucket / "old", (old_time, old_time))
+        
+        handler = EdtHandler({'historyArchive': True, 'historyRetentionDays': 7})
+        stats = handler.clean_workspace(str(ws_path))
+        archive_path = handler.get_history_archive_path(str(ws_path))
+        
+        assert stats['historyArchived'] == 1
+        assert stats['historyCleared'] == 1
+        assert not (bucket / "old").exists()
+        assert (bucket / "fresh").exists()
+        assert os.path.isfile(archive_path)
+        
+        # Повторная архивация того же имени не дублирует запись
+        (bucket / "old").write_bytes(b"old history entry " * 100)
+        os.utime(bucket / "old", (old_time, old_time))
+        handler.clean_workspace(str(ws_path))
+        with zipfile.ZipFile(archive_path) as archive:
+            assert archive.namelist() == ['2c/old']
+            # Deflate поддерживается Проводником Windows и стандартными архиваторами
+            assert archive.getinfo('2c/old').compress_type == zipfile.ZIP_DEFLATED
+        
+        restored = handler.restore_history(str(ws_path), ['2c/old'])
+        
+        assert restored == 1
+        assert (bucket / "old").read_bytes() == b"old history entry " * 100
+    
+    def test_archive_history_failure_keeps_archive(self, tmp_path):
+        """Тест: прерванное дописывание не повреждает архив и не удаляет записи."""
+        ws_path = tmp_path / "workspace"
+        history = ws_path / ".metadata" / ".plugins" / "org.eclipse.core.resources" / ".history"
+        bucket = history / "2c"
+        bucket.mkdir(parents=True)
+        old_time = time.time() - 30 * 86400
+        (bucket / "first").write_bytes(b"first entry")
+        os.utime(bucket / "first", (old_time, old_time))
+        
+        handler = EdtHandler({'historyArchive': True, 'historyRetentionDays': 7})
+        handler.clean_workspace(str(ws_path))
+        archive_path = handler.get_history_archive_path(str(ws_path))
+        with open(archive_path, 'rb') as f:
+            archive_before = f.read()
+        
+        (bucket / "second").write_bytes(b"second entry")
+        os.utime(bucket / "second", (old_time, old_time))
+        with patch('src.edt_handler.os.replace', side_effect=OSError('disk full')):
+            assert handler.archive_history(str(ws_path), str(history), 7) == (0, 0)
+        
+        with open(archive_path, 'rb') as f:
+            assert f.read() == archive_before
+        with zipfile.ZipFile(archive_path) as archive:
+            assert archive.namelist() == ['2c/first']
+        assert (bucket / "second").exists()
+        assert not os.path.exists(archive_path + '.tmp')
+    
+    def test_process_workspace_metadata_scope(self, tmp_path):
+        """Тест оценки порога только по размеру .metadata."""
+        ws_path = tmp_path / "workspace"
+        (ws_path / ".metadata").mkdir(parents=True)
+        
+        handler = EdtHandler({'sizeThresholdGB': 5, 'sizeScope': 'metadata', 'reportWorkspaceSize': True})
+        
+        sizes = {str(ws_path / ".metadata"): 0.5, str(ws_path): 40.0}
+        with patch('src.edt_handler.get_size_gb', side_effect=lambda path: sizes[path]):
+            result = handler.process_workspace(str(ws_path))
+        
+        assert result['status'] == 'skipped'
+        assert result['sizeScope'] == 'metadata'
+        assert result['sizeBefore'] == 0.5
+        assert result['workspaceSize'] == 40.0
+    
+    def test_process_workspace_metadata_scope_without_full_size(self, tmp_path):
+        """Тест: полный размер workspace не вычисляется без запроса."""
+        ws_path = tmp_path / "workspace"
+        (ws_path / ".metadata").mkdir(parents=True)
+        
+        handler = EdtHandler({'sizeThresholdGB': 5, 'sizeScope': 'metadata'})
+        
+        with patch('src.edt_handler.get_size_gb', return_value=0.1) as size_mock:
+            result = handler.process_workspace(str(ws_path))
+        
+        size_mock.assert_called_once_with(str(ws_path / ".metadata"))
+        assert 'workspaceSize' not in result
+    
+    def make_location_file(self, path, location):
+        """Записать файл .location в формате Eclipse."""
+        uri = ('URI//' + location.as_uri()).encode('utf-8')
+        path.write_bytes(b'\x00' * 16 + len(uri).to_bytes(2, 'big') + uri + b'\x00' * 16)
+    
+    def test_remove_orphaned_projects(self, tmp_path):
+        """Тест удаления метаданных проектов, удаленных из workspace."""
+        ws_path = tmp_path / "workspace"
+        plugins = ws_path / ".metadata" / ".plugins"
+        projects = plugins / "org.eclipse.core.resources" / ".projects"
+        for name in ("Live", "External", "Gone", "Moved", "Offline", ".org.eclipse.jdt.core.external.folders"):
+            (projects / name).mkdir(parents=True)
+            (projects / name / "state.dat").write_bytes(b"s" * 100)
+        (plugins / "com._1c.g5.v8.dt.core" / "Gone").mkdir(parents=True)
+        (plugins / "com._1c.g5.v8.dt.core" / "Gone" / "cache.bin").write_bytes(b"c" * 50)
+        (plugins / "org.example.other" / "Gone").mkdir(parents=True)
+        (plugins / "org.example.other" / "Gone" / "data.bin").write_bytes(b"o" * 10)
+        (plugins / "com.e1c.g5.dt.core" / "Offline").mkdir(parents=True)
+        
+        (ws_path / "live-dir").mkdir()
+        (ws_path / "live-dir" / ".project").write_text(
+            '<?xml version="1.0"?><projectDescription><name>Live</name></projectDescription>'
+        )
+        external = tmp_path / "external"
+        external.mkdir()
+        (external / ".project").write_text('<projectDescription><name>External</name></projectDescription>')
+        self.make_location_file(projects / "External" / ".location", external)
+        self.make_location_file(projects / "Moved" / ".location", tmp_path / "missing")
+        # Недоступный диск: нет даже родительской директории проекта
+        self.make_location_file(projects / "Offline" / ".location", tmp_path / "unmounted" / "repos" / "Offline")
+        
+        location_size = (projects / "Moved" / ".location").stat().st_size
+        
+        handler = EdtHandler({'removeOrphanedProjects': True})
+        orphans, _ = handler.find_orphaned_metadata(str(ws_path))
+        stats = handler.clean_workspace(str(ws_path))
+        
+        assert orphans == ['Gone', 'Moved']
+        assert stats['orphanedProjects'] == ['Gone', 'Moved']
+        assert stats['orphansBytes'] == 250 + location_size
+        assert (projects / "Live").exists()
+        assert (projects / "External").exists()
+        assert (projects / ".org.eclipse.jdt.core.external.folders").exists()
+        assert not (projects / "Gone").exists()
+        assert not (plugins / "com._1c.g5.v8.dt.core" / "Gone").exists()
+        assert (projects / "Offline").exists()
+        assert (plugins / "com.e1c.g5.dt.core" / "Offline").exists()
+        assert (plugins / "org.example.other" / "Gone" / "data.bin").exists()
+        assert stats['rules']['orphanedProjects']['filesRemoved'] == 4
+    
+    def test_dedup_pools_across_workspaces(self, tmp_path):
+        """Тест дедупликации bundle pool между workspaces."""
+        content = os.urandom(8192)
+        pools = []
+        for name in ("ws1", "ws2"):
+            pool = tmp_path / name / ".metadata" / ".plugins" / "org.eclipse.pde.core" / ".bundle_pool" / "plugins"
+            pool.mkdir(parents=True)
+            (pool / "bundle.jar").write_bytes(content)
+            pools.append(pool)
+        
+        handler = EdtHandler({
+            'workspaces': [str(tmp_path / "ws1"), str(tmp_path / "ws2")],
+            'sizeThresholdGB': 0,
+            'dedupPools': True,
+        }, silent=True)
+        
+        results = handler.process_all()
+        
+        assert 'bundlePool' not in results[0]['rules']
+        assert os.path.samefile(pools[0] / "bundle.jar", pools[1] / "bundle.jar")
+        linked = sum(result['details']['dedupLinked'] for result in results)
+        saved = sum(result['details']['dedupBytes'] for result in results)
+        assert linked == 1
+        assert saved == 8192
+        assert sum(result['bytesFreed'] for result in results) == 8192
+    
+    def test_cache_telemetry_records_regrowth(self, tmp_path):
+        """Тест замера восстановления кэша между удалениями."""
+        ws_path = tmp_path / "workspace"
+        jdt = ws_path / ".metadata" / ".plugins" / "org.eclipse.jdt.core"
+        jdt.mkdir(parents=True)
+        handler = EdtHandler({'cacheTelemetry': True})
+        
+        (jdt / "1.index").write_bytes(b"i" * 100)
+        first = handler.clean_workspace(str(ws_path))
+        (jdt / "1.index").write_bytes(b"i" * 90)
+        second = handler.clean_workspace(str(ws_path))
+        
+        assert first['cacheTelemetry']['jdtIndex']['action'] == 'deleted'
+        assert first['cacheTelemetry']['jdtIndex']['sampledBytes'] == 100
+        assert second['cacheTelemetry']['jdtIndex']['regrowthRatio'] == 0.9
+        assert os.path.isfile(handler.get_telemetry_path(str(ws_path)))
+    
+    def test_cache_telemetry_skips_fast_regrowing_cache(self, tmp_path):
+        """Тест: кэш, быстро восстанавливающийся после удаления, не удаляется."""
+        ws_path = tmp_path / "workspace"
+        jdt = ws_path / ".metadata" / ".plugins" / "org.eclipse.jdt.core"
+        jdt.mkdir(parents=True)
+        (jdt / "1.index").write_bytes(b"i" * 100)
+        handler = EdtHandler({'cacheTelemetry': True, 'cacheRegrowthRatio': 0.8, 'cacheRegrowthDays': 7})
+        handler.save_telemetry(str(ws_path), {
+            'jdtIndex': {
+                'lastDeleted': {'at': int(time.time()) - 86400, 'bytes': 100},
+                'regrowthRatio': 0.95,
+                'regrowthDays': 1.0,
+            }
+        })
+        
+        stats = handler.clean_workspace(str(ws_path))
+        
+        assert (jdt / "1.index").exists()
+        assert stats['cacheTelemetry']['jdtIndex']['action'] == 'skipped'
+        assert stats['cacheTelemetry']['jdtIndex']['sampledBytes'] == 100
+    
+    def test_should_skip_cache_after_skip_period(self):
+        """Тест: по истечении cacheSkipDays кэш удаляется для нового замера."""
+        handler = EdtHandler({'cacheSkipDays': 30})
+        now = time.time()
+        entry = {'lastDeleted': {'at': now - 40 * 86400, 'bytes': 100}, 'regrowthRatio': 1.0, 'regrowthDays': 1}
+        
+        assert handler.should_skip_cache(entry, now) is False
+        assert handler.should_skip_cache(None, now) is False
+    
+    def test_process_all_deferred_delete(self, tmp_path):
+        """Тест отложенного удаления: учет файлов после фоновой очистки."""
+        ws_path = tmp_path / "workspace"
+        history = ws_path / ".metadata" / ".plugins" / "org.eclipse.core.resources" / ".history"
+        history.mkdir(parents=True)
+        (history / "entry").write_bytes(b"h" * 64)
+        
+        handler = EdtHandler({
+            'workspaces': [str(ws_path)],
+            'sizeThresholdGB': 0,
+            'deferredDelete': True,
+        }, silent=True)
+        
+        results = handler.process_all()
+        
+        assert not history.exists()
+        assert results[0]['details']['targetsStaged'] == 1
+        assert results[0]['details']['historyCleared'] == 1
+        assert results[0]['details']['historyBytes'] == 64
+        assert results[0]['rules']['localHistory']['bytesFreed'] == 64
+        assert results[0]['filesDeleted'] == 1
+        assert 'clear_history' in results[0]['actions']
+    
+    def test_process_all_purges_leftovers_of_skipped_workspace(self, tmp_path):
+        """Тест удаления остатков корзины рядом с workspace ниже порога."""
+        ws_path = tmp_path / "workspace"
+        (ws_path / ".metadata").mkdir(parents=True)
+        leftover = tmp_path / ".1c-sweeper-trash" / "leftover"
+        
+        # Остатки удаляются и после отключения deferredDelete
+        for deferred in (True, False):
+            leftover.mkdir(parents=True)
+            (leftover / "file").write_bytes(b"x" * 16)
+            handler = EdtHandler({
+                'workspaces': [str(ws_path)],
+                'sizeThresholdGB': 5,
+                'deferredDelete': deferred,
+            }, silent=True)
+            
+            results = handler.process_all()
+            
+            assert results[0]['status'] == 'skipped'
+            assert not leftover.exists()
     
     def test_process_workspace_not_a_workspace(self, tmp_path):
         """Тест обработки не-workspace."""
@@ -2,6 +2,11 @@
 Тесты для модуля git_handler.
 """
 
+import os
+import time
+import hashlib
+import shutil
+import subprocess
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from src.git_handler import GitHandler
@@ -108,3 +113,690 @@ class TestGitHandler:
         assert result['status'] == 'skipped'
         assert 'below threshold' in result['errors'][0]
 
+    
+    @patch('subprocess.run')
+    def test_optimize_repository(self, mock_run):
+        """Тест записи commit-graph, multi-pack-index и bitmap."""
+        mock_run.return_value = Mock(returncode=0, stdout='', stderr='')
+        
+        handler = GitHandler({'repos': []})
+        stats = handler.optimize_repository('C:\\Dev\\Repo')
+        
+        assert stats['commitGraph'] is True
+        assert stats['multiPackIndex'] is True
+        assert stats['bitmaps'] is True
+        assert stats['errors'] == []
+        
+        commands = [call.args[0] for call in mock_run.call_args_list]
+        assert ['git', 'commit-graph', 'write', '--reachable', '--split', '--changed-paths'] in commands
+        assert ['git', 'multi-pack-index', 'write', '--bitmap'] in commands
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_process_repository_keeps_split_commit_graph(self, tmp_path):
+        """Тест сохранения цепочки split commit-graph при повторной обработке."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com']
+        subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+        handler = GitHandler({'repos': [], 'sizeThresholdGB': 0, 'binaryDeltaPolicy': 'off'})
+        info = tmp_path / ".git" / "objects" / "info"
+        
+        for name in ('first', 'second'):
+            (tmp_path / name).write_text(name)
+            subprocess.run(git + ['add', '.'], cwd=tmp_path, check=True)
+            subprocess.run(git + ['commit', '-q', '-m', name], cwd=tmp_path, check=True)
+            
+            result = handler.process_repository(str(tmp_path))
+            
+            assert 'gc' in result['actions']
+            assert result['optimization']['commitGraph'] is True
+            assert (info / "commit-graphs" / "commit-graph-chain").is_file()
+            assert not (info / "commit-graph").exists()
+    
+    @patch('subprocess.run')
+    def test_optimize_repository_without_midx_bitmap(self, mock_run):
+        """Тест записи multi-pack-index без bitmap на старых версиях git."""
+        def run(args, **kwargs):
+            if '--bitmap' in args:
+                return Mock(returncode=129, stdout='', stderr='unknown option')
+            return Mock(returncode=0, stdout='', stderr='')
+        
+        mock_run.side_effect = run
+        
+        handler = GitHandler({'repos': []})
+        stats = handler.optimize_repository('C:\\Dev\\Repo')
+        
+        assert stats['multiPackIndex'] is True
+        assert stats['bitmaps'] is False
+    
+    @patch('subprocess.run')
+    def test_measure_git_timings(self, mock_run):
+        """Тест замера времени выполнения команд git."""
+        mock_run.side_effect = [
+            Mock(returncode=0, stdout='10\n'),
+            Mock(returncode=128, stdout=''),
+            Mock(returncode=0, stdout='100\n'),
+        ]
+        
+        handler = GitHandler({'repos': []})
+        timings = handler.measure_git_timings('C:\\Dev\\Repo')
+        
+        assert set(timings) == set(GitHandler.BENCHMARK_COMMANDS)
+        assert isinstance(timings['revList'], float)
+        assert timings['log'] is None
+    
+    def test_count_index_entries(self, tmp_path):
+        """Тест чтения количества записей из заголовка индекса."""
+        git_dir = tmp_path / ".git"
+        git_dir.mkdir()
+        (git_dir / "index").write_bytes(b'DIRC' + (2).to_bytes(4, 'big') + (30000).to_bytes(4, 'big'))
+        
+        handler = GitHandler({'repos': []})
+        
+        assert handler.count_index_entries(str(tmp_path)) == 30000
+    
+    def test_count_index_entries_no_index(self, tmp_path):
+        """Тест чтения индекса при его отсутствии."""
+        (tmp_path / ".git").mkdir()
+        
+        handler = GitHandler({'repos': []})
+        
+        assert handler.count_index_entries(str(tmp_path)) == 0
+    
+    @patch('subprocess.run')
+    def test_tune_index_below_threshold(self, mock_run, tmp_path):
+        """Тест пропуска настройки индекса для небольшого рабочего дерева."""
+        (tmp_path / ".git").mkdir()
+        
+        handler = GitHandler({'repos': [], 'manyFilesThreshold': 20000})
+        stats = handler.tune_index(str(tmp_path))
+        
+        assert stats['applied'] == []
+        mock_run.assert_not_called()
+    
+    @patch('subprocess.run')
+    def test_tune_index_applies_settings(self, mock_run, tmp_path):
+        """Тест применения настроек индекса для большого рабочего дерева."""
+        git_dir = tmp_path / ".git"
+        git_dir.mkdir()
+        (git_dir / "index").write_bytes(b'DIRC' + (2).to_bytes(4, 'big') + (50000).to_bytes(4, 'big'))
+        mock_run.return_value = Mock(returncode=0, stdout='', stderr='')
+        
+        handler = GitHandler({'repos': [], 'manyFilesThreshold': 20000})
+        with patch.object(handler, 'is_fsmonitor_supported', return_value=False):
+            stats = handler.tune_index(str(tmp_path))
+        
+        assert stats['indexEntries'] == 50000
+        assert stats['applied'] == ['index.version', 'core.untrackedCache']
+        assert stats['statusMsBefore'] is not None
+        assert stats['statusMsAfter'] is not None
+        # Split index несовместим с JGit и по умолчанию не включается
+        commands = [call.args[0] for call in mock_run.call_args_list]
+        assert ['git', 'update-index', '--index-version', '4', '--untracked-cache'] in commands
+        assert not any('--split-index' in command for command in commands)
+    
+    @patch('subprocess.run')
+    def test_tune_index_split_index_opt_in(self, mock_run, tmp_path):
+        """Тест явного включения split index."""
+        git_dir = tmp_path / ".git"
+        git_dir.mkdir()
+        (git_dir / "index").write_bytes(b'DIRC' + (2).to_bytes(4, 'big') + (50000).to_bytes(4, 'big'))
+        mock_run.return_value = Mock(returncode=0, stdout='', stderr='')
+        
+        handler = GitHandler({'repos': [], 'manyFilesThreshold': 20000, 'splitIndex': True})
+        with patch.object(handler, 'is_fsmonitor_supported', return_value=False):
+            stats = handler.tune_index(str(tmp_path))
+        
+        assert stats['applied'] == ['index.version', 'core.splitIndex', 'core.untrackedCache']
+        commands = [call.args[0] for call in mock_run.call_args_list]
+        assert ['git', 'update-index', '--index-version', '4', '--untracked-cache', '--split-index'] in commands
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_take_over_and_restore_auto_gc(self, tmp_path):
+        """Тест отключения автоматического gc и восстановления исходных настроек."""
+        subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+        subprocess.run(['git', 'config', 'gc.auto', '1000'], cwd=tmp_path, check=True)
+        
+        handler = GitHandler({'repos': []})
+        
+        assert handler.take_over_auto_gc(str(tmp_path)) is True
+        assert handler.get_local_config(str(tmp_path), 'gc.auto') == '0'
+        assert handler.get_local_config(str(tmp_path), 'maintenance.auto') == 'false'
+        # Повторное отключение не перезаписывает сохраненные значения
+        assert handler.take_over_auto_gc(str(tmp_path)) is False
+        
+        assert handler.restore_auto_gc(str(tmp_path)) is True
+        assert handler.get_local_config(str(tmp_path), 'gc.auto') == '1000'
+        assert handler.get_local_config(str(tmp_path), 'maintenance.auto') is None
+        assert handler.get_local_config(str(tmp_path), 'sweeper.autoGcTakeover') is None
+        assert handler.restore_auto_gc(str(tmp_path)) is False
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_take_over_auto_gc_partial_failure(self, tmp_path):
+        """Тест сохранения исходного gc.auto после прерванного отключения."""
+        subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+        subprocess.run(['git', 'config', 'gc.auto', '1000'], cwd=tmp_path, check=True)
+        
+        handler = GitHandler({'repos': []})
+        run_git = handler.run_git
+        
+        def failing_run_git(repo_path, args, timeout=300):
+            if args[-2:] == ['maintenance.auto', 'false']:
+                return Mock(returncode=1, stdout='', stderr='error')
+            return run_git(repo_path, args, timeout)
+        
+        with patch.object(handler, 'run_git', side_effect=failing_run_git):
+            assert handler.take_over_auto_gc(str(tmp_path)) is False
+        
+        # Измененные параметры возвращены к исходным значениям
+        assert handler.get_local_config(str(tmp_path), 'gc.auto') == '1000'
+        assert handler.get_local_config(str(tmp_path), 'sweeper.gc.auto') is None
+        
+        # Сохраненное значение от прерванного запуска не перезаписывается
+        subprocess.run(['git', 'config', 'sweeper.gc.auto', '1000'], cwd=tmp_path, check=True)
+        subprocess.run(['git', 'config', 'gc.auto', '0'], cwd=tmp_path, check=True)
+        assert handler.take_over_auto_gc(str(tmp_path)) is True
+        assert handler.restore_auto_gc(str(tmp_path)) is True
+        assert handler.get_local_config(str(tmp_path), 'gc.auto') == '1000'
+    
+    def test_check_pack_checksum(self, tmp_path):
+        """Тест проверки контрольной суммы в конце pack-файла."""
+        content = b'PACK' + b'\x00' * 1000
+        pack_file = tmp_path / "pack-test.pack"
+        pack_file.write_bytes(content + hashlib.sha1(content).digest())
+        
+        handler = GitHandler({'repos': []})
+        
+        assert handler.check_pack_checksum(str(pack_file)) is True
+        
+        # Портим содержимое
+        pack_file.write_bytes(b'PACK' + b'\x01' * 1000 + hashlib.sha1(content).digest())
+        assert handler.check_pack_checksum(str(pack_file)) is False
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_verify_repository(self, tmp_path):
+        """Тест проверки целостности репозитория после gc."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com']
+        subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+        (tmp_path / "file.txt").write_text("content")
+        subprocess.run(git + ['add', '.'], cwd=tmp_path, check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=tmp_path, check=True)
+        subprocess.run(['git', 'gc', '-q'], cwd=tmp_path, check=True)
+        
+        handler = GitHandler({'repos': []})
+        stats = handler.verify_repository(str(tmp_path))
+        
+        assert stats['status'] == 'ok'
+        assert stats['filesChecked'] >= 2
+        assert stats['corruptFiles'] == []
+        assert stats['connectivity'] == 'ok'
+    
+    def test_find_and_remove_stale_files(self, tmp_path):
+        """Тест поиска и удаления временных файлов и блокировок."""
+        git_dir = tmp_path / ".git"
+        (git_dir / "objects" / "pack").mkdir(parents=True)
+        (git_dir / "objects" / "ab").mkdir()
+        (git_dir / "refs" / "heads").mkdir(parents=True)
+        (git_dir / "lfs").mkdir()
+        
+        old = time.time() - 48 * 3600
+        stale = {
+            git_dir / "objects" / "pack" / "tmp_pack_abc": b'0' * 100,
+            git_dir / "gc.pid": b'123 host',
+            git_dir / "refs" / "heads" / "main.lock": b'0' * 40,
+        }
+        for path, content in stale.items():
+            path.write_bytes(content)
+            os.utime(path, (old, old))
+        
+        fresh = git_dir / "objects" / "ab" / "tmp_obj_xyz"
+        fresh.write_bytes(b'0' * 10)
+        ignored = git_dir / "lfs" / "tmp_pack_lfs"
+        ignored.write_bytes(b'0')
+        os.utime(ignored, (old, old))
+        
+        handler = GitHandler({'repos': [], 'staleTempHours': 24})
+        found = handler.find_stale_files(str(tmp_path))
+        
+        categories = {item['category']: item['stale'] for item in found}
+        assert categories == {'tmpPack': True, 'gcState': True, 'locks': True, 'tmpObj': False}
+        
+        removed = handler.remove_stale_files(found)
+        
+        assert removed == {
+            'tmpPack': {'files': 1, 'bytes': 100},
+            'gcState': {'files': 1, 'bytes': 8},
+            'locks': {'files': 1, 'bytes': 40},
+        }
+        assert all(not path.exists() for path in stale)
+        assert fresh.exists()
+        assert ignored.exists()
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_prune_history(self, tmp_path):
+        """Тест очистки reflog и кэша rerere."""
+        env = dict(os.environ, GIT_COMMITTER_DATE='2020-01-01T00:00:00', GIT_AUTHOR_DATE='2020-01-01T00:00:00')
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com']
+        subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+        (tmp_path / "file.txt").write_text("first")
+        subprocess.run(git + ['add', '.'], cwd=tmp_path, check=True, env=env)
+        subprocess.run(git + ['commit', '-q', '-m', 'first'], cwd=tmp_path, check=True, env=env)
+        (tmp_path / "file.txt").write_bytes(os.urandom(4096))
+        subprocess.run(git + ['commit', '-q', '-am', 'second'], cwd=tmp_path, check=True, env=env)
+        # Второй коммит остается достижимым только из reflog
+        subprocess.run(git + ['reset', '-q', '--hard', 'HEAD~1'], cwd=tmp_path, check=True, env=env)
+        
+        rr_cache = tmp_path / ".git" / "rr-cache" / "abc"
+        rr_cache.mkdir(parents=True)
+        (rr_cache / "preimage").write_bytes(b'0' * 64)
+        
+        handler = GitHandler({'repos': [], 'reflogExpireDays': 30, 'clearRerereCache': True})
+        stats = handler.prune_history(str(tmp_path))
+        
+        assert stats['errors'] == []
+        assert stats['reflogExpired'] is True
+        assert stats['reflogFreedBytes'] is None or stats['reflogFreedBytes'] > 0
+        assert stats['rerereCacheBytes'] == 64
+        assert not (tmp_path / ".git" / "rr-cache").exists()
+    
+    @patch('subprocess.run')
+    def test_prune_history_disabled_reflog(self, mock_run, tmp_path):
+        """Тест пропуска очистки reflog по умолчанию."""
+        mock_run.return_value = Mock(returncode=0, stdout='', stderr='')
+        
+        handler = GitHandler({'repos': []})
+        stats = handler.prune_history(str(tmp_path))
+        
+        assert stats['reflogExpired'] is False
+        commands = [call.args[0] for call in mock_run.call_args_list]
+        assert commands == [
+            ['git', 'config', '--get', 'gc.worktreePruneExpire'],
+            ['git', 'worktree', 'prune', '--verbose', '--expire=3.months.ago'],
+        ]
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_prune_history_keeps_recent_worktree(self, tmp_path):
+        """Тест сохранения недавно отключенного worktree до истечения gc.worktreePruneExpire."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com']
+        repo = tmp_path / "repo"
+        subprocess.run(['git', 'init', '-q', str(repo)], check=True)
+        (repo / "file.txt").write_text("content")
+        subprocess.run(git + ['add', '.'], cwd=repo, check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=repo, check=True)
+        subprocess.run(['git', 'worktree', 'add', '-q', str(tmp_path / "feature")], cwd=repo, check=True)
+        (tmp_path / "feature").rename(tmp_path / "moved")
+        
+        handler = GitHandler({'repos': []})
+        stats = handler.prune_history(str(repo))
+        
+        assert stats['worktreesPruned'] == 0
+        assert (repo / ".git" / "worktrees" / "feature").is_dir()
+        
+        subprocess.run(['git', 'config', 'gc.worktreePruneExpire', 'now'], cwd=repo, check=True)
+        stats = handler.prune_history(str(repo))
+        
+        assert stats['worktreesPruned'] == 1
+        assert not (repo / ".git" / "worktrees" / "feature").exists()
+    
+    def test_count_refs(self, tmp_path):
+        """Тест подсчета loose и packed ссылок."""
+        git_dir = tmp_path / ".git"
+        heads = git_dir / "refs" / "heads" / "feature"
+        heads.mkdir(parents=True)
+        (git_dir / "refs" / "tags").mkdir()
+        (git_dir / "refs" / "heads" / "main").write_text('0' * 40)
+        (heads / "one").write_text('0' * 40)
+        (heads / "two.lock").write_text('0' * 40)
+        (git_dir / "packed-refs").write_text(
+            '# pack-refs with: peeled fully-peeled sorted\n'
+            + '0' * 40 + ' refs/tags/v1\n'
+            + '^' + '1' * 40 + '\n'
+            + '2' * 40 + ' refs/heads/old\n'
+        )
+        
+        handler = GitHandler({'repos': []})
+        
+        assert handler.count_refs(str(tmp_path)) == (2, 2)
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_pack_refs(self, tmp_path):
+        """Тест упаковки ссылок при превышении порога."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com']
+        subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+        (tmp_path / "file.txt").write_text("content")
+        subprocess.run(git + ['add', '.'], cwd=tmp_path, check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=tmp_path, check=True)
+        for i in range(5):
+            subprocess.run(['git', 'tag', f'v{i}'], cwd=tmp_path, check=True)
+        
+        handler = GitHandler({'repos': [], 'packRefsThreshold': 3})
+        stats = handler.pack_refs(str(tmp_path))
+        
+        assert stats['refsPacked'] is True
+        assert stats['looseBefore'] >= 6
+        assert stats['looseAfter'] == 0
+        assert stats['packed'] == stats['looseBefore']
+        assert stats['lookupMsBefore'] is not None
+        assert stats['lookupMsAfter'] is not None
+    
+    @patch('subprocess.run')
+    def test_prune_lfs_without_lfs(self, mock_run, tmp_path):
+        """Тест пропуска очистки LFS в репозитории без LFS."""
+        (tmp_path / ".git").mkdir()
+        
+        handler = GitHandler({'repos': []})
+        stats = handler.prune_lfs(str(tmp_path))
+        
+        assert stats['bytesBefore'] == 0
+        assert stats['pruned'] is False
+        mock_run.assert_not_called()
+    
+    @patch('subprocess.run')
+    def test_prune_lfs(self, mock_run, tmp_path):
+        """Тест очистки кэша LFS с учетом освобожденного места."""
+        objects = tmp_path / ".git" / "lfs" / "objects" / "ab" / "cd"
+        objects.mkdir(parents=True)
+        old_object = objects / "abcd01"
+        old_object.write_bytes(b'0' * 1000)
+        (objects / "abcd02").write_bytes(b'0' * 500)
+        
+        def run(args, **kwargs):
+            if 'prune' in args:
+                old_object.unlink()
+            return Mock(returncode=0, stdout='', stderr='')
+        
+        mock_run.side_effect = run
+        
+        handler = GitHandler({'repos': [], 'lfsRetentionDays': 14})
+        stats = handler.prune_lfs(str(tmp_path))
+        
+        assert stats['pruned'] is True
+        assert stats['bytesBefore'] == 1500
+        assert stats['bytesAfter'] == 500
+        assert stats['bytesFreed'] == 1000
+        prune_args = mock_run.call_args_list[-1].args[0]
+        assert 'lfs.fetchrecentrefsdays=14' in prune_args
+    
+    def test_matches_cleanup_patterns(self):
+        """Тест сопоставления путей с allow-list шаблонов."""
+        handler = GitHandler({'repos': []})
+        
+        assert handler.matches_cleanup_patterns('build/out.cf', ['*.cf']) is True
+        assert handler.matches_cleanup_patterns('build/out.cfe', ['*.cf']) is False
+        assert handler.matches_cleanup_patterns('build/tmp/dump.xml', ['build/*']) is True
+        assert handler.matches_cleanup_patterns('src/tmp/dump.xml', ['build/*']) is False
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_clean_ignored_files(self, tmp_path):
+        """Тест удаления игнорируемых артефактов по allow-list."""
+        subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+        (tmp_path / ".gitignore").write_text("*.cf\nbuild/\n")
+        (tmp_path / "build").mkdir()
+        (tmp_path / "build" / "out.cf").write_bytes(b'0' * 300)
+        (tmp_path / "build" / "log.txt").write_bytes(b'0' * 10)
+        (tmp_path / "root.cf").write_bytes(b'0' * 200)
+        (tmp_path / "source.bsl").write_text("code")
+        
+        handler = GitHandler({'repos': [], 'ignoredCleanupPatterns': ['*.cf']})
+        stats = handler.clean_ignored_files(str(tmp_path))
+        
+        assert stats == {'files': 2, 'bytes': 500}
+        assert not (tmp_path / "build" / "out.cf").exists()
+        assert not (tmp_path / "root.cf").exists()
+        assert (tmp_path / "build" / "log.txt").exists()
+        assert (tmp_path / "source.bsl").exists()
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_consolidate_shared_objects(self, tmp_path):
+        """Тест объединения объектов клонов в общее хранилище."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com']
+        origin = tmp_path / "origin"
+        subprocess.run(['git', 'init', '-q', str(origin)], check=True)
+        (origin / "data.bin").write_bytes(os.urandom(64 * 1024))
+        subprocess.run(git + ['add', '.'], cwd=origin, check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=origin, check=True)
+        
+        clones = []
+        for name in ('clone1', 'clone2'):
+            clone = tmp_path / name
+            subprocess.run(['git', 'clone', '-q', '--no-local', str(origin), str(clone)], check=True)
+            clones.append(str(clone))
+        
+        shared_path = tmp_path / "shared"
+        handler = GitHandler({'repos': [], 'sharedObjectsPath': str(shared_path)})
+        
+        assert len(handler.find_clone_groups(clones + [str(tmp_path / "missing")])) == 1
+        
+        results = handler.consolidate_shared_objects(clones)
+        
+        for clone in clones:
+            stats = results[clone]
+            assert stats['errors'] == []
+            assert stats['shared'] is True
+            assert stats['objectsBytesAfter'] < stats['objectsBytesBefore']
+            fsck = subprocess.run(['git', 'fsck', '--connectivity-only'], cwd=clone, capture_output=True)
+            assert fsck.returncode == 0
+        
+        store = results[clones[0]]['store']
+        assert handler.run_git(store, ['config', 'gc.pruneExpire']).stdout.strip() == 'never'
+        assert results[clones[0]]['storeMaintenance']['storeBytes'] > 64 * 1024
+        assert results[clones[0]]['storeMaintenance']['repacked'] is False
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_shared_store_upkeep(self, tmp_path):
+        """Тест пропуска fetch без изменений ссылок и объединения pack-файлов хранилища."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com']
+        origin = tmp_path / "origin"
+        subprocess.run(['git', 'init', '-q', str(origin)], check=True)
+        (origin / "file.txt").write_text("init")
+        subprocess.run(git + ['add', '.'], cwd=origin, check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=origin, check=True)
+        
+        clones = []
+        for name in ('clone1', 'clone2'):
+            clone = tmp_path / name
+            subprocess.run(['git', 'clone', '-q', '--no-local', str(origin), str(clone)], check=True)
+            clones.append(str(clone))
+        
+        handler = GitHandler({'repos': [], 'sharedObjectsPath': str(tmp_path / "shared"), 'sharedStoreMaxPacks': 2, 'sharedStoreMaxLoose': 5})
+        handler.consolidate_shared_objects(clones)
+        
+        results = handler.consolidate_shared_objects(clones)
+        assert all(results[clone]['fetchSkipped'] for clone in clones)
+        
+        # Новые коммиты в клоне добавляют в хранилище loose-объекты
+        for i in range(3):
+            (tmp_path / "clone1" / "file.txt").write_text(f"change {i}")
+            subprocess.run(git + ['commit', '-q', '-a', '-m', f'change {i}'], cwd=clones[0], check=True)
+            results = handler.consolidate_shared_objects(clones)
+            assert results[clones[0]]['fetchSkipped'] is False
+        
+        maintenance = results[clones[0]]['storeMaintenance']
+        assert maintenance['repacked'] is True
+        assert maintenance['packsAfter'] == 1
+        assert maintenance['looseAfter'] == 0
+        for clone in clones:
+            fsck = subprocess.run(['git', 'fsck', '--connectivity-only'], cwd=clone, capture_output=True)
+            assert fsck.returncode == 0
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_find_repositories_dedup_worktrees(self, tmp_path):
+        """Тест однократной обработки хранилища объектов для worktree и symlink."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com']
+        search = tmp_path / "dev"
+        repo = search / "repo"
+        subprocess.run(['git', 'init', '-q', str(repo)], check=True)
+        (repo / "file.txt").write_text("content")
+        subprocess.run(git + ['add', '.'], cwd=repo, check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=repo, check=True)
+        subprocess.run(['git', 'worktree', 'add', '-q', str(search / "feature")], cwd=repo, check=True)
+        
+        link = tmp_path / "repo-link"
+        try:
+            link.symlink_to(repo, target_is_directory=True)
+        except OSError:
+            pytest.skip('Symlinks are not supported')
+        
+        handler = GitHandler({'repos': [str(link)], 'searchPaths': [str(search)]})
+        repos = handler.find_repositories()
+        
+        assert repos == [os.path.realpath(repo)]
+        assert handler.worktrees == {repos[0]: [os.path.realpath(search / "feature")]}
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_repository_size_via_worktree(self, tmp_path):
+        """Тест учета хранилища объектов репозитория, доступного только через worktree."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com']
+        repo = tmp_path / "repo"
+        subprocess.run(['git', 'init', '-q', str(repo)], check=True)
+        (repo / "data.bin").write_bytes(os.urandom(256 * 1024))
+        subprocess.run(git + ['add', '.'], cwd=repo, check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=repo, check=True)
+        worktree = tmp_path / "dev" / "feature"
+        subprocess.run(['git', 'worktree', 'add', '-q', str(worktree)], cwd=repo, check=True)
+        
+        handler = GitHandler({'repos': [], 'searchPaths': [str(tmp_path / "dev")]})
+        
+        assert handler.find_repositories() == [os.path.realpath(worktree)]
+        size = handler.get_repository_size_bytes(str(worktree))
+        checkout_size = sum(f.stat().st_size for f in worktree.rglob('*') if f.is_file())
+        objects_size = sum(f.stat().st_size for f in (repo / ".git" / "objects").rglob('*') if f.is_file())
+        assert size >= checkout_size + objects_size
+        # Каталог .git внутри основного рабочего каталога не учитывается повторно
+        repo_size = sum(f.stat().st_size for f in repo.rglob('*') if f.is_file())
+        assert handler.get_repository_size_bytes(str(repo)) == repo_size
+    
+    def test_find_submodules(self, tmp_path):
+        """Тест поиска хранилищ объектов submodules, включая вложенные."""
+        modules = tmp_path / ".git" / "modules"
+        for git_dir in (modules / "ext" / "core", modules / "ext" / "core" / "modules" / "inner"):
+            (git_dir / "objects").mkdir(parents=True)
+            (git_dir / "HEAD").write_text("ref: refs/heads/main\n")
+        
+        handler = GitHandler({'repos': []})
+        submodules = handler.find_submodules(str(tmp_path))
+        
+        assert submodules == [
+            str(modules / "ext" / "core"),
+            str(modules / "ext" / "core" / "modules" / "inner"),
+        ]
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_process_all_with_submodules(self, tmp_path):
+        """Тест обработки submodules в общем пуле с вложением результатов в родителя."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', '-c', 'protocol.file.allow=always']
+        library = tmp_path / "library"
+        parent = tmp_path / "dev" / "parent"
+        for repo in (library, parent):
+            subprocess.run(['git', 'init', '-q', str(repo)], check=True)
+            (repo / "file.txt").write_text(repo.name)
+            subprocess.run(git + ['add', '.'], cwd=repo, check=True)
+            subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=repo, check=True)
+        subprocess.run(git + ['submodule', '-q', 'add', str(library), 'lib'], cwd=parent, check=True)
+        
+        handler = GitHandler({'repos': [str(parent)], 'sizeThresholdGB': 0}, silent=True, max_workers=2)
+        results = handler.process_all()
+        
+        assert len(results) == 1
+        assert results[0]['status'] == 'success'
+        assert len(results[0]['submodules']) == 1
+        assert results[0]['submodules'][0]['status'] == 'success'
+        assert results[0]['submodules'][0]['path'].endswith(os.path.join('modules', 'lib'))
+        assert 'submodulesSpaceSaved' in results[0]
+    
+    def test_is_incompressible(self):
+        """Тест оценки сжимаемости данных."""
+        handler = GitHandler({'repos': []})
+        
+        assert handler.is_incompressible(os.urandom(64 * 1024)) is True
+        assert handler.is_incompressible(b'<xml>data</xml>' * 4096) is False
+        assert handler.is_incompressible(b'') is False
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_analyze_and_apply_delta_policy(self, tmp_path):
+        """Тест анализа двоичных файлов и применения политики -delta."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com']
+        subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+        (tmp_path / "report.epf").write_bytes(b'0' * 100)
+        (tmp_path / "data.dat").write_bytes(os.urandom(8192))
+        (tmp_path / "module.xml").write_bytes(b'<xml>data</xml>' * 1000)
+        subprocess.run(git + ['add', '.'], cwd=tmp_path, check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=tmp_path, check=True)
+        
+        handler = GitHandler({'repos': [], 'binaryAnalysisMinBytes': 4096, 'bigFileThreshold': '20m'})
+        policy = handler.analyze_binary_blobs(str(tmp_path))
+        
+        reasons = {item['extension']: item['reason'] for item in policy['extensions']}
+        assert reasons == {'.dat': 'compression', '.epf': 'extension'}
+        assert policy['attributes'] == ['*.dat -delta', '*.epf -delta']
+        
+        assert handler.apply_delta_policy(str(tmp_path), policy) is True
+        # Повторное применение не дублирует правила
+        assert handler.apply_delta_policy(str(tmp_path), policy) is True
+        
+        attributes = (tmp_path / ".git" / "info" / "attributes").read_text().splitlines()
+        assert attributes.count('*.epf -delta') == 1
+        assert handler.read_delta_policy(str(tmp_path)) == ['*.dat -delta', '*.epf -delta']
+        assert handler.get_local_config(str(tmp_path), 'core.bigFileThreshold') == '20m'
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_measure_delta_policy_sample(self, tmp_path):
+        """Тест ограничения выборки и чередования прогонов при замере политики -delta."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com']
+        subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+        for i in range(4):
+            (tmp_path / "report.epf").write_bytes(os.urandom(4096))
+            (tmp_path / "module.bsl").write_text(f"// version {i}")
+            subprocess.run(git + ['add', '.'], cwd=tmp_path, check=True)
+            subprocess.run(git + ['commit', '-q', '-m', f'v{i}'], cwd=tmp_path, check=True)
+        
+        handler = GitHandler({'repos': [], 'deltaSampleBytes': 3 * 4096, 'deltaMeasureRounds': 2})
+        sample = handler.collect_delta_sample(str(tmp_path), ['.epf'])
+        
+        assert len(sample) == 3
+        assert all(path == 'report.epf' for _, path in sample)
+        
+        calls = []
+        measure = handler.measure_pack_seconds
+        
+        def record(repo_path, objects, with_paths):
+            calls.append(with_paths)
+            return measure(repo_path, objects, with_paths)
+        
+        policy = {'extensions': [{'extension': '.epf'}]}
+        with patch.object(handler, 'measure_pack_seconds', side_effect=record):
+            measurement = handler.measure_delta_policy(str(tmp_path), policy)
+        
+        assert measurement['objects'] == 3
+        # Прогрев, затем пары в чередующемся порядке
+        assert calls == [True, False, True, True, False]
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_delta_policy_modes(self, tmp_path):
+        """Тест неизменности репозитория в режиме propose и замера эффекта в режиме apply."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com']
+        subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+        (tmp_path / "report.epf").write_bytes(os.urandom(8192))
+        subprocess.run(git + ['add', '.'], cwd=tmp_path, check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=tmp_path, check=True)
+        config_path = tmp_path / ".git" / "config"
+        config_before = config_path.read_text()
+        
+        handler = GitHandler({'repos': [], 'sizeThresholdGB': 0, 'optimizeAfterGc': False})
+        result = handler.process_repository(str(tmp_path))
+        
+        assert result['deltaPolicy']['attributes'] == ['*.epf -delta']
+        assert result['deltaPolicy']['applied'] is False
+        assert result['deltaPolicy']['repackTimeSaved'] is None
+        assert config_path.read_text() == config_before
+        assert handler.read_delta_policy(str(tmp_path)) == []
+        
+        handler.config['binaryDeltaPolicy'] = 'apply'
+        result = handler.process_repository(str(tmp_path))
+        
+        assert result['deltaPolicy']['applied'] is True
+        assert result['deltaPolicy']['repackTimeSaved'] is not None
+        assert result['deltaPolicy']['repackSample']['objects'] == 1
+        
+        # Неизмененная политика повторно не замеряется
+        result = handler.process_repository(str(tmp_path))
+        assert result['deltaPolicy']['applied'] is True
+        assert result['deltaPolicy']['repackTimeSaved'] is None
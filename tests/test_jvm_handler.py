@@ -0,0 +1,86 @@
+"""
+Тесты для модуля jvm_handler.
+"""
+
+import os
+import time
+import pytest
+from unittest.mock import patch
+from src.jvm_handler import JvmHandler
+
+
+class TestJvmHandler:
+    """Тесты класса JvmHandler."""
+    
+    def make_old(self, path):
+        """Сделать файл старше порога возраста."""
+        old_time = time.time() - 2 * 86400
+        os.utime(path, (old_time, old_time))
+    
+    def make_handler(self, root, **config):
+        """Создать обработчик только с указанной директорией поиска."""
+        config.setdefault('includeHome', False)
+        config.setdefault('includeTemp', False)
+        return JvmHandler({'searchPaths': [str(root)], **config}, silent=True)
+    
+    @pytest.mark.parametrize('dirname,filename,expected', [
+        ('ws', 'java_pid1234.hprof', ('heapDumps', 1234)),
+        ('ws', 'java_pid1234.0001.hprof', ('heapDumps', 1234)),
+        ('ws', 'hs_err_pid42.log', ('errorLogs', 42)),
+        ('hsperfdata_user', '777', ('perfData', 777)),
+        ('ws', '777', None),
+        ('ws', 'java_pid.hprof', None),
+    ])
+    def test_match_artifact(self, dirname, filename, expected):
+        """Тест распознавания артефактов по имени."""
+        assert JvmHandler({}).match_artifact(dirname, filename) == expected
+    
+    def test_find_artifacts_age_and_depth(self, tmp_path):
+        """Тест поиска с фильтром по возрасту и ограничением глубины."""
+        old_dump = tmp_path / "java_pid10.hprof"
+        old_dump.write_bytes(b"d" * 100)
+        self.make_old(old_dump)
+        (tmp_path / "hs_err_pid11.log").write_text("fresh")
+        deep = tmp_path / "a" / "b" / "c"
+        deep.mkdir(parents=True)
+        (deep / "hs_err_pid12.log").write_text("deep")
+        self.make_old(deep / "hs_err_pid12.log")
+        
+        handler = self.make_handler(tmp_path, maxDepth=2)
+        found = handler.find_artifacts([str(tmp_path)])
+        
+        assert [artifact['path'] for artifact in found[str(tmp_path)]] == [str(old_dump)]
+        assert found[str(tmp_path)][0]['bytes'] == 100
+    
+    def test_process_all_keeps_artifacts_of_live_jvm(self, tmp_path):
+        """Тест: артефакты живого процесса JVM не удаляются."""
+        dead = tmp_path / "java_pid100.hprof"
+        alive = tmp_path / "hs_err_pid200.log"
+        reused = tmp_path / "hs_err_pid300.log"
+        for path in (dead, alive, reused):
+            path.write_bytes(b"x" * 10)
+            self.make_old(path)
+        
+        handler = self.make_handler(tmp_path)
+        snapshot = {200: 'javaw.exe', 300: 'notepad.exe'}
+        with patch.object(handler, 'get_process_snapshot', return_value=snapshot):
+            results = handler.process_all()
+        
+        assert len(results) == 1
+        assert results[0]['artifactsFound'] == 3
+        assert results[0]['artifactsDeleted'] == 2
+        assert results[0]['skippedAlive'] == 1
+        assert results[0]['bytesFreed'] == 20
+        assert not dead.exists()
+        assert alive.exists()
+        assert not reused.exists()
+    
+    def test_search_roots_deduplicated(self, tmp_path):
+        """Тест исключения повторяющихся директорий поиска."""
+        handler = JvmHandler({
+            'searchPaths': [str(tmp_path), str(tmp_path / '..' / tmp_path.name), str(tmp_path / 'missing')],
+            'includeHome': False,
+            'includeTemp': False,
+        }, workspaces=[str(tmp_path)])
+        
+        assert handler.get_search_roots() == [str(tmp_path)]
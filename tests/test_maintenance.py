@@ -89,6 +89,13 @@ class TestMaintenanceSystem:
         
         assert result is True
     
+    def test_validate_config_jvm_only(self):
+        """Тест валидации конфигурации только с секцией jvm."""
+        system = MaintenanceSystem('test.json')
+        system.config = {'settings': {'jvm': {}}}
+        
+        assert system.validate_config() is True
+    
     def test_log_methods_silent(self, capsys):
         """Тест что в тихом режиме не выводятся сообщения (кроме ошибок)."""
         system = MaintenanceSystem('test.json', silent=True)
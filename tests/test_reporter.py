@@ -73,6 +73,30 @@ class TestReporter:
         assert report['summary']['workspacesProcessed'] == 1
         assert report['summary']['databasesProcessed'] == 1
     
+    def test_generate_report_with_jvm_results(self, tmp_path):
+        """Тест учета артефактов JVM в отчете."""
+        reporter = Reporter(str(tmp_path))
+        
+        start_time = datetime(2025, 10, 21, 20, 0, 0)
+        end_time = datetime(2025, 10, 21, 20, 5, 0)
+        jvm_results = [{
+            'path': 'C:\\Users\\dev',
+            'artifactsFound': 3,
+            'artifactsDeleted': 2,
+            'spaceSaved': 4.5,
+            'status': 'success',
+            'errors': []
+        }]
+        
+        report = reporter.generate_report(
+            [], [], [], start_time, end_time, {'jvm': True}, jvm_results
+        )
+        
+        assert report['summary']['totalSpaceSaved'] == 4.5
+        assert report['summary']['jvmArtifactsFound'] == 3
+        assert report['summary']['jvmArtifactsDeleted'] == 2
+        assert report['jvmArtifacts'] == jvm_results
+    
     def test_generate_report_with_errors(self, tmp_path):
         """Тест генерации отчета с ошибками."""
         reporter = Reporter(str(tmp_path))
@@ -0,0 +1,113 @@
+"""
+Тесты для модуля trash.
+"""
+
+import os
+import json
+import pytest
+from src.trash import DeferredPurge
+
+
+class TestDeferredPurge:
+    """Тесты класса DeferredPurge."""
+    
+    def make_workspace(self, tmp_path):
+        """Создать workspace с директорией истории из двух файлов."""
+        workspace = tmp_path / "workspace"
+        history = workspace / ".metadata" / ".history"
+        history.mkdir(parents=True)
+        (history / "a").write_bytes(b"1" * 10)
+        (history / "b").write_bytes(b"2" * 30)
+        return workspace, history
+    
+    def test_get_trash_dir_next_to_workspace(self, tmp_path):
+        """Тест создания корзины рядом с workspace."""
+        workspace, _ = self.make_workspace(tmp_path)
+        trash = DeferredPurge(silent=True)
+        
+        trash_dir = trash.get_trash_dir(str(workspace))
+        
+        assert trash_dir == str(tmp_path / DeferredPurge.TRASH_DIR_NAME)
+        assert os.path.isdir(trash_dir)
+    
+    def test_stage_and_purge(self, tmp_path):
+        """Тест переноса в корзину и фоновой очистки с учетом байт."""
+        workspace, history = self.make_workspace(tmp_path)
+        trash = DeferredPurge(silent=True)
+        
+        assert trash.stage(str(history), 'localHistory', str(workspace)) is True
+        assert not history.exists()
+        
+        trash.flush()
+        purged = trash.wait()
+        
+        assert purged[(str(workspace), 'localHistory')] == [2, 40]
+        trash_dir = tmp_path / DeferredPurge.TRASH_DIR_NAME
+        assert os.listdir(trash_dir) == []
+    
+    def test_resume_interrupted_purge(self, tmp_path):
+        """Тест: записи прерванной очистки удаляются при следующем запуске."""
+        workspace, _ = self.make_workspace(tmp_path)
+        trash_dir = tmp_path / DeferredPurge.TRASH_DIR_NAME
+        leftover = trash_dir / "leftover"
+        leftover.mkdir(parents=True)
+        (leftover / "file").write_bytes(b"x" * 5)
+        (trash_dir / DeferredPurge.JOURNAL_NAME).write_text(json.dumps({
+            'entries': {
+                'leftover': {'workspace': str(workspace), 'rule': 'localHistory'},
+                'already-purged': {'workspace': str(workspace), 'rule': 'workspaceLog'},
+            }
+        }))
+        
+        trash = DeferredPurge(silent=True)
+        trash.get_trash_dir(str(workspace))
+        purged = trash.wait()
+        
+        assert purged[(None, None)] == [1, 5]
+        assert not leftover.exists()
+        assert not (trash_dir / DeferredPurge.JOURNAL_NAME).exists()
+    
+    def test_resume_without_staging(self, tmp_path):
+        """Тест удаления остатков корзины без переноса новых целей."""
+        workspace, _ = self.make_workspace(tmp_path)
+        trash_dir = tmp_path / DeferredPurge.TRASH_DIR_NAME
+        leftover = trash_dir / "leftover"
+        leftover.mkdir(parents=True)
+        (leftover / "file").write_bytes(b"x" * 7)
+        
+        trash = DeferredPurge(silent=True)
+        
+        assert trash.resume(str(workspace)) == 1
+        # Повторный вызов для workspace с той же корзиной ничего не добавляет
+        assert trash.resume(str(workspace)) == 0
+        purged = trash.wait()
+        
+        assert purged[(None, None)] == [1, 7]
+        assert not leftover.exists()
+    
+    def test_resume_does_not_create_trash(self, tmp_path):
+        """Тест: корзина не создается, если ее нет."""
+        workspace, _ = self.make_workspace(tmp_path)
+        trash = DeferredPurge(silent=True)
+        
+        assert trash.resume(str(workspace)) == 0
+        assert not (tmp_path / DeferredPurge.TRASH_DIR_NAME).exists()
+    
+    def test_write_journal_lists_pending_entries(self, tmp_path):
+        """Тест записи журнала с ожидающими удаления записями."""
+        workspace, history = self.make_workspace(tmp_path)
+        trash = DeferredPurge(silent=True)
+        trash_dir = trash.get_trash_dir(str(workspace))
+        
+        # Поток очистки не запускаем, чтобы запись осталась в журнале
+        trash.start = lambda: None
+        trash.stage(str(history), 'localHistory', str(workspace))
+        trash.flush()
+        
+        with open(os.path.join(trash_dir, DeferredPurge.JOURNAL_NAME), encoding='utf-8') as f:
+            entries = json.load(f)['entries']
+        
+        assert len(entries) == 1
+        entry = next(iter(entries.values()))
+        assert entry['rule'] == 'localHistory'
+        assert entry['source'] == str(history)
@@ -0,0 +1,37 @@
+"""
+Тесты для деинсталлятора.
+"""
+
+import shutil
+import subprocess
+import pytest
+from src.git_handler import GitHandler
+from uninstall import restore_git_auto_gc
+
+
+class TestRestoreGitAutoGc:
+    """Тесты восстановления настроек автоматического gc."""
+    
+    @pytest.mark.skipif(shutil.which('git') is None, reason='Git is not available')
+    def test_restore_includes_submodules(self, tmp_path):
+        """Тест восстановления gc.auto в хранилищах submodules."""
+        git = ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', '-c', 'protocol.file.allow=always']
+        library = tmp_path / "library"
+        parent = tmp_path / "parent"
+        for repo in (library, parent):
+            subprocess.run(['git', 'init', '-q', str(repo)], check=True)
+            (repo / "file.txt").write_text(repo.name)
+            subprocess.run(git + ['add', '.'], cwd=repo, check=True)
+            subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=repo, check=True)
+        subprocess.run(git + ['submodule', '-q', 'add', str(library), 'lib'], cwd=parent, check=True)
+        
+        git_config = {'repos': [str(parent)], 'sizeThresholdGB': 0, 'autoGcTakeover': True}
+        handler = GitHandler(git_config, silent=True)
+        handler.process_all()
+        submodule = str(parent / ".git" / "modules" / "lib")
+        assert handler.get_local_config(submodule, 'gc.auto') == '0'
+        
+        assert restore_git_auto_gc({'settings': {'git': git_config}}) is True
+        
+        assert handler.get_local_config(str(parent), 'gc.auto') is None
+        assert handler.get_local_config(submodule, 'gc.auto') is None
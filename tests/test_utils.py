@@ -3,18 +3,29 @@
 """
 
 import os
+import stat
 import tempfile
 import pytest
 from pathlib import Path
+from unittest.mock import patch
+from src import utils
 from src.utils import (
     get_size_gb,
+    get_size_bytes,
     find_git_repos,
+    resolve_git_dir,
+    get_common_git_dir,
+    get_object_store_id,
     find_edt_workspaces,
     find_1c_databases,
     find_1c_platform,
     ensure_dir,
     safe_remove_file,
-    safe_remove_dir
+    safe_remove_dir,
+    remove_path_counted,
+    remove_tree,
+    find_duplicate_files,
+    replace_with_hardlink
 )
 
 
@@ -50,6 +61,30 @@ class TestGetSizeGb:
         assert 0.002 < size < 0.005  # Примерно 0.003 ГБ
 
 
+class TestGetSizeBytes:
+    """Тесты функции get_size_bytes."""
+    
+    def test_exclude(self, tmp_path):
+        """Тест исключения вложенной директории из размера."""
+        (tmp_path / "modules").mkdir()
+        (tmp_path / "file.txt").write_bytes(b'0' * 100)
+        (tmp_path / "modules" / "file.txt").write_bytes(b'0' * 50)
+        
+        assert get_size_bytes(str(tmp_path), [str(tmp_path / "modules")]) == 100
+    
+    def test_nonexistent_path(self):
+        """Тест для несуществующего пути."""
+        assert get_size_bytes('/nonexistent/path') == 0
+    
+    def test_directory_size(self, tmp_path):
+        """Тест для вложенной директории с файлами."""
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "file.txt").write_bytes(b'0' * 100)
+        (tmp_path / "sub" / "file.txt").write_bytes(b'0' * 50)
+        
+        assert get_size_bytes(str(tmp_path)) == 150
+
+
 class TestFindGitRepos:
     """Тесты функции find_git_repos."""
     
@@ -71,6 +106,19 @@ class TestFindGitRepos:
         assert str(repo1) in found_repos or str(repo1.resolve()) in found_repos
         assert str(repo2) in found_repos or str(repo2.resolve()) in found_repos
     
+    def test_find_worktree_with_git_file(self, tmp_path):
+        """Тест поиска рабочего каталога с файлом .git (связанный worktree)."""
+        main_git = tmp_path / "main" / ".git"
+        (main_git / "worktrees" / "wt").mkdir(parents=True)
+        
+        worktree = tmp_path / "wt"
+        worktree.mkdir()
+        (worktree / ".git").write_text(f"gitdir: {main_git / 'worktrees' / 'wt'}\n")
+        
+        found_repos = find_git_repos([str(tmp_path)])
+        
+        assert sorted(found_repos) == sorted([os.path.realpath(tmp_path / "main"), os.path.realpath(worktree)])
+    
     def test_no_repos_found(self, tmp_path):
         """Тест когда репозитории не найдены."""
         found_repos = find_git_repos([str(tmp_path)])
@@ -82,6 +130,38 @@ class TestFindGitRepos:
         assert len(found_repos) == 0
 
 
+class TestResolveGitDir:
+    """Тесты функций определения каталога git и хранилища объектов."""
+    
+    def test_git_directory(self, tmp_path):
+        """Тест для обычного каталога .git."""
+        (tmp_path / ".git").mkdir()
+        
+        assert resolve_git_dir(str(tmp_path)) == str(tmp_path / ".git")
+    
+    def test_not_a_repository(self, tmp_path):
+        """Тест для каталога без .git."""
+        assert resolve_git_dir(str(tmp_path)) is None
+    
+    def test_linked_worktree(self, tmp_path):
+        """Тест для связанного worktree с относительными ссылками."""
+        main_git = tmp_path / "main" / ".git"
+        wt_git = main_git / "worktrees" / "wt"
+        wt_git.mkdir(parents=True)
+        (main_git / "objects").mkdir()
+        (wt_git / "commondir").write_text("../..\n")
+        
+        worktree = tmp_path / "wt"
+        worktree.mkdir()
+        (worktree / ".git").write_text("gitdir: ../main/.git/worktrees/wt\n")
+        
+        git_dir = resolve_git_dir(str(worktree))
+        
+        assert git_dir == str(wt_git)
+        assert get_common_git_dir(git_dir) == str(main_git)
+        assert get_object_store_id(git_dir) == get_object_store_id(str(main_git))
+
+
 class TestFindEdtWorkspaces:
     """Тесты функции find_edt_workspaces."""
     
@@ -216,3 +296,157 @@ class TestSafeRemoveDir:
         result = safe_remove_dir('/nonexistent/directory')
         assert result is True  # Считаем успехом если директории и так нет
 
+
+
+class TestRemovePathCounted:
+    """Тесты функции remove_path_counted."""
+    
+    def test_remove_file(self, tmp_path):
+        """Тест удаления одного файла с подсчетом размера."""
+        test_file = tmp_path / "file.log"
+        test_file.write_bytes(b"x" * 100)
+        
+        files, size_bytes = remove_path_counted(str(test_file))
+        
+        assert (files, size_bytes) == (1, 100)
+        assert not test_file.exists()
+    
+    def test_remove_nested_directory(self, tmp_path):
+        """Тест удаления вложенной директории с подсчетом файлов и байт."""
+        test_dir = tmp_path / "history"
+        (test_dir / "a" / "b").mkdir(parents=True)
+        (test_dir / "root.txt").write_bytes(b"1" * 10)
+        (test_dir / "a" / "one.txt").write_bytes(b"2" * 20)
+        (test_dir / "a" / "b" / "two.txt").write_bytes(b"3" * 30)
+        
+        files, size_bytes = remove_path_counted(str(test_dir))
+        
+        assert (files, size_bytes) == (3, 60)
+        assert not test_dir.exists()
+    
+    def test_remove_nonexistent_path(self, tmp_path):
+        """Тест удаления несуществующего пути."""
+        assert remove_path_counted(str(tmp_path / "missing")) == (0, 0)
+
+
+class TestRemoveTree:
+    """Тесты параллельного удаления дерева remove_tree."""
+    
+    def build_tree(self, root, dirs=5, files_per_dir=20):
+        """Создать дерево с вложенными директориями и файлами по 10 байт."""
+        for d in range(dirs):
+            nested = root / f"d{d}" / "inner"
+            nested.mkdir(parents=True)
+            for f in range(files_per_dir):
+                (nested / f"f{f}").write_bytes(b"0123456789")
+        return dirs * files_per_dir
+    
+    @pytest.mark.parametrize('workers', [1, 4])
+    def test_remove_tree_counts(self, tmp_path, workers):
+        """Тест удаления дерева с подсчетом файлов и байт."""
+        root = tmp_path / "history"
+        expected_files = self.build_tree(root)
+        
+        files, size_bytes, ok = remove_tree(str(root), max_workers=workers)
+        
+        assert ok is True
+        assert files == expected_files
+        assert size_bytes == expected_files * 10
+        assert not root.exists()
+    
+    def test_remove_tree_nonexistent(self, tmp_path):
+        """Тест удаления несуществующей директории."""
+        assert remove_tree(str(tmp_path / "missing")) == (0, 0, True)
+    
+    def test_remove_tree_does_not_follow_symlinks(self, tmp_path):
+        """Тест: содержимое по ссылке на директорию не удаляется."""
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        (outside / "keep.txt").write_text("keep")
+        root = tmp_path / "root"
+        root.mkdir()
+        try:
+            os.symlink(str(outside), str(root / "link"), target_is_directory=True)
+        except (OSError, NotImplementedError):
+            pytest.skip("Symlinks are not supported")
+        
+        files, _, ok = remove_tree(str(root))
+        
+        assert ok is True
+        assert files == 1
+        assert not root.exists()
+        assert (outside / "keep.txt").exists()
+    
+    def test_remove_tree_directory_replaced_by_link(self, tmp_path):
+        """Тест: директория, подмененная ссылкой после обхода родителя, не очищается."""
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        (outside / "keep.txt").write_text("keep")
+        root = tmp_path / "root"
+        (root / "sub").mkdir(parents=True)
+        
+        clear_directory = utils._clear_directory
+        
+        def swap_then_clear(dirpath, expected=None):
+            # Подменяем директорию ссылкой между обходом родителя и ее открытием
+            if dirpath.endswith('sub'):
+                os.rmdir(dirpath)
+                try:
+                    os.symlink(str(outside), dirpath, target_is_directory=True)
+                except (OSError, NotImplementedError):
+                    pytest.skip("Symlinks are not supported")
+            return clear_directory(dirpath, expected)
+        
+        with patch.object(utils, '_clear_directory', side_effect=swap_then_clear):
+            _, _, ok = remove_tree(str(root))
+        
+        assert ok is False
+        assert (outside / "keep.txt").exists()
+    
+    def test_remove_tree_read_only_file(self, tmp_path):
+        """Тест удаления файла с атрибутом только для чтения."""
+        root = tmp_path / "root"
+        root.mkdir()
+        read_only = root / "readonly.txt"
+        read_only.write_text("data")
+        os.chmod(read_only, stat.S_IREAD)
+        
+        _, _, ok = remove_tree(str(root))
+        
+        assert ok is True
+        assert not root.exists()
+
+
+class TestFindDuplicateFiles:
+    """Тесты поиска одинаковых файлов и замены жесткими ссылками."""
+    
+    def test_find_duplicates(self, tmp_path):
+        """Тест группировки одинаковых файлов."""
+        content = os.urandom(100 * 1024)
+        (tmp_path / "a.jar").write_bytes(content)
+        (tmp_path / "b.jar").write_bytes(content)
+        (tmp_path / "same-size.jar").write_bytes(content[:-1] + b"!")
+        (tmp_path / "other.jar").write_bytes(b"x" * 10)
+        
+        groups = find_duplicate_files([str(p) for p in tmp_path.iterdir()])
+        
+        assert len(groups) == 1
+        assert sorted(groups[0]) == [str(tmp_path / "a.jar"), str(tmp_path / "b.jar")]
+    
+    def test_linked_files_are_not_duplicates(self, tmp_path):
+        """Тест: файлы, уже связанные жесткой ссылкой, не считаются дубликатами."""
+        (tmp_path / "a.jar").write_bytes(b"data" * 100)
+        os.link(tmp_path / "a.jar", tmp_path / "b.jar")
+        
+        assert find_duplicate_files([str(tmp_path / "a.jar"), str(tmp_path / "b.jar")]) == []
+    
+    def test_replace_with_hardlink(self, tmp_path):
+        """Тест замены файла жесткой ссылкой."""
+        source = tmp_path / "a.jar"
+        target = tmp_path / "b.jar"
+        source.write_bytes(b"data")
+        target.write_bytes(b"data")
+        
+        assert replace_with_hardlink(str(source), str(target)) is True
+        assert os.path.samefile(source, target)
+        assert not (tmp_path / "b.jar.sweeper-link").exists()
@@ -74,7 +74,7 @@ def check_config_exists():
 
 def remove_task_scheduler():
     """Удалить задачу из планировщика Windows."""
-    print_step(1, 5, 'Удаление задачи из планировщика Windows')
+    print_step(1, 6, 'Удаление задачи из планировщика Windows')
     
     task_name = '1C-Sweeper-Maintenance'
     
@@ -113,9 +113,54 @@ def remove_task_scheduler():
         return False
 
 
+def restore_git_auto_gc(config):
+    """Восстановить настройки автоматического gc в обслуживаемых репозиториях."""
+    print_step(2, 6, 'Восстановление настроек автоматического gc в Git-репозиториях')
+    
+    if not config or 'git' not in config.get('settings', {}):
+        log_message('ИНФО', 'Git-репозитории не настроены')
+        return True
+    
+    try:
+        from src.git_handler import GitHandler
+    except ImportError as e:
+        log_message('ОШИБКА', f'Не удалось загрузить модуль обработки Git: {e}')
+        return False
+    
+    handler = GitHandler(config['settings']['git'], silent=True)
+    if not handler.check_git_available():
+        log_message('ПРЕДУПРЕЖДЕНИЕ', 'Git недоступен, настройки не восстановлены')
+        return False
+    
+    # Автоматический gc отключается и в хранилищах submodules из .git/modules
+    repositories = []
+    for repo in handler.find_repositories():
+        repositories.append(repo)
+        try:
+            repositories.extend(handler.find_submodules(repo))
+        except Exception as e:
+            log_message('ОШИБКА', f'Не удалось найти submodules {repo}: {e}')
+    
+    restored_count = 0
+    for repo in repositories:
+        try:
+            if handler.restore_auto_gc(repo):
+                log_message('OK', f'Настройки gc восстановлены: {repo}')
+                restored_count += 1
+        except Exception as e:
+            log_message('ОШИБКА', f'Не удалось восстановить настройки {repo}: {e}')
+    
+    if restored_count > 0:
+        log_message('OK', f'Восстановлено репозиториев: {restored_count}')
+    else:
+        log_message('ИНФО', 'Измененные настройки gc не найдены')
+    
+    return True
+
+
 def remove_configuration():
     """Удалить конфигурационные файлы."""
-    print_step(2, 5, 'Удаление конфигурационных файлов')
+    print_step(3, 6, 'Удаление конфигурационных файлов')
     
     config_files = [
         'maintenance-config.json',
@@ -144,7 +189,7 @@ def remove_configuration():
 
 def remove_reports_directory(force=False):
     """Удалить директорию с отчетами."""
-    print_step(3, 5, 'Удаление директории с отчетами')
+    print_step(4, 6, 'Удаление директории с отчетами')
     
     # Сначала пытаемся найти путь из конфигурации
     config = check_config_exists()
@@ -193,7 +238,7 @@ def remove_reports_directory(force=False):
 
 def remove_dependencies(force=False):
     """Удалить установленные зависимости."""
-    print_step(4, 5, 'Удаление зависимостей')
+    print_step(5, 6, 'Удаление зависимостей')
     
     if not force and not get_yes_no('Удалить установленные Python-пакеты?', False):
         print('[ПРОПУЩЕНО] Зависимости сохранены')
@@ -238,7 +283,7 @@ def remove_dependencies(force=False):
 
 def remove_source_files(force=False):
     """Удалить исходные файлы системы."""
-    print_step(5, 5, 'Удаление исходных файлов')
+    print_step(6, 6, 'Удаление исходных файлов')
     
     if not force and not get_yes_no('Удалить исходные файлы системы 1C-Sweeper?', False):
         print('[ПРОПУЩЕНО] Исходные файлы сохранены')
@@ -290,6 +335,7 @@ def show_summary():
     
     print('Выполненные действия:')
     print('+ Удалена задача из планировщика Windows')
+    print('+ Восстановлены настройки автоматического gc в Git-репозиториях')
     print('+ Удалены конфигурационные файлы')
     print('+ Обработана директория с отчетами')
     print('+ Удалены зависимости (опционально)')
@@ -342,6 +388,7 @@ def main():
     print()
     print('Этот скрипт удалит:')
     print('- Задачу из планировщика Windows')
+    print('- Отключение автоматического gc в Git-репозиториях')
     print('- Конфигурационные файлы')
     print('- Директорию с отчетами (опционально)')
     print('- Установленные зависимости (опционально)')
@@ -366,11 +413,14 @@ def main():
     
     # Выполняем шаги деинсталляции
     success_count = 0
-    total_steps = 5
+    total_steps = 6
     
     if remove_task_scheduler():
         success_count += 1
     
+    if restore_git_auto_gc(config):
+        success_count += 1
+    
     if remove_configuration():
         success_count += 1
     